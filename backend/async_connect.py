@@ -0,0 +1,262 @@
+"""Asynchronous counterpart of DatabaseConnection, on psycopg 3.
+
+DatabaseConnection blocks the calling thread for every statement, so
+concurrent work (many benchmark tasks logging at once, the GUI plus
+background writes) queues up behind it. AsyncDatabaseConnection offers the
+same execute_query/execute_many plus COPY in both directions and pipelined
+batches on an asyncio connection pool, so many tasks can have statements in
+flight at once.
+
+Asyncio code uses it directly:
+
+    async with AsyncDatabaseConnection() as db:
+        await db.copy_rows('performance_logs', columns, rows)
+
+Qt code (or any other synchronous code) uses a BackgroundDatabase: a pool
+on an event loop running in a worker thread, whose coroutines return
+concurrent.futures.Future objects. The GUI's feedback list fetches its pages
+this way and hands the rows back to the GUI thread through a queued signal.
+
+Needs psycopg 3 and psycopg_pool (pip install "psycopg[binary]" psycopg_pool).
+"""
+import asyncio
+import logging
+import sys
+import threading
+
+from config import DB_CONFIG, CREATE_TABLES, MIGRATIONS
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    psycopg = None
+    sql = None
+    AsyncConnectionPool = None
+
+# conninfo strings whose tables and migrations this process has already applied
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def conninfo(config=DB_CONFIG):
+    """libpq connection string for a DB_CONFIG-style dict"""
+    return psycopg.conninfo.make_conninfo(
+        host=config['host'],
+        dbname=config['database'],
+        user=config['user'],
+        password=config['password'],
+        port=config['port']
+    )
+
+
+class AsyncDatabaseConnection:
+    """An asyncio connection pool with the DatabaseConnection methods as coroutines.
+
+    Unlike DatabaseConnection this is not a singleton: a pool belongs to the
+    event loop it was opened on.
+    """
+
+    def __init__(self, min_size=1, max_size=10, config=DB_CONFIG):
+        if psycopg is None:
+            raise RuntimeError('The async database connection needs psycopg 3 and psycopg_pool')
+        self.conninfo = conninfo(config)
+        self._connection_pool = AsyncConnectionPool(self.conninfo, min_size=min_size, max_size=max_size,
+                                                    open=False)
+
+    async def open(self):
+        try:
+            await self._connection_pool.open(wait=True)
+            await self._create_tables()
+        except Exception as e:
+            logging.error(f"Error initializing async connection pool: {e}")
+            # Otherwise the pool keeps retrying its connections in the background
+            await self.close_all()
+            raise
+        except asyncio.CancelledError:
+            await self.close_all()
+            raise
+        return self
+
+    async def _create_tables(self):
+        """Create all necessary tables if they don't exist and apply pending migrations.
+
+        Done once per database per process, not for every pool opened.
+        """
+        with _schema_lock:
+            if self.conninfo in _schema_ready:
+                return
+        async with self._connection_pool.connection() as conn:
+            for create_query in CREATE_TABLES.values():
+                await conn.execute(create_query)
+            for migration in MIGRATIONS:
+                await conn.execute(migration)
+        with _schema_lock:
+            _schema_ready.add(self.conninfo)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_all()
+
+    async def execute_query(self, query, params=None):
+        """Execute a query and return results"""
+        try:
+            # The pool commits when the block exits cleanly and rolls back on an error
+            async with self._connection_pool.connection() as conn:
+                cur = await conn.execute(query, params or ())
+                if cur.description:  # If the query returns data
+                    return await cur.fetchall()
+                return None
+        except Exception as e:
+            logging.error(f"Error executing query: {e}")
+            raise
+
+    async def execute_many(self, query, params_list):
+        """Execute a query multiple times with different parameters.
+
+        psycopg sends the whole batch in pipeline mode, without waiting for
+        each statement's result before sending the next.
+        """
+        try:
+            async with self._connection_pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.executemany(query, params_list)
+        except Exception as e:
+            logging.error(f"Error executing multiple queries: {e}")
+            raise
+
+    async def execute_pipeline(self, statements):
+        """Run a batch of (query, params) statements in one pipeline and one transaction.
+
+        Unlike execute_many the statements may differ. Returns the rows of
+        every statement that returns data, None for the others.
+        """
+        try:
+            async with self._connection_pool.connection() as conn:
+                async with conn.pipeline():
+                    cursors = [await conn.execute(query, params or ()) for query, params in statements]
+                return [await cur.fetchall() if cur.description else None for cur in cursors]
+        except Exception as e:
+            logging.error(f"Error executing pipeline: {e}")
+            raise
+
+    async def copy_rows(self, table, columns, rows):
+        """Load an iterable of rows into `table` with COPY FROM STDIN; returns the row count"""
+        copy = sql.SQL('COPY {} ({}) FROM STDIN').format(
+            sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, columns))
+        )
+        count = 0
+        try:
+            async with self._connection_pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    async with cur.copy(copy) as copier:
+                        for row in rows:
+                            await copier.write_row(row)
+                            count += 1
+            return count
+        except Exception as e:
+            logging.error(f"Error copying rows into {table}: {e}")
+            raise
+
+    async def copy_to(self, query, file, params=None, options='FORMAT csv, HEADER'):
+        """Write the result of a query to a binary file object with COPY ... TO STDOUT"""
+        try:
+            async with self._connection_pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    # COPY takes no bind parameters, so they are inlined
+                    if params:
+                        query = psycopg.AsyncClientCursor(conn).mogrify(query, params)
+                    async with cur.copy(f"COPY ({query}) TO STDOUT WITH ({options})") as copier:
+                        async for data in copier:
+                            file.write(data)
+                    return cur.rowcount
+        except Exception as e:
+            logging.error(f"Error copying query results: {e}")
+            raise
+
+    async def close_all(self):
+        """Close all connections in the pool"""
+        if self._connection_pool:
+            await self._connection_pool.close()
+            self._connection_pool = None
+
+
+class EventLoopThread:
+    """An asyncio event loop on a daemon thread, for calling coroutines from synchronous code.
+
+    submit() schedules a coroutine and returns a concurrent.futures.Future,
+    so the GUI thread never blocks on the database; run() waits for the
+    result.
+    """
+
+    def __init__(self, name='db-event-loop'):
+        # psycopg's async mode can't use the Proactor loop, Windows' default
+        self.loop = asyncio.SelectorEventLoop() if sys.platform == 'win32' else asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        if self.loop.is_running():
+            # Like asyncio.run: let unfinished tasks (an open still connecting)
+            # handle their cancellation before the loop goes away
+            async def cancel_tasks():
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self.run(cancel_tasks())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        self.loop.close()
+
+
+class BackgroundDatabase:
+    """An AsyncDatabaseConnection on its own EventLoopThread, for synchronous (Qt) callers.
+
+    Creating one doesn't wait for the pool: it is opened (connections, tables,
+    migrations) on the loop, and queries submitted meanwhile wait for it.
+    execute_query returns a concurrent.futures.Future at once; its result
+    (or exception, including a failure to open) is set on the loop's thread,
+    so callbacks added with add_done_callback must not touch widgets
+    directly.
+    """
+
+    def __init__(self, min_size=1, max_size=4, config=DB_CONFIG):
+        self.loop_thread = EventLoopThread()
+
+        async def open_pool():
+            # Created on the loop it will run on
+            return await AsyncDatabaseConnection(min_size, max_size, config).open()
+        self.opened = self.loop_thread.submit(open_pool())
+
+    @property
+    def failed(self):
+        """Whether opening the pool failed; never waits for it"""
+        return self.opened.done() and (self.opened.cancelled() or self.opened.exception() is not None)
+
+    def execute_query(self, query, params=None):
+        async def run():
+            db = await asyncio.wrap_future(self.opened)
+            return await db.execute_query(query, params)
+        return self.loop_thread.submit(run())
+
+    def close(self):
+        try:
+            # Still connecting: give up on it rather than wait
+            if not self.opened.cancel() and not self.failed:
+                self.loop_thread.run(self.opened.result().close_all())
+        finally:
+            self.loop_thread.stop()
@@ -9,6 +9,24 @@ DB_CONFIG = {
     'port': '5432'
 }
 
+# Connection pool size, and seconds a caller waits for a free connection
+# before giving up
+DB_POOL = {
+    'minconn': 1,
+    'maxconn': 10,
+    'timeout': 30
+}
+
+# Per-statement statistics (see query_stats): statements slower than slow_ms
+# are logged, with an EXPLAIN (ANALYZE, BUFFERS) plan if explain_slow is set;
+# p95 is taken over the last `samples` runs of each query
+QUERY_STATS = {
+    'enabled': True,
+    'slow_ms': 200,
+    'explain_slow': False,
+    'samples': 1000
+}
+
 # Table names
 TABLES = {
     'comparison_logs': 'comparison_logs',
@@ -58,7 +76,10 @@ CREATE_TABLES = {
             left_algorithm_id INTEGER NOT NULL,
             right_algorithm_id INTEGER NOT NULL,
             array_size INTEGER NOT NULL,
-            winner_algorithm_id INTEGER NOT NULL,
+            winner_algorithm_id INTEGER,
+            trials INTEGER,
+            p_value FLOAT,
+            effect_size FLOAT,
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
             FOREIGN KEY (left_algorithm_id) REFERENCES sorting_algorithms(algorithm_id) ON DELETE RESTRICT,
@@ -74,6 +95,11 @@ CREATE_TABLES = {
             execution_time_ms FLOAT NOT NULL,
             array_size INTEGER NOT NULL,
             array_data TEXT NOT NULL,
+            peak_memory_kb FLOAT,
+            peak_blocks INTEGER,
+            rss_delta_kb FLOAT,
+            run_mode VARCHAR(20) NOT NULL DEFAULT 'visual',
+            profile_path TEXT,
             timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
             FOREIGN KEY (algorithm_id) REFERENCES sorting_algorithms(algorithm_id) ON DELETE RESTRICT
@@ -90,6 +116,36 @@ CREATE_TABLES = {
     '''
 }
 
+# Schema changes made after the tables above were first released.
+# They run on every start so databases created by older versions catch up.
+MIGRATIONS = [
+    'ALTER TABLE performance_logs ADD COLUMN IF NOT EXISTS peak_memory_kb FLOAT',
+    # alloc_blocks held the peak count of live blocks, not allocations; renamed
+    '''DO $$ BEGIN
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_name = 'performance_logs' AND column_name = 'alloc_blocks')
+           AND NOT EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'performance_logs' AND column_name = 'peak_blocks') THEN
+            ALTER TABLE performance_logs RENAME COLUMN alloc_blocks TO peak_blocks;
+        END IF;
+    END $$''',
+    'ALTER TABLE performance_logs ADD COLUMN IF NOT EXISTS peak_blocks INTEGER',
+    'ALTER TABLE performance_logs ADD COLUMN IF NOT EXISTS rss_delta_kb FLOAT',
+    # 'visual' = animated GUI run, 'generator'/'fast' = benchmark runner timings
+    "ALTER TABLE performance_logs ADD COLUMN IF NOT EXISTS run_mode VARCHAR(20) NOT NULL DEFAULT 'visual'",
+    # NULL winner = no statistically significant difference
+    'ALTER TABLE comparison_logs ALTER COLUMN winner_algorithm_id DROP NOT NULL',
+    'ALTER TABLE comparison_logs ADD COLUMN IF NOT EXISTS trials INTEGER',
+    'ALTER TABLE comparison_logs ADD COLUMN IF NOT EXISTS p_value FLOAT',
+    'ALTER TABLE comparison_logs ADD COLUMN IF NOT EXISTS effect_size FLOAT',
+    # Keyset pagination of feedback, newest first: WHERE (timestamp, id) < (...)
+    'CREATE INDEX IF NOT EXISTS idx_user_feedback_timestamp_id ON user_feedback (timestamp, id)',
+    # Full-text search of feedback; queries must use the same to_tsvector expression
+    "CREATE INDEX IF NOT EXISTS idx_user_feedback_message_fts ON user_feedback USING GIN (to_tsvector('english', message))",
+    # .pstats or collapsed-stack file of a profiled run, on the machine that ran it
+    'ALTER TABLE performance_logs ADD COLUMN IF NOT EXISTS profile_path TEXT'
+]
+
 def load_config(filename='database.ini', section='postgresql'):
     parser = ConfigParser()
     parser.read(filename)
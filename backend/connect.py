@@ -1,7 +1,14 @@
 import psycopg2
 from psycopg2 import pool
-from config import DB_CONFIG, CREATE_TABLES
+from config import DB_CONFIG, DB_POOL, CREATE_TABLES, MIGRATIONS
+from query_stats import QueryStats, explain
 import logging
+import threading
+import time
+from collections import deque
+
+# Pool waits kept for the percentiles in pool_stats()
+POOL_WAIT_SAMPLES = 10000
 
 class DatabaseConnection:
     _instance = None
@@ -14,10 +21,21 @@ class DatabaseConnection:
         return cls._instance
 
     def _initialize_pool(self):
+        # psycopg2's pools fail when every connection is in use; callers
+        # queue on this semaphore instead, so waiting for a connection is
+        # measurable rather than an error
+        self._available = threading.BoundedSemaphore(DB_POOL['maxconn'])
+        self._stats_lock = threading.Lock()
+        self._pool_waits = deque(maxlen=POOL_WAIT_SAMPLES)
+        self._pool_acquired = 0
+        self._pool_wait_total = 0.0
+        self._pool_wait_max = 0.0
+        self._pool_timeouts = 0
+        self.query_stats = QueryStats()
         try:
-            self._connection_pool = pool.SimpleConnectionPool(
-                1,  # minconn
-                10,  # maxconn
+            self._connection_pool = pool.ThreadedConnectionPool(
+                DB_POOL['minconn'],
+                DB_POOL['maxconn'],
                 host=DB_CONFIG['host'],
                 database=DB_CONFIG['database'],
                 user=DB_CONFIG['user'],
@@ -30,12 +48,14 @@ class DatabaseConnection:
             raise
 
     def _create_tables(self):
-        """Create all necessary tables if they don't exist"""
+        """Create all necessary tables if they don't exist and apply pending migrations"""
         conn = self.get_connection()
         try:
             with conn.cursor() as cur:
                 for table_name, create_query in CREATE_TABLES.items():
                     cur.execute(create_query)
+                for migration in MIGRATIONS:
+                    cur.execute(migration)
             conn.commit()
         except Exception as e:
             logging.error(f"Error creating tables: {e}")
@@ -44,42 +64,169 @@ class DatabaseConnection:
             self.return_connection(conn)
 
     def get_connection(self):
-        """Get a connection from the pool"""
-        return self._connection_pool.getconn()
+        """Get a connection from the pool, waiting up to DB_POOL['timeout'] seconds for one"""
+        return self._checkout()[0]
+
+    def _checkout(self):
+        """A pool connection and the ms spent waiting for it"""
+        start = time.perf_counter()
+        if not self._available.acquire(timeout=DB_POOL['timeout']):
+            with self._stats_lock:
+                self._pool_timeouts += 1
+            raise pool.PoolError(f"No connection available after {DB_POOL['timeout']}s")
+        wait = time.perf_counter() - start
+        with self._stats_lock:
+            self._pool_acquired += 1
+            self._pool_wait_total += wait
+            self._pool_wait_max = max(self._pool_wait_max, wait)
+            self._pool_waits.append(wait)
+        try:
+            return self._connection_pool.getconn(), wait * 1000
+        except Exception:
+            self._available.release()
+            raise
 
     def return_connection(self, conn):
         """Return a connection to the pool"""
-        self._connection_pool.putconn(conn)
+        try:
+            self._connection_pool.putconn(conn)
+        finally:
+            self._available.release()
+
+    def pool_stats(self, reset=False):
+        """How long callers waited for a connection: counts, total and max in ms,
+        and p50/p95/p99 over the most recent POOL_WAIT_SAMPLES waits"""
+        with self._stats_lock:
+            waits = sorted(self._pool_waits)
+            stats = {
+                'acquired': self._pool_acquired,
+                'timeouts': self._pool_timeouts,
+                'wait_total_ms': self._pool_wait_total * 1000,
+                'wait_max_ms': self._pool_wait_max * 1000,
+                'maxconn': DB_POOL['maxconn']
+            }
+            for name, fraction in (('wait_p50_ms', 0.50), ('wait_p95_ms', 0.95), ('wait_p99_ms', 0.99)):
+                stats[name] = waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000 if waits else None
+            if reset:
+                self._pool_waits.clear()
+                self._pool_acquired = 0
+                self._pool_wait_total = 0.0
+                self._pool_wait_max = 0.0
+                self._pool_timeouts = 0
+        return stats
+
+    def _record(self, conn, query, params, start, rows, pool_wait_ms, error, explainable=True):
+        """Add a statement to query_stats, capturing its plan if it was slow"""
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if self.query_stats.record(query, elapsed_ms, rows, pool_wait_ms, error) and explainable:
+            plan = explain(conn, query, params)
+            if plan:
+                self.query_stats.add_plan(query, plan)
 
     def execute_query(self, query, params=None):
         """Execute a query and return results"""
-        conn = self.get_connection()
+        conn, pool_wait_ms = self._checkout()
+        start = time.perf_counter()
+        rows = None
+        error = False
         try:
             with conn.cursor() as cur:
                 cur.execute(query, params or ())
-                if cur.description:  # If the query returns data
-                    return cur.fetchall()
-                conn.commit()
-                return None
+                rows = cur.rowcount
+                result = cur.fetchall() if cur.description else None  # If the query returns data
+            # Also for queries that return data: an INSERT ... RETURNING must
+            # be committed before the connection goes back to the pool
+            conn.commit()
+            return result
         except Exception as e:
+            error = True
             conn.rollback()
             logging.error(f"Error executing query: {e}")
             raise
         finally:
+            self._record(conn, query, params, start, rows, pool_wait_ms, error)
             self.return_connection(conn)
 
     def execute_many(self, query, params_list):
         """Execute a query multiple times with different parameters"""
-        conn = self.get_connection()
+        conn, pool_wait_ms = self._checkout()
+        start = time.perf_counter()
+        rows = None
+        error = False
         try:
             with conn.cursor() as cur:
                 cur.executemany(query, params_list)
+                rows = cur.rowcount
             conn.commit()
         except Exception as e:
+            error = True
             conn.rollback()
             logging.error(f"Error executing multiple queries: {e}")
             raise
         finally:
+            # A slow batch is explained with its first row's parameters
+            first = params_list[0] if params_list else None
+            self._record(conn, query, first, start, rows, pool_wait_ms, error, explainable=first is not None)
+            self.return_connection(conn)
+
+    def stream_query(self, query, params=None, chunk_size=10000):
+        """Yield the rows of a query in lists of at most chunk_size rows.
+
+        Uses a server-side (named) cursor, so only one chunk is held in memory
+        however many rows the query returns.
+        """
+        conn, pool_wait_ms = self._checkout()
+        start = time.perf_counter()
+        count = 0
+        error = False
+        try:
+            with conn.cursor(name='stream_query') as cur:
+                cur.itersize = chunk_size
+                cur.execute(query, params or ())
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    count += len(rows)
+                    yield rows
+            conn.commit()
+        except Exception as e:
+            error = True
+            conn.rollback()
+            logging.error(f"Error streaming query: {e}")
+            raise
+        finally:
+            # Includes the time the consumer spent on each chunk; never explained,
+            # as a stream is expected to be long
+            self._record(conn, query, params, start, count, pool_wait_ms, error, explainable=False)
+            self.return_connection(conn)
+
+    def copy_to(self, query, file, params=None, options='FORMAT csv, HEADER'):
+        """Write the result of a query to a file object with COPY ... TO STDOUT.
+
+        The server sends the rows as it produces them and they are written
+        straight to `file`. Returns the number of rows copied.
+        """
+        conn, pool_wait_ms = self._checkout()
+        start = time.perf_counter()
+        rows = None
+        error = False
+        try:
+            with conn.cursor() as cur:
+                # COPY takes no bind parameters, so they are inlined
+                sql = cur.mogrify(query, params or ()).decode()
+                cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH ({options})", file)
+                rows = cur.rowcount
+            conn.commit()
+            return rows
+        except Exception as e:
+            error = True
+            conn.rollback()
+            logging.error(f"Error copying query results: {e}")
+            raise
+        finally:
+            self._record(conn, f"COPY ({query}) TO STDOUT", params, start, rows, pool_wait_ms, error,
+                         explainable=False)
             self.return_connection(conn)
 
     def close_all(self):
@@ -0,0 +1,255 @@
+"""Export tables to CSV or Parquet in constant memory.
+
+CSV is produced by the server with COPY ... TO STDOUT and written to the file
+as it arrives. Parquet is read through a server-side cursor in fixed-size
+chunks, each chunk becoming one row group, so neither format ever holds a
+whole table in memory. Parquet needs pyarrow.
+
+Log tables are exported with user and algorithm names instead of ids, in the
+column layout of the old CSV dumps (timestamp, username, algorithm, ...)
+followed by the newer columns, so an export can be read without the database.
+
+Password hashes are left out of the users export unless
+--include-password-hashes is given; without them the exported users can't be
+imported again (see import_csv).
+
+Example:
+    python export.py --tables performance_logs --since 2025-05-01 --algorithm "Merge Sort"
+    python export.py --format parquet --output-dir exports
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime
+
+from connect import DatabaseConnection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Per table: the selected columns as (name, SQL expression, type), the FROM
+# clause, the column the date range applies to and the algorithm name
+# columns the algorithm filter applies to (a row matches if any of them does).
+# 'secret_columns' are only exported on request.
+EXPORTS = {
+    'users': {
+        'columns': [
+            ('username', 'u.username', 'text'),
+            ('password_hash', 'u.password_hash', 'text'),
+            ('created_at', 'u.created_at', 'timestamp')
+        ],
+        'from': 'users u',
+        'secret_columns': ['password_hash'],
+        'time_column': 'u.created_at',
+        'algorithm_columns': [],
+        'order_by': 'u.id'
+    },
+    'sorting_algorithms': {
+        'columns': [
+            ('name', 'a.name', 'text'),
+            ('description', 'a.description', 'text'),
+            ('time_complexity', 'a.time_complexity', 'text'),
+            ('space_complexity', 'a.space_complexity', 'text'),
+            ('created_at', 'a.created_at', 'timestamp')
+        ],
+        'from': 'sorting_algorithms a',
+        'time_column': 'a.created_at',
+        'algorithm_columns': ['a.name'],
+        'order_by': 'a.algorithm_id'
+    },
+    'user_settings': {
+        'columns': [
+            ('username', 'u.username', 'text'),
+            ('default_color', 's.default_color', 'text'),
+            ('complete_color', 's.complete_color', 'text'),
+            ('animation_speed', 's.animation_speed', 'int'),
+            ('updated_at', 's.updated_at', 'timestamp')
+        ],
+        'from': 'user_settings s JOIN users u ON s.user_id = u.id',
+        'time_column': 's.updated_at',
+        'algorithm_columns': [],
+        'order_by': 's.id'
+    },
+    'user_feedback': {
+        'columns': [
+            ('timestamp', 'f.timestamp', 'timestamp'),
+            ('username', 'u.username', 'text'),
+            ('message', 'f.message', 'text')
+        ],
+        'from': 'user_feedback f JOIN users u ON f.user_id = u.id',
+        'time_column': 'f.timestamp',
+        'algorithm_columns': [],
+        'order_by': 'f.id'
+    },
+    'performance_logs': {
+        'columns': [
+            ('timestamp', 'p.timestamp', 'timestamp'),
+            ('username', 'u.username', 'text'),
+            ('algorithm', 'a.name', 'text'),
+            ('execution_time_ms', 'p.execution_time_ms', 'float'),
+            ('array_size', 'p.array_size', 'int'),
+            ('array_data', 'p.array_data', 'text'),
+            ('peak_memory_kb', 'p.peak_memory_kb', 'float'),
+            ('peak_blocks', 'p.peak_blocks', 'int'),
+            ('rss_delta_kb', 'p.rss_delta_kb', 'float'),
+            ('run_mode', 'p.run_mode', 'text'),
+            ('profile_path', 'p.profile_path', 'text')
+        ],
+        'from': '''performance_logs p
+            JOIN users u ON p.user_id = u.id
+            JOIN sorting_algorithms a ON p.algorithm_id = a.algorithm_id''',
+        'time_column': 'p.timestamp',
+        'algorithm_columns': ['a.name'],
+        'order_by': 'p.id'
+    },
+    'comparison_logs': {
+        'columns': [
+            ('timestamp', 'c.timestamp', 'timestamp'),
+            ('username', 'u.username', 'text'),
+            ('left_algorithm', 'la.name', 'text'),
+            ('right_algorithm', 'ra.name', 'text'),
+            ('array_size', 'c.array_size', 'int'),
+            ('winner', 'wa.name', 'text'),
+            ('trials', 'c.trials', 'int'),
+            ('p_value', 'c.p_value', 'float'),
+            ('effect_size', 'c.effect_size', 'float')
+        ],
+        'from': '''comparison_logs c
+            JOIN users u ON c.user_id = u.id
+            JOIN sorting_algorithms la ON c.left_algorithm_id = la.algorithm_id
+            JOIN sorting_algorithms ra ON c.right_algorithm_id = ra.algorithm_id
+            LEFT JOIN sorting_algorithms wa ON c.winner_algorithm_id = wa.algorithm_id''',
+        'time_column': 'c.timestamp',
+        'algorithm_columns': ['la.name', 'ra.name'],
+        'order_by': 'c.id'
+    }
+}
+
+
+def export_columns(table, include_secrets=False):
+    """(name, SQL expression, type) of the columns exported from `table`"""
+    spec = EXPORTS[table]
+    secret = set() if include_secrets else set(spec.get('secret_columns', []))
+    return [column for column in spec['columns'] if column[0] not in secret]
+
+
+def build_query(table, since=None, until=None, algorithms=None, include_secrets=False):
+    """SELECT statement and parameters exporting `table` with the given filters.
+
+    The date range is half-open: since <= time < until.
+    """
+    spec = EXPORTS[table]
+    conditions = []
+    params = []
+    if since is not None:
+        conditions.append(f"{spec['time_column']} >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append(f"{spec['time_column']} < %s")
+        params.append(until)
+    if algorithms:
+        if not spec['algorithm_columns']:
+            logging.info(f"{table} has no algorithm column; the algorithm filter does not apply")
+        else:
+            matches = [f"{column} = ANY(%s)" for column in spec['algorithm_columns']]
+            conditions.append('(' + ' OR '.join(matches) + ')')
+            params.extend([list(algorithms)] * len(matches))
+    select = ', '.join(f"{expression} AS {name}" for name, expression, _ in export_columns(table, include_secrets))
+    query = f"SELECT {select} FROM {spec['from']}"
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f" ORDER BY {spec['order_by']}"
+    return query, params
+
+
+def parquet_schema(table, include_secrets=False):
+    types = {
+        'text': pa.string(),
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'timestamp': pa.timestamp('us')
+    }
+    return pa.schema([(name, types[kind]) for name, _, kind in export_columns(table, include_secrets)])
+
+
+def export_csv(db, table, path, query, params):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        return db.copy_to(query, f, params)
+
+
+def export_parquet(db, table, path, query, params, chunk_size, include_secrets=False):
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = parquet_schema(table, include_secrets)
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in db.stream_query(query, params, chunk_size):
+            columns = list(zip(*chunk))
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            rows += len(chunk)
+    return rows
+
+
+def export_table(db, table, output_dir, fmt='csv', since=None, until=None, algorithms=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, include_secrets=False):
+    """Export one table to `output_dir`; returns (path, rows, seconds)"""
+    query, params = build_query(table, since, until, algorithms, include_secrets)
+    path = os.path.join(output_dir, f"{table}.{fmt}")
+    start = time.perf_counter()
+    if fmt == 'parquet':
+        rows = export_parquet(db, table, path, query, params, chunk_size, include_secrets)
+    else:
+        rows = export_csv(db, table, path, query, params)
+    return path, rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export tables to CSV or Parquet')
+    parser.add_argument('--tables', nargs='+', choices=list(EXPORTS), default=list(EXPORTS),
+                        help='Tables to export (default: all)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output-dir', default='.', help='Directory the files are written to')
+    parser.add_argument('--since', type=datetime.fromisoformat,
+                        help='Only rows at or after this date/time (YYYY-MM-DD[ HH:MM:SS])')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='Only rows before this date/time')
+    parser.add_argument('--algorithm', action='append', dest='algorithms',
+                        help='Only rows involving this algorithm (repeatable)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Rows fetched per round trip for Parquet export')
+    parser.add_argument('--include-password-hashes', action='store_true',
+                        help='Also export users.password_hash (needed to import the users elsewhere)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.format == 'parquet' and pa is None:
+        parser.error('Parquet export needs pyarrow (pip install pyarrow)')
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    db = DatabaseConnection()
+    try:
+        for table in args.tables:
+            try:
+                path, rows, seconds = export_table(db, table, args.output_dir, args.format, args.since,
+                                                   args.until, args.algorithms, args.chunk_size,
+                                                   args.include_password_hashes)
+                rate = rows / seconds if seconds else 0.0
+                print(f"{table}: {rows} rows -> {path} ({os.path.getsize(path) / 1024 ** 2:.1f}MB, "
+                      f"{seconds:.1f}s, {rate:.0f} rows/s)")
+            except Exception as e:
+                logging.error(f"Error exporting {table}: {e}")
+    finally:
+        db.close_all()
+
+
+if __name__ == '__main__':
+    main()
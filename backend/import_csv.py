@@ -0,0 +1,311 @@
+"""Import CSV dumps of the old schema (backend/sql.sql) into the current one.
+
+The old tables were keyed by username and algorithm name, the current ones by
+integer ids. Each file is streamed into a temporary staging table with
+COPY ... FROM STDIN, and a single INSERT ... SELECT resolves the names by
+joining users and sorting_algorithms, so no query is made per row and the
+file is never held in memory.
+
+Imports are idempotent: rows already in the target table are skipped, so
+the same dump can be imported again, or merged from several installs, without
+creating duplicates. Rows naming an unknown user or algorithm are skipped and
+counted. Files written by export.py have the same leading columns and are
+accepted too, along with their extra columns.
+
+Example:
+    python import_csv.py --dir ..
+    python import_csv.py ../performance_logs.csv ../comparison_logs.csv --dry-run
+"""
+import argparse
+import csv
+import logging
+import os
+import time
+
+from psycopg2 import sql
+
+from connect import DatabaseConnection
+
+# Tables in the order they have to be imported: later ones reference users
+# and algorithms by name
+IMPORT_ORDER = ['users', 'sorting_algorithms', 'user_settings', 'user_feedback',
+                'performance_logs', 'comparison_logs']
+
+# Header names of the old dumps that differ from the staging column names
+HEADER_ALIASES = {
+    'algorithmid': 'algorithm_id',
+    'timecomplexity': 'time_complexity',
+    'spacecomplexity': 'space_complexity',
+    # Exports made before the column was renamed
+    'alloc_blocks': 'peak_blocks'
+}
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Per table: the staging columns the INSERT reads, which of them the file
+# must have, the INSERT ... SELECT from the staging table and a count of the
+# staging rows whose names don't resolve (None when nothing is looked up).
+# Each INSERT takes one row per natural key (DISTINCT ON), so rows repeated
+# within a file are imported once, like rows already in the table.
+IMPORTS = {
+    'users': {
+        'columns': ['username', 'password_hash', 'created_at'],
+        'required': ['username', 'password_hash'],
+        'insert': '''
+            INSERT INTO users (username, password_hash, created_at)
+            SELECT DISTINCT ON (s.username) s.username, s.password_hash,
+                   COALESCE(s.created_at::timestamp, CURRENT_TIMESTAMP)
+            FROM import_staging s
+            WHERE s.username IS NOT NULL
+            ORDER BY s.username
+            ON CONFLICT (username) DO NOTHING
+        ''',
+        'unresolved': None
+    },
+    'sorting_algorithms': {
+        'columns': ['name', 'description', 'time_complexity', 'space_complexity', 'created_at'],
+        'required': ['name', 'description', 'time_complexity', 'space_complexity'],
+        'insert': '''
+            INSERT INTO sorting_algorithms (name, description, time_complexity, space_complexity, created_at)
+            SELECT DISTINCT ON (s.name) s.name, s.description, s.time_complexity, s.space_complexity,
+                   COALESCE(s.created_at::timestamp, CURRENT_TIMESTAMP)
+            FROM import_staging s
+            WHERE s.name IS NOT NULL
+            ORDER BY s.name
+            ON CONFLICT (name) DO NOTHING
+        ''',
+        'unresolved': None
+    },
+    'user_settings': {
+        'columns': ['username', 'default_color', 'complete_color', 'animation_speed', 'updated_at'],
+        'required': ['username', 'default_color', 'complete_color', 'animation_speed'],
+        # Settings already saved on this install win over imported ones
+        'insert': '''
+            INSERT INTO user_settings (user_id, default_color, complete_color, animation_speed, updated_at)
+            SELECT DISTINCT ON (u.id) u.id, s.default_color, s.complete_color, s.animation_speed::integer,
+                   COALESCE(s.updated_at::timestamp, CURRENT_TIMESTAMP)
+            FROM import_staging s
+            JOIN users u ON u.username = s.username
+            ORDER BY u.id
+            ON CONFLICT (user_id) DO NOTHING
+        ''',
+        'unresolved': '''
+            SELECT COUNT(*) FROM import_staging s
+            LEFT JOIN users u ON u.username = s.username
+            WHERE u.id IS NULL
+        '''
+    },
+    'user_feedback': {
+        'columns': ['timestamp', 'username', 'message'],
+        'required': ['timestamp', 'username', 'message'],
+        'insert': '''
+            INSERT INTO user_feedback (user_id, message, timestamp)
+            SELECT DISTINCT ON (u.id, s.timestamp::timestamp, s.message)
+                   u.id, s.message, s.timestamp::timestamp
+            FROM import_staging s
+            JOIN users u ON u.username = s.username
+            WHERE NOT EXISTS (
+                SELECT 1 FROM user_feedback f
+                WHERE f.user_id = u.id AND f.timestamp = s.timestamp::timestamp AND f.message = s.message
+            )
+        ''',
+        'unresolved': '''
+            SELECT COUNT(*) FROM import_staging s
+            LEFT JOIN users u ON u.username = s.username
+            WHERE u.id IS NULL
+        '''
+    },
+    'performance_logs': {
+        'columns': ['timestamp', 'username', 'algorithm', 'execution_time_ms', 'array_size', 'array_data',
+                    'peak_memory_kb', 'peak_blocks', 'rss_delta_kb', 'run_mode', 'profile_path'],
+        'required': ['timestamp', 'username', 'algorithm', 'execution_time_ms', 'array_size', 'array_data'],
+        # Old dumps predate run_mode; their rows all come from the GUI
+        'insert': '''
+            INSERT INTO performance_logs (user_id, algorithm_id, execution_time_ms, array_size, array_data,
+                                          peak_memory_kb, peak_blocks, rss_delta_kb, run_mode, profile_path,
+                                          timestamp)
+            SELECT DISTINCT ON (u.id, a.algorithm_id, s.timestamp::timestamp, s.execution_time_ms::float,
+                                s.array_size::integer, COALESCE(s.run_mode, 'visual'), s.array_data)
+                   u.id, a.algorithm_id, s.execution_time_ms::float, s.array_size::integer, s.array_data,
+                   s.peak_memory_kb::float, s.peak_blocks::integer, s.rss_delta_kb::float,
+                   COALESCE(s.run_mode, 'visual'), s.profile_path, s.timestamp::timestamp
+            FROM import_staging s
+            JOIN users u ON u.username = s.username
+            JOIN sorting_algorithms a ON a.name = s.algorithm
+            WHERE NOT EXISTS (
+                SELECT 1 FROM performance_logs p
+                WHERE p.user_id = u.id AND p.algorithm_id = a.algorithm_id
+                  AND p.timestamp = s.timestamp::timestamp
+                  AND p.execution_time_ms = s.execution_time_ms::float
+                  AND p.array_size = s.array_size::integer
+                  AND p.run_mode = COALESCE(s.run_mode, 'visual')
+                  AND p.array_data = s.array_data
+            )
+        ''',
+        'unresolved': '''
+            SELECT COUNT(*) FROM import_staging s
+            LEFT JOIN users u ON u.username = s.username
+            LEFT JOIN sorting_algorithms a ON a.name = s.algorithm
+            WHERE u.id IS NULL OR a.algorithm_id IS NULL
+        '''
+    },
+    'comparison_logs': {
+        'columns': ['timestamp', 'username', 'left_algorithm', 'right_algorithm', 'array_size', 'winner',
+                    'trials', 'p_value', 'effect_size'],
+        'required': ['timestamp', 'username', 'left_algorithm', 'right_algorithm', 'array_size', 'winner'],
+        # An empty winner means no significant difference; a winner that
+        # doesn't resolve is skipped rather than imported as a tie
+        'insert': '''
+            INSERT INTO comparison_logs (user_id, left_algorithm_id, right_algorithm_id, array_size,
+                                         winner_algorithm_id, trials, p_value, effect_size, timestamp)
+            SELECT DISTINCT ON (u.id, la.algorithm_id, ra.algorithm_id, s.array_size::integer,
+                                s.timestamp::timestamp, wa.algorithm_id)
+                   u.id, la.algorithm_id, ra.algorithm_id, s.array_size::integer, wa.algorithm_id,
+                   s.trials::integer, s.p_value::float, s.effect_size::float, s.timestamp::timestamp
+            FROM import_staging s
+            JOIN users u ON u.username = s.username
+            JOIN sorting_algorithms la ON la.name = s.left_algorithm
+            JOIN sorting_algorithms ra ON ra.name = s.right_algorithm
+            LEFT JOIN sorting_algorithms wa ON wa.name = s.winner
+            WHERE (s.winner IS NULL OR wa.algorithm_id IS NOT NULL)
+              AND NOT EXISTS (
+                SELECT 1 FROM comparison_logs c
+                WHERE c.user_id = u.id AND c.left_algorithm_id = la.algorithm_id
+                  AND c.right_algorithm_id = ra.algorithm_id
+                  AND c.array_size = s.array_size::integer
+                  AND c.timestamp = s.timestamp::timestamp
+                  AND c.winner_algorithm_id IS NOT DISTINCT FROM wa.algorithm_id
+              )
+        ''',
+        'unresolved': '''
+            SELECT COUNT(*) FROM import_staging s
+            LEFT JOIN users u ON u.username = s.username
+            LEFT JOIN sorting_algorithms la ON la.name = s.left_algorithm
+            LEFT JOIN sorting_algorithms ra ON ra.name = s.right_algorithm
+            LEFT JOIN sorting_algorithms wa ON wa.name = s.winner
+            WHERE u.id IS NULL OR la.algorithm_id IS NULL OR ra.algorithm_id IS NULL
+               OR (s.winner IS NOT NULL AND wa.algorithm_id IS NULL)
+        '''
+    }
+}
+
+
+def table_for(path):
+    """Target table of a dump, from its file name (performance_logs.csv -> performance_logs)"""
+    table = os.path.splitext(os.path.basename(path))[0]
+    if table not in IMPORTS:
+        raise ValueError(f"Cannot tell which table {path} belongs to; use --table")
+    return table
+
+
+def read_header(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        raise ValueError(f"{path} is empty")
+    columns = [name.strip().lower() for name in header]
+    return [HEADER_ALIASES.get(name, name) for name in columns]
+
+
+def import_file(db, path, table, dry_run=False):
+    """Import one dump into `table`.
+
+    Returns a dict with the rows read, inserted, skipped as duplicates and
+    skipped as unresolved, and the seconds taken.
+    """
+    spec = IMPORTS[table]
+    header = read_header(path)
+    missing = [name for name in spec['required'] if name not in header]
+    if missing:
+        raise ValueError(f"{path} is missing columns for {table}: {', '.join(missing)}")
+    # Columns of the file the INSERT doesn't use are loaded and ignored, since
+    # COPY has to consume every column
+    staging_columns = spec['columns'] + [name for name in header if name not in spec['columns']]
+
+    start = time.perf_counter()
+    conn = db.get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL('CREATE TEMP TABLE import_staging ({}) ON COMMIT DROP').format(
+                sql.SQL(', ').join(sql.SQL('{} TEXT').format(sql.Identifier(name)) for name in staging_columns)
+            ))
+            copy = sql.SQL('COPY import_staging ({}) FROM STDIN WITH (FORMAT csv, HEADER)').format(
+                sql.SQL(', ').join(map(sql.Identifier, header))
+            )
+            with open(path, 'rb') as f:
+                cur.copy_expert(copy.as_string(conn), f, size=COPY_BUFFER_SIZE)
+            loaded = cur.rowcount
+            # Fresh statistics so the lookups and the duplicate check use hash joins
+            cur.execute('ANALYZE import_staging')
+            unresolved = 0
+            if spec['unresolved']:
+                cur.execute(spec['unresolved'])
+                unresolved = cur.fetchone()[0]
+            cur.execute(spec['insert'])
+            inserted = cur.rowcount
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Error importing {path}: {e}")
+        raise
+    finally:
+        db.return_connection(conn)
+
+    return {
+        'rows': loaded,
+        'inserted': inserted,
+        'duplicates': loaded - inserted - unresolved,
+        'unresolved': unresolved,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def find_dumps(directory):
+    """The dumps in `directory` named after a table, in import order"""
+    paths = [os.path.join(directory, f"{table}.csv") for table in IMPORT_ORDER]
+    return [path for path in paths if os.path.exists(path)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import CSV dumps of the old schema')
+    parser.add_argument('files', nargs='*', help='CSV files named after their table, e.g. performance_logs.csv')
+    parser.add_argument('--dir', help='Import every dump found in this directory')
+    parser.add_argument('--table', choices=list(IMPORTS), help='Target table, for a single file with another name')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be imported, then roll back')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    files = list(args.files) + (find_dumps(args.dir) if args.dir else [])
+    if not files:
+        parser.error('no files to import')
+    if args.table and len(files) > 1:
+        parser.error('--table can only be used with a single file')
+    try:
+        jobs = [(path, args.table or table_for(path)) for path in files]
+    except ValueError as e:
+        parser.error(str(e))
+    # Users and algorithms first, so the logs can resolve them
+    jobs.sort(key=lambda job: IMPORT_ORDER.index(job[1]))
+
+    db = DatabaseConnection()
+    try:
+        for path, table in jobs:
+            try:
+                result = import_file(db, path, table, args.dry_run)
+            except Exception as e:
+                logging.error(f"Error importing {path} into {table}: {e}")
+                continue
+            rate = result['rows'] / result['seconds'] if result['seconds'] else 0.0
+            print(f"{table}: {result['rows']} rows read, {result['inserted']} inserted, "
+                  f"{result['duplicates']} duplicates, {result['unresolved']} unresolved "
+                  f"({result['seconds']:.2f}s, {rate:.0f} rows/s)"
+                  + (' [dry run]' if args.dry_run else ''))
+    finally:
+        db.close_all()
+
+
+if __name__ == '__main__':
+    main()
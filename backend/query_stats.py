@@ -0,0 +1,201 @@
+"""Per-statement timing for DatabaseConnection, grouped by query fingerprint.
+
+Every statement records its duration, the rows it returned or affected and
+how long it waited for a pool connection. Statements are grouped by
+fingerprint: the SQL with whitespace collapsed and parameters and literals
+replaced by '?', so the same query with different values counts as one.
+
+Statements slower than QUERY_STATS['slow_ms'] are logged. With
+QUERY_STATS['explain_slow'] the first slow run of each fingerprint also gets
+an EXPLAIN plan in the log and in the summary. Queries that only read get
+EXPLAIN (ANALYZE, BUFFERS), which executes them again; statements that write
+get a plain EXPLAIN of the estimated plan, so they are never run twice. The
+plan is captured after the statement's own transaction has been committed,
+in a transaction that is rolled back.
+
+The summary (calls, total, mean, p95 and max time, rows and pool wait per
+fingerprint) is available in process via DatabaseConnection.query_stats, and
+can be logged on demand by sending the process SIGUSR1 once
+install_dump_signal() has run.
+"""
+import logging
+import re
+import signal
+import threading
+from collections import deque
+
+from config import QUERY_STATS
+
+# Fingerprints cached by exact query text; most queries are constant strings
+FINGERPRINT_CACHE_SIZE = 1024
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# Statements EXPLAIN accepts; DDL and utility statements have no plan
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'VALUES')
+_WRITE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|COPY|CREATE|ALTER|DROP|TRUNCATE|CALL)\b", re.IGNORECASE)
+
+_fingerprints = {}
+
+
+def fingerprint(query):
+    """Normalized form of `query` that is the same whatever its parameters"""
+    if isinstance(query, bytes):
+        query = query.decode()
+    cached = _fingerprints.get(query)
+    if cached is not None:
+        return cached
+    normalized = _WHITESPACE.sub(' ', query).strip().rstrip(';')
+    normalized = _STRING.sub('?', normalized)
+    normalized = _PARAMETER.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    # IN (?, ?, ?) and multi-row VALUES lists vary in length with the data
+    normalized = _LIST.sub('(?)', normalized)
+    normalized = _VALUES.sub(r'\1', normalized)
+    if len(_fingerprints) >= FINGERPRINT_CACHE_SIZE:
+        _fingerprints.clear()
+    _fingerprints[query] = normalized
+    return normalized
+
+
+class FingerprintStats:
+    def __init__(self, samples):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.pool_wait_ms = 0.0
+        self.slow = 0
+        self.recent_ms = deque(maxlen=samples)
+        self.plan = None
+
+
+class QueryStats:
+    """Thread-safe statement statistics by fingerprint"""
+
+    def __init__(self, slow_ms=None, explain_slow=None, samples=None):
+        self.slow_ms = QUERY_STATS['slow_ms'] if slow_ms is None else slow_ms
+        self.explain_slow = QUERY_STATS['explain_slow'] if explain_slow is None else explain_slow
+        self.samples = samples or QUERY_STATS['samples']
+        self.enabled = QUERY_STATS['enabled']
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, query, elapsed_ms, rows=None, pool_wait_ms=0.0, error=False):
+        """Add one execution; returns True if it was slow and its plan is wanted"""
+        if not self.enabled:
+            return False
+        key = fingerprint(query)
+        slow = elapsed_ms >= self.slow_ms
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = FingerprintStats(self.samples)
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.pool_wait_ms += pool_wait_ms
+            stats.recent_ms.append(elapsed_ms)
+            if rows is not None and rows > 0:
+                stats.rows += rows
+            if error:
+                stats.errors += 1
+            if slow:
+                stats.slow += 1
+            want_plan = slow and not error and self.explain_slow and stats.plan is None
+        if slow:
+            logging.warning(f"Slow query ({elapsed_ms:.1f}ms, {rows if rows is not None else '?'} rows, "
+                            f"waited {pool_wait_ms:.1f}ms for a connection): {key}")
+        return want_plan
+
+    def add_plan(self, query, plan):
+        key = fingerprint(query)
+        with self.lock:
+            if key in self.stats:
+                self.stats[key].plan = plan
+        logging.warning(f"Plan of slow query {key}:\n{plan}")
+
+    def summary(self):
+        """One dict per fingerprint, most total time first"""
+        with self.lock:
+            items = list(self.stats.items())
+            rows = []
+            for key, stats in items:
+                recent = sorted(stats.recent_ms)
+                rows.append({
+                    'fingerprint': key,
+                    'calls': stats.calls,
+                    'errors': stats.errors,
+                    'total_ms': stats.total_ms,
+                    'mean_ms': stats.total_ms / stats.calls,
+                    'p95_ms': recent[min(len(recent) - 1, int(0.95 * len(recent)))],
+                    'max_ms': stats.max_ms,
+                    'rows': stats.rows,
+                    'pool_wait_ms': stats.pool_wait_ms,
+                    'slow': stats.slow,
+                    'plan': stats.plan
+                })
+        return sorted(rows, key=lambda row: -row['total_ms'])
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def format_summary(self, limit=20, width=100):
+        lines = [f"{'calls':>7} {'total ms':>10} {'mean':>8} {'p95':>8} {'max':>8} {'rows':>8} "
+                 f"{'wait ms':>8} {'slow':>5}  query"]
+        for row in self.summary()[:limit]:
+            query = row['fingerprint']
+            if len(query) > width:
+                query = query[:width - 3] + '...'
+            lines.append(f"{row['calls']:>7} {row['total_ms']:>10.1f} {row['mean_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                         f"{row['max_ms']:>8.2f} {row['rows']:>8} {row['pool_wait_ms']:>8.1f} {row['slow']:>5}  "
+                         f"{query}")
+        return '\n'.join(lines)
+
+    def dump(self):
+        logging.info(f"Query statistics:\n{self.format_summary()}")
+
+
+def is_read_only(query):
+    """Whether `query` is a SELECT (or WITH ... SELECT) that writes nothing"""
+    normalized = fingerprint(query)
+    return first_word(normalized) in ('SELECT', 'WITH', 'VALUES') and not _WRITE.search(normalized)
+
+
+def first_word(query):
+    return fingerprint(query).lstrip('(').split(' ', 1)[0].upper()
+
+
+def explain(conn, query, params):
+    """Plan of a statement whose transaction has ended; None if it can't be explained.
+
+    Read-only queries are explained with ANALYZE and BUFFERS, others with
+    their estimated plan only. Either way the transaction is rolled back.
+    """
+    if first_word(query) not in EXPLAINABLE:
+        return None
+    options = '(ANALYZE, BUFFERS) ' if is_read_only(query) else ''
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"EXPLAIN {options}{query}", params or ())
+            plan = '\n'.join(row[0] for row in cur.fetchall())
+        return plan
+    except Exception as e:
+        logging.error(f"Error explaining slow query: {e}")
+        return None
+    finally:
+        conn.rollback()
+
+
+def install_dump_signal(query_stats, signum=getattr(signal, 'SIGUSR1', None)):
+    """Log the summary whenever the process receives `signum` (SIGUSR1; POSIX only)"""
+    if signum is None:
+        return False
+    signal.signal(signum, lambda *_: query_stats.dump())
+    return True
@@ -0,0 +1,1029 @@
+"""Sorting algorithms shared by the visualizer and the headless benchmark runner.
+
+Each algorithm comes in two forms that sort ``arr`` in place:
+
+* a visual generator that yields after every step, so the caller decides how
+  fast to advance it (one step per timer tick in the GUI). Each step yields
+  an event tuple ``(kind, i, j)``: ``kind`` is COMPARE, SWAP or WRITE and
+  ``i``/``j`` are the indices involved (``i == j`` for a single write);
+* a fast path (the ``*_fast`` functions) that runs the same algorithm without
+  yielding, for benchmarking the algorithm rather than the generator overhead.
+
+The native baselines (``list.sort``, ``sorted`` and ``numpy.sort``) only have a
+fast path. They are benchmark-only and give every comparison a reference point
+for what a production sort achieves on the same input.
+
+Every algorithm is registered in REGISTRY as an AlgorithmPlugin (see
+registry), together with its catalog metadata and capabilities. ALGORITHMS
+and FAST_ALGORITHMS are the registry's name -> implementation dicts, so
+algorithms from installed plugins show up in them once load_plugins() ran.
+"""
+import importlib
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from registry import AlgorithmPlugin, AlgorithmRegistry, STABLE, IN_PLACE
+
+# Subarrays at or below this size are finished with insertion sort by intro sort
+INSERTION_THRESHOLD = 16
+# Runs shorter than this are extended with insertion sort by tim sort
+MIN_MERGE = 32
+# Ciura's experimentally derived gap sequence for shell sort
+CIURA_GAPS = [1, 4, 10, 23, 57, 132, 301, 701]
+RADIX_BASE = 10
+FAST_RADIX_BITS = 8
+# Digit size of the vectorized radix sort; NumPy's stable argsort of 8-bit
+# values is itself a counting sort, so each pass is one O(n) scatter
+VECTORIZED_RADIX_BITS = 8
+
+# Event kinds yielded by the visual generators
+COMPARE = 1
+SWAP = 2
+WRITE = 3
+
+
+def bubble_sort(arr):
+    n = len(arr)
+    for i in range(n-1):
+        for j in range(n-1-i):
+            if arr[j+1] < arr[j]:
+                arr[j], arr[j+1] = arr[j+1], arr[j]
+                yield SWAP, j, j+1
+
+
+def selection_sort(arr):
+    n = len(arr)
+    for i in range(n):
+        min_idx = i
+        # Find minimum element in unsorted array
+        for j in range(i + 1, n):
+            if arr[j] < arr[min_idx]:
+                min_idx = j
+            yield COMPARE, j, min_idx  # Yield after each comparison to show the process
+        # Swap if minimum element is not at current position
+        if min_idx != i:
+            arr[i], arr[min_idx] = arr[min_idx], arr[i]
+            yield SWAP, i, min_idx  # Yield after each swap
+
+
+def insertion_sort(arr):
+    for i in range(1, len(arr)):
+        key = arr[i]
+        j = i-1
+        while j >= 0 and arr[j] > key:
+            arr[j+1] = arr[j]
+            yield WRITE, j+1, j+1
+            j -= 1
+        arr[j+1] = key
+        yield WRITE, j+1, j+1
+
+
+def quick_sort(arr):
+    # Explicit stack of pending (low, high) ranges instead of recursion. The
+    # larger side of each partition is deferred and the smaller one processed
+    # next, so the stack never holds more than log2(n) ranges, and every step
+    # resumes in this one frame rather than through a chain of nested generators.
+    stack = [(0, len(arr)-1)]
+    while stack:
+        low, high = stack.pop()
+        while low < high:
+            i = low - 1
+            pivot = arr[high]
+            for j in range(low, high):
+                if arr[j] <= pivot:
+                    i += 1
+                    arr[i], arr[j] = arr[j], arr[i]
+                    yield SWAP, i, j
+            pi = i + 1
+            arr[pi], arr[high] = arr[high], arr[pi]
+            yield SWAP, pi, high
+
+            if pi - low < high - pi:
+                stack.append((pi+1, high))
+                high = pi - 1
+            else:
+                stack.append((low, pi-1))
+                low = pi + 1
+
+
+def merge_sort(arr):
+    def merge(l, m, r):
+        left = arr[l:m+1]
+        right = arr[m+1:r+1]
+        i = j = 0
+        k = l
+        while i < len(left) and j < len(right):
+            if left[i] <= right[j]:
+                arr[k] = left[i]
+                i += 1
+            else:
+                arr[k] = right[j]
+                j += 1
+            yield WRITE, k, k
+            k += 1
+
+        while i < len(left):
+            arr[k] = left[i]
+            i += 1
+            yield WRITE, k, k
+            k += 1
+
+        while j < len(right):
+            arr[k] = right[j]
+            j += 1
+            yield WRITE, k, k
+            k += 1
+
+    def merge_sort_helper(l, r):
+        if l < r:
+            m = (l + r) // 2
+            yield from merge_sort_helper(l, m)
+            yield from merge_sort_helper(m + 1, r)
+            yield from merge(l, m, r)
+
+    yield from merge_sort_helper(0, len(arr)-1)
+
+
+def heap_sort(arr):
+    # Iterative sift-down, inlined so each step resumes in this one frame
+    n = len(arr)
+
+    # Build a max heap
+    for start in range(n//2 - 1, -1, -1):
+        i = start
+        while True:
+            largest = i
+            left = 2 * i + 1
+            right = 2 * i + 2
+            if left < n and arr[left] > arr[largest]:
+                largest = left
+            if right < n and arr[right] > arr[largest]:
+                largest = right
+            if largest == i:
+                break
+            arr[i], arr[largest] = arr[largest], arr[i]
+            yield SWAP, i, largest
+            i = largest
+
+    # Repeatedly move the max to the end and restore the heap on the rest
+    for end in range(n-1, 0, -1):
+        arr[0], arr[end] = arr[end], arr[0]
+        yield SWAP, 0, end
+        i = 0
+        while True:
+            largest = i
+            left = 2 * i + 1
+            right = 2 * i + 2
+            if left < end and arr[left] > arr[largest]:
+                largest = left
+            if right < end and arr[right] > arr[largest]:
+                largest = right
+            if largest == i:
+                break
+            arr[i], arr[largest] = arr[largest], arr[i]
+            yield SWAP, i, largest
+            i = largest
+
+
+# Helpers shared by the visual generators below
+
+def _insertion_sort_range(arr, low, high):
+    """Insertion sort arr[low..high] (inclusive)"""
+    for i in range(low + 1, high + 1):
+        key = arr[i]
+        j = i - 1
+        while j >= low and arr[j] > key:
+            arr[j+1] = arr[j]
+            yield WRITE, j+1, j+1
+            j -= 1
+        arr[j+1] = key
+        yield WRITE, j+1, j+1
+
+
+def _heap_sort_range(arr, low, high):
+    """Heap sort arr[low..high] (inclusive) with an iterative sift-down"""
+    def sift_down(n, i):
+        while True:
+            largest = i
+            left = 2 * i + 1
+            right = 2 * i + 2
+            if left < n and arr[low + left] > arr[low + largest]:
+                largest = left
+            if right < n and arr[low + right] > arr[low + largest]:
+                largest = right
+            if largest == i:
+                return
+            arr[low + i], arr[low + largest] = arr[low + largest], arr[low + i]
+            yield SWAP, low + i, low + largest
+            i = largest
+
+    n = high - low + 1
+    for i in range(n//2 - 1, -1, -1):
+        yield from sift_down(n, i)
+    for end in range(n - 1, 0, -1):
+        arr[low], arr[low + end] = arr[low + end], arr[low]
+        yield SWAP, low, low + end
+        yield from sift_down(end, 0)
+
+
+def _merge_runs(arr, lo, mid, hi):
+    """Stable merge of the sorted runs arr[lo:mid] and arr[mid:hi]"""
+    left = arr[lo:mid]
+    i = 0
+    j = mid
+    k = lo
+    while i < len(left) and j < hi:
+        if left[i] <= arr[j]:
+            arr[k] = left[i]
+            i += 1
+        else:
+            arr[k] = arr[j]
+            j += 1
+        yield WRITE, k, k
+        k += 1
+    while i < len(left):
+        arr[k] = left[i]
+        i += 1
+        yield WRITE, k, k
+        k += 1
+
+
+def _min_run_length(n):
+    """Minimum run length for tim sort, chosen so n/minrun is close to a power of two"""
+    r = 0
+    while n >= MIN_MERGE:
+        r |= n & 1
+        n >>= 1
+    return n + r
+
+
+def _shell_gaps(n):
+    """Ciura gaps below n, extended by a factor of 2.25 for large arrays, largest first"""
+    gaps = [gap for gap in CIURA_GAPS if gap < n] or [1]
+    while int(gaps[-1] * 2.25) < n:
+        gaps.append(int(gaps[-1] * 2.25))
+    return gaps[::-1]
+
+
+def intro_sort(arr):
+    def median_of_three(low, high):
+        # Order arr[low] <= arr[mid] <= arr[high], then use the median as the Lomuto pivot
+        mid = (low + high) // 2
+        if arr[mid] < arr[low]:
+            arr[low], arr[mid] = arr[mid], arr[low]
+            yield SWAP, low, mid
+        if arr[high] < arr[low]:
+            arr[low], arr[high] = arr[high], arr[low]
+            yield SWAP, low, high
+        if arr[high] < arr[mid]:
+            arr[mid], arr[high] = arr[high], arr[mid]
+            yield SWAP, mid, high
+        arr[mid], arr[high] = arr[high], arr[mid]
+        yield SWAP, mid, high
+
+    def partition(low, high):
+        i = low - 1
+        pivot = arr[high]
+        for j in range(low, high):
+            if arr[j] <= pivot:
+                i += 1
+                arr[i], arr[j] = arr[j], arr[i]
+                yield SWAP, i, j
+        arr[i+1], arr[high] = arr[high], arr[i+1]
+        yield SWAP, i+1, high
+        return i + 1
+
+    def intro_sort_helper(low, high, depth):
+        while high - low + 1 > INSERTION_THRESHOLD:
+            if depth == 0:
+                # Too many bad pivots: fall back to heap sort's O(n log n) guarantee
+                yield from _heap_sort_range(arr, low, high)
+                return
+            depth -= 1
+            yield from median_of_three(low, high)
+            pi = yield from partition(low, high)
+            # Recurse into the smaller side and loop on the larger one
+            if pi - low < high - pi:
+                yield from intro_sort_helper(low, pi-1, depth)
+                low = pi + 1
+            else:
+                yield from intro_sort_helper(pi+1, high, depth)
+                high = pi - 1
+        yield from _insertion_sort_range(arr, low, high)
+
+    n = len(arr)
+    if n > 1:
+        yield from intro_sort_helper(0, n-1, 2 * int(math.log2(n)))
+
+
+def tim_sort(arr):
+    n = len(arr)
+    min_run = _min_run_length(n)
+    runs = []  # Stack of (start, length) of pending runs
+
+    def merge_at(i):
+        start, len1 = runs[i]
+        _, len2 = runs[i+1]
+        yield from _merge_runs(arr, start, start + len1, start + len1 + len2)
+        runs[i] = (start, len1 + len2)
+        del runs[i+1]
+
+    def merge_collapse():
+        # Keep run lengths growing like Fibonacci numbers down the stack
+        while len(runs) > 1:
+            i = len(runs) - 2
+            if ((i > 0 and runs[i-1][1] <= runs[i][1] + runs[i+1][1]) or
+                    (i > 1 and runs[i-2][1] <= runs[i-1][1] + runs[i][1])):
+                if runs[i-1][1] < runs[i+1][1]:
+                    i -= 1
+            elif runs[i][1] > runs[i+1][1]:
+                break
+            yield from merge_at(i)
+
+    lo = 0
+    while lo < n:
+        # Find the next natural run, reversing it if strictly descending
+        hi = lo + 1
+        if hi < n and arr[hi] < arr[lo]:
+            while hi < n and arr[hi] < arr[hi-1]:
+                hi += 1
+            i, j = lo, hi - 1
+            while i < j:
+                arr[i], arr[j] = arr[j], arr[i]
+                yield SWAP, i, j
+                i += 1
+                j -= 1
+        else:
+            while hi < n and arr[hi] >= arr[hi-1]:
+                hi += 1
+
+        # Extend short runs to min_run with insertion sort
+        end = min(lo + min_run, n)
+        if hi < end:
+            yield from _insertion_sort_range(arr, lo, end - 1)
+            hi = end
+
+        runs.append((lo, hi - lo))
+        yield from merge_collapse()
+        lo = hi
+
+    while len(runs) > 1:
+        yield from merge_at(len(runs) - 2)
+
+
+def radix_sort(arr):
+    if not arr:
+        return
+    # Offset by the minimum so negative values sort correctly
+    offset = min(arr)
+    max_key = max(arr) - offset
+    exp = 1
+    while max_key // exp > 0:
+        counts = [0] * RADIX_BASE
+        for val in arr:
+            counts[(val - offset) // exp % RADIX_BASE] += 1
+        for d in range(1, RADIX_BASE):
+            counts[d] += counts[d-1]
+        output = [0] * len(arr)
+        for val in reversed(arr):
+            d = (val - offset) // exp % RADIX_BASE
+            counts[d] -= 1
+            output[counts[d]] = val
+        for i, val in enumerate(output):
+            arr[i] = val
+            yield WRITE, i, i
+        exp *= RADIX_BASE
+
+
+def counting_sort(arr):
+    if not arr:
+        return
+    offset = min(arr)
+    counts = [0] * (max(arr) - offset + 1)
+    for val in arr:
+        counts[val - offset] += 1
+    k = 0
+    for key, count in enumerate(counts):
+        for _ in range(count):
+            arr[k] = key + offset
+            yield WRITE, k, k
+            k += 1
+
+
+def shell_sort(arr):
+    n = len(arr)
+    for gap in _shell_gaps(n):
+        for i in range(gap, n):
+            temp = arr[i]
+            j = i
+            while j >= gap and arr[j-gap] > temp:
+                arr[j] = arr[j-gap]
+                yield WRITE, j, j
+                j -= gap
+            arr[j] = temp
+            yield WRITE, j, j
+
+
+def dual_pivot_quick_sort(arr):
+    def dual_pivot_helper(low, high):
+        while low < high:
+            if arr[low] > arr[high]:
+                arr[low], arr[high] = arr[high], arr[low]
+                yield SWAP, low, high
+            p, q = arr[low], arr[high]
+            lt = low + 1
+            gt = high - 1
+            i = lt
+            # Partition into < p, p..q and > q
+            while i <= gt:
+                if arr[i] < p:
+                    arr[i], arr[lt] = arr[lt], arr[i]
+                    yield SWAP, i, lt
+                    lt += 1
+                elif arr[i] > q:
+                    while arr[gt] > q and i < gt:
+                        gt -= 1
+                    arr[i], arr[gt] = arr[gt], arr[i]
+                    yield SWAP, i, gt
+                    gt -= 1
+                    if arr[i] < p:
+                        arr[i], arr[lt] = arr[lt], arr[i]
+                        yield SWAP, i, lt
+                        lt += 1
+                i += 1
+            lt -= 1
+            gt += 1
+            arr[low], arr[lt] = arr[lt], arr[low]
+            yield SWAP, low, lt
+            arr[high], arr[gt] = arr[gt], arr[high]
+            yield SWAP, high, gt
+
+            # Recurse into the two smaller parts and loop on the largest
+            parts = sorted([(low, lt-1), (lt+1, gt-1), (gt+1, high)], key=lambda r: r[1] - r[0])
+            for part_low, part_high in parts[:2]:
+                yield from dual_pivot_helper(part_low, part_high)
+            low, high = parts[2]
+
+    yield from dual_pivot_helper(0, len(arr)-1)
+
+
+# Fast paths: the same algorithms without yielding after each step
+
+def bubble_sort_fast(arr):
+    n = len(arr)
+    for i in range(n-1):
+        for j in range(n-1-i):
+            if arr[j+1] < arr[j]:
+                arr[j], arr[j+1] = arr[j+1], arr[j]
+
+
+def selection_sort_fast(arr):
+    n = len(arr)
+    for i in range(n):
+        min_idx = i
+        for j in range(i + 1, n):
+            if arr[j] < arr[min_idx]:
+                min_idx = j
+        if min_idx != i:
+            arr[i], arr[min_idx] = arr[min_idx], arr[i]
+
+
+def insertion_sort_fast(arr, low=0, high=None):
+    if high is None:
+        high = len(arr) - 1
+    for i in range(low + 1, high + 1):
+        key = arr[i]
+        j = i - 1
+        while j >= low and arr[j] > key:
+            arr[j+1] = arr[j]
+            j -= 1
+        arr[j+1] = key
+
+
+def _partition_fast(arr, low, high):
+    i = low - 1
+    pivot = arr[high]
+    for j in range(low, high):
+        if arr[j] <= pivot:
+            i += 1
+            arr[i], arr[j] = arr[j], arr[i]
+    arr[i+1], arr[high] = arr[high], arr[i+1]
+    return i + 1
+
+
+def quick_sort_fast(arr):
+    # Same explicit stack as quick_sort: defer the larger side, loop on the smaller
+    stack = [(0, len(arr)-1)]
+    while stack:
+        low, high = stack.pop()
+        while low < high:
+            pi = _partition_fast(arr, low, high)
+            if pi - low < high - pi:
+                stack.append((pi+1, high))
+                high = pi - 1
+            else:
+                stack.append((low, pi-1))
+                low = pi + 1
+
+
+def merge_sort_fast(arr):
+    def merge_sort_helper(l, r):
+        if l < r:
+            m = (l + r) // 2
+            merge_sort_helper(l, m)
+            merge_sort_helper(m + 1, r)
+            _merge_fast(arr, l, m + 1, r + 1)
+
+    merge_sort_helper(0, len(arr)-1)
+
+
+def _merge_fast(arr, lo, mid, hi):
+    left = arr[lo:mid]
+    i = 0
+    j = mid
+    k = lo
+    while i < len(left) and j < hi:
+        if left[i] <= arr[j]:
+            arr[k] = left[i]
+            i += 1
+        else:
+            arr[k] = arr[j]
+            j += 1
+        k += 1
+    arr[k:k + len(left) - i] = left[i:]
+
+
+def heap_sort_fast(arr, low=0, high=None):
+    if high is None:
+        high = len(arr) - 1
+
+    def sift_down(n, i):
+        while True:
+            largest = i
+            left = 2 * i + 1
+            right = 2 * i + 2
+            if left < n and arr[low + left] > arr[low + largest]:
+                largest = left
+            if right < n and arr[low + right] > arr[low + largest]:
+                largest = right
+            if largest == i:
+                return
+            arr[low + i], arr[low + largest] = arr[low + largest], arr[low + i]
+            i = largest
+
+    n = high - low + 1
+    for i in range(n//2 - 1, -1, -1):
+        sift_down(n, i)
+    for end in range(n - 1, 0, -1):
+        arr[low], arr[low + end] = arr[low + end], arr[low]
+        sift_down(end, 0)
+
+
+def intro_sort_fast(arr):
+    def median_of_three(low, high):
+        mid = (low + high) // 2
+        if arr[mid] < arr[low]:
+            arr[low], arr[mid] = arr[mid], arr[low]
+        if arr[high] < arr[low]:
+            arr[low], arr[high] = arr[high], arr[low]
+        if arr[high] < arr[mid]:
+            arr[mid], arr[high] = arr[high], arr[mid]
+        arr[mid], arr[high] = arr[high], arr[mid]
+
+    def intro_sort_helper(low, high, depth):
+        while high - low + 1 > INSERTION_THRESHOLD:
+            if depth == 0:
+                heap_sort_fast(arr, low, high)
+                return
+            depth -= 1
+            median_of_three(low, high)
+            pi = _partition_fast(arr, low, high)
+            if pi - low < high - pi:
+                intro_sort_helper(low, pi-1, depth)
+                low = pi + 1
+            else:
+                intro_sort_helper(pi+1, high, depth)
+                high = pi - 1
+        insertion_sort_fast(arr, low, high)
+
+    n = len(arr)
+    if n > 1:
+        intro_sort_helper(0, n-1, 2 * int(math.log2(n)))
+
+
+def tim_sort_fast(arr):
+    n = len(arr)
+    min_run = _min_run_length(n)
+    runs = []
+
+    def merge_at(i):
+        start, len1 = runs[i]
+        _, len2 = runs[i+1]
+        _merge_fast(arr, start, start + len1, start + len1 + len2)
+        runs[i] = (start, len1 + len2)
+        del runs[i+1]
+
+    lo = 0
+    while lo < n:
+        hi = lo + 1
+        if hi < n and arr[hi] < arr[lo]:
+            while hi < n and arr[hi] < arr[hi-1]:
+                hi += 1
+            arr[lo:hi] = arr[lo:hi][::-1]
+        else:
+            while hi < n and arr[hi] >= arr[hi-1]:
+                hi += 1
+
+        end = min(lo + min_run, n)
+        if hi < end:
+            insertion_sort_fast(arr, lo, end - 1)
+            hi = end
+
+        runs.append((lo, hi - lo))
+        while len(runs) > 1:
+            i = len(runs) - 2
+            if ((i > 0 and runs[i-1][1] <= runs[i][1] + runs[i+1][1]) or
+                    (i > 1 and runs[i-2][1] <= runs[i-1][1] + runs[i][1])):
+                if runs[i-1][1] < runs[i+1][1]:
+                    i -= 1
+            elif runs[i][1] > runs[i+1][1]:
+                break
+            merge_at(i)
+        lo = hi
+
+    while len(runs) > 1:
+        merge_at(len(runs) - 2)
+
+
+def radix_sort_fast(arr):
+    if not arr:
+        return
+    # Byte-sized digits with one bucket list per digit value
+    offset = min(arr)
+    max_key = max(arr) - offset
+    mask = (1 << FAST_RADIX_BITS) - 1
+    shift = 0
+    while max_key >> shift > 0:
+        buckets = [[] for _ in range(1 << FAST_RADIX_BITS)]
+        for val in arr:
+            buckets[((val - offset) >> shift) & mask].append(val)
+        k = 0
+        for bucket in buckets:
+            arr[k:k + len(bucket)] = bucket
+            k += len(bucket)
+        shift += FAST_RADIX_BITS
+
+
+def counting_sort_fast(arr):
+    if not arr:
+        return
+    offset = min(arr)
+    counts = [0] * (max(arr) - offset + 1)
+    for val in arr:
+        counts[val - offset] += 1
+    k = 0
+    for key, count in enumerate(counts):
+        if count:
+            arr[k:k + count] = [key + offset] * count
+            k += count
+
+
+def shell_sort_fast(arr):
+    n = len(arr)
+    for gap in _shell_gaps(n):
+        for i in range(gap, n):
+            temp = arr[i]
+            j = i
+            while j >= gap and arr[j-gap] > temp:
+                arr[j] = arr[j-gap]
+                j -= gap
+            arr[j] = temp
+
+
+def dual_pivot_quick_sort_fast(arr):
+    stack = [(0, len(arr)-1)]
+    while stack:
+        low, high = stack.pop()
+        if low >= high:
+            continue
+        if arr[low] > arr[high]:
+            arr[low], arr[high] = arr[high], arr[low]
+        p, q = arr[low], arr[high]
+        lt = low + 1
+        gt = high - 1
+        i = lt
+        while i <= gt:
+            if arr[i] < p:
+                arr[i], arr[lt] = arr[lt], arr[i]
+                lt += 1
+            elif arr[i] > q:
+                while arr[gt] > q and i < gt:
+                    gt -= 1
+                arr[i], arr[gt] = arr[gt], arr[i]
+                gt -= 1
+                if arr[i] < p:
+                    arr[i], arr[lt] = arr[lt], arr[i]
+                    lt += 1
+            i += 1
+        lt -= 1
+        gt += 1
+        arr[low], arr[lt] = arr[lt], arr[low]
+        arr[high], arr[gt] = arr[gt], arr[high]
+        stack.append((low, lt-1))
+        stack.append((lt+1, gt-1))
+        stack.append((gt+1, high))
+
+
+# Vectorized (NumPy) variants: the same algorithms expressed as whole-array
+# operations. They accept a list or an ndarray; ndarrays are sorted in place
+# without ever being converted to Python ints.
+
+def _write_back(arr, result):
+    if isinstance(arr, np.ndarray):
+        arr[:] = result
+    else:
+        arr[:] = result.tolist()
+
+
+def merge_sort_vectorized(arr):
+    """Bottom-up merge sort that merges every pair of blocks of a level at once"""
+    values = np.array(arr, dtype=np.int64)
+    n = len(values)
+    if n < 2:
+        return
+    offset = values.min()
+    values -= offset
+    span = int(values.max()) + 1
+    if (n // 2 + 1) * span >= 2**62:
+        raise ValueError("Value range too large for the vectorized merge sort")
+
+    idx = np.arange(n, dtype=np.int64)
+    out = np.empty_like(values)
+    width = 1
+    while width < n:
+        pair = idx // (2 * width)
+        pos = idx - pair * 2 * width
+        is_left = pos < width
+        # Tag each value with its pair number so one searchsorted over all
+        # blocks only ever counts elements from the same pair
+        keys = pair * span + values
+        left_keys = keys[is_left]
+        right_keys = keys[~is_left]
+        left_pair = pair[is_left]
+        right_pair = pair[~is_left]
+
+        # Every block before pair p is full, so pair p's other block starts at p * width
+        right_before = np.searchsorted(right_keys, left_keys, side='left') - left_pair * width
+        left_before = np.searchsorted(left_keys, right_keys, side='right') - right_pair * width
+
+        dest = np.empty(n, dtype=np.int64)
+        dest[is_left] = left_pair * 2 * width + pos[is_left] + right_before
+        dest[~is_left] = right_pair * 2 * width + (pos[~is_left] - width) + left_before
+        out[dest] = values
+        values, out = out, values
+        width *= 2
+
+    _write_back(arr, values + offset)
+
+
+def radix_sort_vectorized(arr):
+    """LSD radix sort that scatters each digit pass with one stable np.argsort"""
+    values = np.array(arr, dtype=np.int64)
+    if len(values) < 2:
+        return
+    offset = values.min()
+    keys = values - offset
+    max_key = int(keys.max())
+    mask = (1 << VECTORIZED_RADIX_BITS) - 1
+    shift = 0
+    while max_key >> shift > 0:
+        digits = ((keys >> shift) & mask).astype(np.uint8)
+        # The destination of every key at once: a stable order keeps equal
+        # digits in their previous order, which is what makes LSD work
+        keys = keys[np.argsort(digits, kind='stable')]
+        shift += VECTORIZED_RADIX_BITS
+
+    _write_back(arr, keys + offset)
+
+
+# Native baselines
+
+def list_sort_baseline(arr):
+    arr.sort()
+
+
+def sorted_baseline(arr):
+    arr[:] = sorted(arr)
+
+
+def _numpy_sort_baseline(kind):
+    # Includes the list <-> ndarray conversion, since the other algorithms sort lists
+    def numpy_sort_baseline(arr):
+        arr[:] = np.sort(np.asarray(arr), kind=kind).tolist()
+    return numpy_sort_baseline
+
+
+# Algorithm name -> generator, in the order they are offered in the GUI
+ALGORITHMS = {
+    'Merge Sort': merge_sort,
+    'Quick Sort': quick_sort,
+    'Bubble Sort': bubble_sort,
+    'Insertion Sort': insertion_sort,
+    'Selection Sort': selection_sort,
+    'Heap Sort': heap_sort,
+    'Intro Sort': intro_sort,
+    'Tim Sort': tim_sort,
+    'Dual-Pivot Quick Sort': dual_pivot_quick_sort,
+    'Shell Sort': shell_sort,
+    'Radix Sort': radix_sort,
+    'Counting Sort': counting_sort
+}
+
+# Algorithm name -> fast path
+FAST_ALGORITHMS = {
+    'Merge Sort': merge_sort_fast,
+    'Quick Sort': quick_sort_fast,
+    'Bubble Sort': bubble_sort_fast,
+    'Insertion Sort': insertion_sort_fast,
+    'Selection Sort': selection_sort_fast,
+    'Heap Sort': heap_sort_fast,
+    'Intro Sort': intro_sort_fast,
+    'Tim Sort': tim_sort_fast,
+    'Dual-Pivot Quick Sort': dual_pivot_quick_sort_fast,
+    'Shell Sort': shell_sort_fast,
+    'Radix Sort': radix_sort_fast,
+    'Counting Sort': counting_sort_fast
+}
+
+# Baseline every comparison is measured against
+BASELINE_ALGORITHM = 'Built-in list.sort'
+
+# Benchmark-only algorithms: no visual generator, so they are not offered in the GUI
+BASELINES = {
+    'Built-in list.sort': list_sort_baseline,
+    'Built-in sorted()': sorted_baseline
+}
+NUMPY_SORT_KINDS = ['quicksort', 'mergesort', 'heapsort', 'stable']
+if np is not None:
+    for kind in NUMPY_SORT_KINDS:
+        BASELINES[f'NumPy sort ({kind})'] = _numpy_sort_baseline(kind)
+FAST_ALGORITHMS.update(BASELINES)
+
+# Vectorized variant -> the pure-Python algorithm it vectorizes, for speedup reports
+VECTORIZED_COUNTERPARTS = {
+    'Vectorized Merge Sort': 'Merge Sort',
+    'Vectorized Radix Sort': 'Radix Sort'
+}
+if np is not None:
+    FAST_ALGORITHMS['Vectorized Merge Sort'] = merge_sort_vectorized
+    FAST_ALGORITHMS['Vectorized Radix Sort'] = radix_sort_vectorized
+
+# Rows for the sorting_algorithms table: (name, description, time complexity, space complexity)
+CATALOG = [
+    ('Bubble Sort',
+     'Repeatedly steps through the list, compares adjacent elements and swaps them if they are in the wrong order.',
+     'O(n²)', 'O(1)'),
+    ('Selection Sort',
+     'Divides the input into a sorted and unsorted region, and iteratively shrinks the unsorted region by extracting the smallest element.',
+     'O(n²)', 'O(1)'),
+    ('Insertion Sort',
+     'Builds the final sorted array one item at a time by comparing each item with the already sorted portion and inserting it at the correct position.',
+     'O(n²)', 'O(1)'),
+    ('Quick Sort',
+     'Uses a divide-and-conquer strategy, picking a pivot element and partitioning the array around it.',
+     'O(n log n) average, O(n²) worst', 'O(log n)'),
+    ('Merge Sort',
+     'Divides the array into halves, recursively sorts them, and then merges the sorted halves.',
+     'O(n log n)', 'O(n)'),
+    ('Heap Sort',
+     'Uses a binary heap data structure to sort elements, converting the array into a max heap and repeatedly extracting the maximum.',
+     'O(n log n)', 'O(1)'),
+    ('Intro Sort',
+     'Quick sort with a median-of-three pivot that switches to heap sort when recursion gets too deep and to insertion sort for small subarrays.',
+     'O(n log n)', 'O(log n)'),
+    ('Tim Sort',
+     'Finds natural ascending or descending runs, extends short runs with insertion sort and merges them while keeping run lengths balanced.',
+     'O(n log n), O(n) on sorted input', 'O(n)'),
+    ('Dual-Pivot Quick Sort',
+     'Partitions around two pivots into three parts per pass, recursing into the smaller parts first.',
+     'O(n log n) average, O(n²) worst', 'O(log n)'),
+    ('Shell Sort',
+     'Insertion sort over progressively smaller gaps (Ciura sequence), moving elements long distances early on.',
+     'O(n^(4/3)) approx.', 'O(1)'),
+    ('Radix Sort',
+     'Least-significant-digit radix sort: stably distributes the values by each digit in turn using counting.',
+     'O(d·(n + b))', 'O(n + b)'),
+    ('Counting Sort',
+     'Counts the occurrences of each value and writes the values back in order; suited to small integer ranges.',
+     'O(n + k)', 'O(k)'),
+    ('Vectorized Merge Sort',
+     'Bottom-up merge sort over a NumPy array that merges all block pairs of a level with array operations (searchsorted and a scatter).',
+     'O(n log² n) array work, log n passes', 'O(n)'),
+    ('Vectorized Radix Sort',
+     'LSD radix sort over a NumPy array, scattering the keys by each byte-sized digit with one stable counting-sort argsort per pass.',
+     'O(d·n) array work, d = key bytes', 'O(n)'),
+    ('Built-in list.sort',
+     "Benchmark baseline: CPython's built-in in-place Timsort, implemented in C.",
+     'O(n log n), O(n) on sorted input', 'O(n)'),
+    ('Built-in sorted()',
+     "Benchmark baseline: CPython's built-in Timsort returning a new list, implemented in C.",
+     'O(n log n), O(n) on sorted input', 'O(n)'),
+    ('NumPy sort (quicksort)',
+     "Benchmark baseline: numpy.sort with kind='quicksort' (introsort), including list/array conversion.",
+     'O(n log n)', 'O(log n)'),
+    ('NumPy sort (mergesort)',
+     "Benchmark baseline: numpy.sort with kind='mergesort' (timsort or radix sort), including list/array conversion.",
+     'O(n log n)', 'O(n)'),
+    ('NumPy sort (heapsort)',
+     "Benchmark baseline: numpy.sort with kind='heapsort', including list/array conversion.",
+     'O(n log n)', 'O(1)'),
+    ('NumPy sort (stable)',
+     "Benchmark baseline: numpy.sort with kind='stable', including list/array conversion.",
+     'O(n log n)', 'O(n)')
+]
+
+
+# Declared capabilities of the built-in algorithms. In place means O(log n)
+# extra space at most, not just that `arr` is sorted in place.
+CAPABILITIES = {
+    'Bubble Sort': {STABLE, IN_PLACE},
+    'Selection Sort': {IN_PLACE},
+    'Insertion Sort': {STABLE, IN_PLACE},
+    'Quick Sort': {IN_PLACE},
+    'Merge Sort': {STABLE},
+    'Heap Sort': {IN_PLACE},
+    'Intro Sort': {IN_PLACE},
+    'Tim Sort': {STABLE},
+    'Dual-Pivot Quick Sort': {IN_PLACE},
+    'Shell Sort': {IN_PLACE},
+    'Radix Sort': {STABLE},
+    'Counting Sort': {STABLE},
+    'Vectorized Merge Sort': {STABLE},
+    'Vectorized Radix Sort': {STABLE},
+    'Built-in list.sort': {STABLE},
+    'Built-in sorted()': {STABLE},
+    'NumPy sort (mergesort)': {STABLE},
+    'NumPy sort (stable)': {STABLE}
+}
+
+REGISTRY = AlgorithmRegistry(ALGORITHMS, FAST_ALGORITHMS)
+for name, description, time_complexity, space_complexity in CATALOG:
+    # The NumPy variants have no implementation without NumPy
+    if name in ALGORITHMS or name in FAST_ALGORITHMS:
+        REGISTRY.register(AlgorithmPlugin(name, description, time_complexity, space_complexity,
+                                          visual=ALGORITHMS.get(name), fast=FAST_ALGORITHMS.get(name),
+                                          capabilities=CAPABILITIES.get(name, ())))
+
+
+# Built-in algorithm modules that build on this one, registered by load_plugins()
+BUILTIN_PLUGIN_MODULES = ['parallel']
+
+
+def load_plugins():
+    """Register the built-in plugin modules' and installed plugins' algorithms (once).
+
+    Returns the newly registered plugins.
+    """
+    if REGISTRY.entry_points_loaded:
+        return []
+    loaded = []
+    for module_name in BUILTIN_PLUGIN_MODULES:
+        for plugin in importlib.import_module(module_name).PLUGINS:
+            loaded.append(REGISTRY.register(plugin))
+    return loaded + REGISTRY.load_entry_points()
+
+
+CATALOG_QUERY = "SELECT name, description, time_complexity, space_complexity FROM sorting_algorithms"
+CATALOG_UPSERT = """
+    INSERT INTO sorting_algorithms (name, description, time_complexity, space_complexity)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (name) DO UPDATE
+    SET description = EXCLUDED.description,
+        time_complexity = EXCLUDED.time_complexity,
+        space_complexity = EXCLUDED.space_complexity
+"""
+
+
+def catalog_changes(rows):
+    """Catalog rows of registered algorithms that differ from `rows` (the result of CATALOG_QUERY)"""
+    existing = {row[0]: tuple(row) for row in rows or []}
+    return [row for row in REGISTRY.catalog_rows() if existing.get(row[0]) != row]
+
+
+def sync_catalog(db):
+    """Insert registered algorithms missing from the sorting_algorithms table, and
+    update the metadata of those whose description or complexity changed"""
+    changed = catalog_changes(db.execute_query(CATALOG_QUERY))
+    if changed:
+        db.execute_many(CATALOG_UPSERT, changed)
+
+
+async def sync_catalog_async(db):
+    """sync_catalog on an AsyncDatabaseConnection"""
+    changed = catalog_changes(await db.execute_query(CATALOG_QUERY))
+    if changed:
+        await db.execute_many(CATALOG_UPSERT, changed)
@@ -0,0 +1,489 @@
+"""Headless benchmark runner.
+
+Runs the sorting algorithms without the GUI over a range of array sizes and
+writes one CSV row per run, so time-vs-n (and, with --memory, memory-vs-n)
+curves can be plotted from the output.
+
+By default the visual generators are timed, as in the GUI; --fast times the
+non-yielding fast paths instead, which measures the algorithm itself. The
+native baseline (list.sort) is always run on the same inputs and every
+summary line shows how many times slower than it each algorithm was.
+
+For the vectorized variants, --numpy-input generates the inputs as NumPy
+arrays (so 1M-100M element runs don't need Python int lists) and the summary
+reports the speedup over the pure-Python algorithm they vectorize.
+
+Results are cached per (algorithm, implementation, input, machine): rerunning
+with the same --seed reuses the cached timing distribution instead of sorting
+again. --fresh measures anyway (adding to the distribution), --no-cache skips
+the cache entirely.
+
+The parallel algorithms run once per --workers count, and the summary reports
+their speedup over the sequential algorithm they parallelize and their
+efficiency (speedup per worker). Compare them with --fast, so the sequential
+algorithm is timed by its fast path as well.
+
+--trace-dir records every visual run as a binary trace file (see sort_trace)
+that the visualizer can replay and scrub without re-running the algorithm.
+
+--profile profiles a separate run of every measurement with cProfile or the
+sampling profiler (see profiling) and writes .pstats and collapsed-stack
+files to --profile-dir. File names include a hash of the implementation, so
+profiles from before and after a change sit side by side for
+`python profiling.py OLD NEW`.
+
+Example:
+    python benchmark.py --sizes 100 1000 5000 --trials 3 --memory -o results.csv
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+from algorithms import (ALGORITHMS, FAST_ALGORITHMS, BASELINE_ALGORITHM, REGISTRY,
+                        VECTORIZED_COUNTERPARTS, sync_catalog, sync_catalog_async, load_plugins, np)
+from profiling import MemoryProfiler, PROFILERS, PROFILE_MODES, DEFAULT_PROFILE_DIR
+import parallel
+from parallel import PARALLEL_COUNTERPARTS
+from result_cache import ResultCache, code_version
+from sort_trace import record_trace
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Same value range the visualizer uses for its bars
+MIN_VALUE = 10
+MAX_VALUE = 600
+
+RESULT_FIELDS = ['algorithm', 'run_mode', 'array_size', 'trial', 'execution_time_ms', 'steps',
+                 'peak_memory_kb', 'peak_blocks', 'rss_delta_kb', 'cached', 'trace_path', 'profile_path',
+                 'workers']
+
+
+def file_slug(algorithm_name):
+    return algorithm_name.lower().replace(' ', '_').replace('-', '_')
+
+
+def time_fast(algorithm_name, data, repeats=5):
+    """Best-of-`repeats` time in ms of the algorithm's fast path on copies of `data`"""
+    best = None
+    for _ in range(repeats):
+        arr = data.copy()
+        start = time.perf_counter()
+        FAST_ALGORITHMS[algorithm_name](arr)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        best = elapsed_ms if best is None else min(best, elapsed_ms)
+    return best
+
+
+class BenchmarkRunner:
+    def __init__(self, algorithms=None, trials=1, profile_memory=False, seed=None, fast=False,
+                 numpy_input=False, max_value=MAX_VALUE, cache=None, fresh=False, trace_dir=None,
+                 workers=None, profile=None, profile_dir=DEFAULT_PROFILE_DIR):
+        self.algorithms = list(algorithms or (FAST_ALGORITHMS if fast else ALGORITHMS))
+        if BASELINE_ALGORITHM not in self.algorithms:
+            self.algorithms.append(BASELINE_ALGORITHM)
+        self.trials = trials
+        self.profile_memory = profile_memory
+        self.fast = fast
+        self.numpy_input = numpy_input
+        self.max_value = max_value
+        self.random = random.Random(seed)
+        if numpy_input:
+            if np is None:
+                raise RuntimeError("NumPy is required for --numpy-input")
+            self.np_random = np.random.default_rng(seed)
+        self.memory_profiler = MemoryProfiler()
+        self.cache = cache
+        self.fresh = fresh
+        self.trace_dir = trace_dir
+        self.workers = workers or [parallel.WORKERS]
+        if trace_dir:
+            os.makedirs(trace_dir, exist_ok=True)
+        # 'cprofile' or 'sampling' (see PROFILE_MODES), None to not profile
+        self.profiler = PROFILERS[profile]() if profile else None
+        self.profile_dir = profile_dir
+        if profile:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def make_input(self, n):
+        if self.numpy_input:
+            return self.np_random.integers(MIN_VALUE, self.max_value + 1, n, dtype=np.int64)
+        return [self.random.randint(MIN_VALUE, self.max_value) for _ in range(n)]
+
+    def run_mode(self, algorithm_name):
+        # Benchmark-only algorithms have no visual generator
+        return 'fast' if self.fast or algorithm_name not in ALGORITHMS else 'generator'
+
+    def measured_function(self, algorithm_name):
+        """The visual or fast variant of the algorithm, whichever this runner times"""
+        if self.run_mode(algorithm_name) == 'fast':
+            return FAST_ALGORITHMS[algorithm_name]
+        return ALGORITHMS[algorithm_name]
+
+    def steps(self, algorithm_name, arr, workers=None):
+        """Generator that sorts `arr` with the visual or fast variant of the algorithm.
+
+        `workers` is the process count of a parallel algorithm.
+        """
+        if self.run_mode(algorithm_name) == 'fast':
+            # A single step, so the memory profiler can drive both variants the same way
+            if workers:
+                FAST_ALGORITHMS[algorithm_name](arr, workers=workers)
+            else:
+                FAST_ALGORITHMS[algorithm_name](arr)
+            yield
+        else:
+            yield from ALGORITHMS[algorithm_name](arr)
+
+    def copy_input(self, algorithm_name, data):
+        # Only the vectorized variants sort ndarrays natively; the rest get the
+        # same values as a list (converted outside the timed region)
+        if self.numpy_input and algorithm_name not in VECTORIZED_COUNTERPARTS:
+            return data.tolist()
+        return data.copy()
+
+    def cache_key(self, algorithm_name, data, workers=None):
+        func = self.measured_function(algorithm_name)
+        variant = self.run_mode(algorithm_name)
+        if REGISTRY.get(algorithm_name).parallel:
+            variant += f"-{workers or parallel.WORKERS}w"
+        return self.cache.make_key(algorithm_name, func, variant, data)
+
+    def record(self, algorithm_name, data, trial):
+        """Write a trace of the visual run to trace_dir and return its path"""
+        path = os.path.join(self.trace_dir, f"{file_slug(algorithm_name)}_n{len(data)}_t{trial}.trace")
+        record_trace(ALGORITHMS[algorithm_name], self.copy_input(algorithm_name, data), path)
+        return os.path.abspath(path)
+
+    def profile(self, algorithm_name, data, trial, workers=None):
+        """Profile a run of the measured variant and return the profile's path"""
+        version = code_version(self.measured_function(algorithm_name))[:10]
+        mode = self.run_mode(algorithm_name) + (f"_{workers}w" if workers else '')
+        name = f"{file_slug(algorithm_name)}_{mode}_n{len(data)}_t{trial}_{version}"
+        path = os.path.join(self.profile_dir, name)
+        profile = self.profiler.profile(self.steps(algorithm_name, self.copy_input(algorithm_name, data), workers),
+                                        path)
+        hot = ', '.join(f"{label} {self_ms:.1f}ms" for label, self_ms in profile['hotspots'][:3])
+        logging.info(f"{algorithm_name} n={len(data)} profile: {profile['profile_path']} ({hot or 'no samples'})")
+        return os.path.abspath(profile['profile_path'])
+
+    def run_once(self, algorithm_name, data, trial=0, workers=None):
+        """Sort a copy of `data` and return the measurements for that run"""
+        result = {
+            'algorithm': algorithm_name,
+            'run_mode': self.run_mode(algorithm_name),
+            'array_size': len(data),
+            'steps': None,
+            'peak_memory_kb': None,
+            'peak_blocks': None,
+            'rss_delta_kb': None,
+            'cached': False,
+            'trace_path': None,
+            'profile_path': None
+        }
+        tracing = self.trace_dir and result['run_mode'] == 'generator'
+
+        key = self.cache_key(algorithm_name, data, workers) if self.cache is not None else None
+        cached = self.cache.get(key) if key and not self.fresh else None
+        trace_ready = not tracing or (cached and cached.get('trace_path')
+                                      and os.path.exists(cached['trace_path']))
+        # A cached profile only counts if it was made by the same profiler
+        profile_ready = not self.profiler or (cached and cached.get('profile_path')
+                                              and os.path.exists(cached['profile_path'])
+                                              and cached.get('profiler') == type(self.profiler).__name__)
+        # Entries cached before the live block peak was renamed hold 'alloc_blocks'
+        memory_ready = not self.profile_memory or (cached and 'peak_blocks' in (cached.get('memory') or {}))
+        if cached and cached.get('times') and memory_ready and trace_ready and profile_ready:
+            result['execution_time_ms'] = statistics.median(cached['times'])
+            result['steps'] = cached.get('steps')
+            result['trace_path'] = cached.get('trace_path')
+            result['profile_path'] = cached.get('profile_path')
+            if self.profile_memory:
+                result.update(cached['memory'])
+            result['cached'] = True
+            return result
+
+        arr = self.copy_input(algorithm_name, data)
+        steps = 0
+        start = time.perf_counter()
+        for steps, _ in enumerate(self.steps(algorithm_name, arr, workers), 1):
+            pass
+        result['execution_time_ms'] = (time.perf_counter() - start) * 1000
+        # The fast path runs as a single step, so it has no operation count
+        result['steps'] = steps if result['run_mode'] == 'generator' else None
+
+        memory = None
+        if self.profile_memory:
+            # Profile a separate run so tracing overhead doesn't skew the timing
+            memory = self.memory_profiler.profile(
+                self.steps(algorithm_name, self.copy_input(algorithm_name, data), workers))
+            result.update(memory)
+
+        if tracing:
+            # Recorded separately as well, since tracing every write is slow
+            result['trace_path'] = self.record(algorithm_name, data, trial)
+
+        if self.profiler:
+            # Also a separate run: cProfile slows the algorithm down several times
+            result['profile_path'] = self.profile(algorithm_name, data, trial, workers)
+
+        if key:
+            fields = {'steps': result['steps']}
+            if memory:
+                fields['memory'] = memory
+            if result['trace_path']:
+                fields['trace_path'] = result['trace_path']
+            if result['profile_path']:
+                fields['profile_path'] = result['profile_path']
+                fields['profiler'] = type(self.profiler).__name__
+            self.cache.add_timing(key, result['execution_time_ms'], **fields)
+        return result
+
+    def run(self, sizes, progress=None):
+        """Run every algorithm `trials` times for each size, all on the same inputs.
+
+        `progress`, if given, is called as progress(done, total, result) after
+        every run.
+        """
+        results = []
+        runs_per_input = sum(len(self.workers) if REGISTRY.get(name).parallel else 1 for name in self.algorithms)
+        total = len(sizes) * self.trials * runs_per_input
+        if any(REGISTRY.get(name).parallel for name in self.algorithms):
+            # Start the worker processes now rather than in the first timed sort
+            for workers in self.workers:
+                parallel.warm_up(workers)
+        for n in sizes:
+            for trial in range(self.trials):
+                data = self.make_input(n)
+                for name in self.algorithms:
+                    # Parallel algorithms run once per worker count, for the speedup curves
+                    worker_counts = self.workers if REGISTRY.get(name).parallel else [None]
+                    for workers in worker_counts:
+                        result = self.run_once(name, data, trial, workers)
+                        result['trial'] = trial
+                        result['workers'] = workers
+                        results.append(result)
+                        label = f"{name} ({workers} workers)" if workers else name
+                        logging.info(f"{label} n={n} trial={trial}: {result['execution_time_ms']:.2f}ms")
+                        if progress:
+                            progress(len(results), total, result)
+        return results
+
+
+# performance_logs columns of a stored result, in the order of ResultLogger.rows
+LOG_COLUMNS = ('user_id', 'algorithm_id', 'execution_time_ms', 'array_size', 'array_data',
+               'peak_memory_kb', 'peak_blocks', 'rss_delta_kb', 'run_mode', 'profile_path')
+
+
+USER_ID_QUERY = "SELECT id FROM users WHERE username = %s"
+ALGORITHM_IDS_QUERY = "SELECT name, algorithm_id FROM sorting_algorithms"
+
+
+class ResultLogger:
+    """Stores benchmark results in performance_logs so they show up in the GUI statistics.
+
+    With use_async nothing connects until log_async, which does the lookups
+    and the COPY over the async driver instead of DatabaseConnection.
+    """
+
+    def __init__(self, username, use_async=False):
+        self.username = username
+        self.user_id = None
+        self.algorithm_ids = None
+        self.db = None
+        if not use_async:
+            # Imported here so runs that don't log work without a database driver
+            from connect import DatabaseConnection
+            self.db = DatabaseConnection()
+            sync_catalog(self.db)
+            self.set_ids(self.db.execute_query(USER_ID_QUERY, (username,)),
+                         self.db.execute_query(ALGORITHM_IDS_QUERY))
+
+    def set_ids(self, user_rows, algorithm_rows):
+        if not user_rows:
+            raise ValueError(f"User not found: {self.username}")
+        self.user_id = user_rows[0][0]
+        self.algorithm_ids = dict(algorithm_rows)
+
+    def rows(self, results):
+        # Generated benchmark inputs are not stored, only their size. Cached
+        # results were logged when they were measured, so they are skipped.
+        return [
+            (self.user_id, self.algorithm_ids[r['algorithm']], r['execution_time_ms'], r['array_size'], '',
+             r['peak_memory_kb'], r['peak_blocks'], r['rss_delta_kb'], r['run_mode'], r.get('profile_path'))
+            for r in results if not r['cached']
+        ]
+
+    def log(self, results):
+        query = f"""
+            INSERT INTO performance_logs ({', '.join(LOG_COLUMNS)})
+            VALUES ({', '.join(['%s'] * len(LOG_COLUMNS))})
+        """
+        params = self.rows(results)
+        if params:
+            self.db.execute_many(query, params)
+
+    def log_async(self, results):
+        """Store the results with a single COPY over the asyncio driver.
+
+        The catalog sync, the id lookups and the COPY share the pool's one
+        connection.
+        """
+        from async_connect import AsyncDatabaseConnection
+
+        async def store():
+            async with AsyncDatabaseConnection(max_size=1) as db:
+                await sync_catalog_async(db)
+                self.set_ids(await db.execute_query(USER_ID_QUERY, (self.username,)),
+                             await db.execute_query(ALGORITHM_IDS_QUERY))
+                rows = self.rows(results)
+                if rows:
+                    await db.copy_rows('performance_logs', LOG_COLUMNS, rows)
+        if any(not r['cached'] for r in results):
+            asyncio.run(store())
+
+
+def summarize(results):
+    """Average the runs per (algorithm, worker count, size) to get one point per curve"""
+    groups = {}
+    for result in results:
+        key = (result['algorithm'], result.get('workers'), result['array_size'])
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for (algorithm, workers, n), runs in groups.items():
+        peaks = [r['peak_memory_kb'] for r in runs if r['peak_memory_kb'] is not None]
+        summary.append({
+            'algorithm': algorithm,
+            'workers': workers,
+            'array_size': n,
+            'avg_time_ms': sum(r['execution_time_ms'] for r in runs) / len(runs),
+            'avg_peak_memory_kb': sum(peaks) / len(peaks) if peaks else None
+        })
+
+    # Speed ratio against the native baseline at the same size
+    baseline_times = {p['array_size']: p['avg_time_ms'] for p in summary
+                      if p['algorithm'] == BASELINE_ALGORITHM}
+    times = {(p['algorithm'], p['array_size']): p['avg_time_ms'] for p in summary if not p['workers']}
+    for point in summary:
+        baseline = baseline_times.get(point['array_size'])
+        point['baseline_ratio'] = point['avg_time_ms'] / baseline if baseline else None
+        # Speedup of a vectorized variant over the scalar version of the same algorithm
+        scalar = times.get((VECTORIZED_COUNTERPARTS.get(point['algorithm']), point['array_size']))
+        point['vectorized_speedup'] = scalar / point['avg_time_ms'] if scalar and point['avg_time_ms'] else None
+        # Speedup and efficiency (speedup per worker) of a parallel algorithm
+        # over the sequential one it parallelizes
+        sequential = times.get((PARALLEL_COUNTERPARTS.get(point['algorithm']), point['array_size']))
+        point['parallel_speedup'] = None
+        point['parallel_efficiency'] = None
+        if sequential and point['workers'] and point['avg_time_ms']:
+            point['parallel_speedup'] = sequential / point['avg_time_ms']
+            point['parallel_efficiency'] = point['parallel_speedup'] / point['workers']
+    return summary
+
+
+def write_csv(results, output):
+    writer = csv.DictWriter(output, fieldnames=RESULT_FIELDS)
+    writer.writeheader()
+    for result in results:
+        writer.writerow(result)
+
+
+def list_algorithms(output):
+    for plugin in REGISTRY:
+        variants = [label for label, func in (('visual', plugin.visual), ('fast', plugin.fast)) if func]
+        line = f"{plugin.name:<28} {'/'.join(variants):<12} {plugin.time_complexity}"
+        if plugin.capabilities:
+            line += f" [{', '.join(sorted(plugin.capabilities))}]"
+        print(line, file=output)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Installed plugins' algorithms can be benchmarked like the built-in ones
+    load_plugins()
+    parser = argparse.ArgumentParser(description='Benchmark sorting algorithms without the GUI')
+    parser.add_argument('--algorithms', nargs='+', choices=list(FAST_ALGORITHMS),
+                        help='Algorithms to run (default: all, plus the native baseline)')
+    parser.add_argument('--list-algorithms', action='store_true',
+                        help='List the registered algorithms and their capabilities, then exit')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 500, 1000],
+                        help='Array sizes to benchmark')
+    parser.add_argument('--trials', type=int, default=1, help='Runs per algorithm and size')
+    parser.add_argument('--memory', action='store_true',
+                        help='Also record peak allocation, peak live blocks and RSS growth per run')
+    parser.add_argument('--fast', action='store_true',
+                        help='Time the non-yielding fast paths instead of the visual generators')
+    parser.add_argument('--numpy-input', action='store_true',
+                        help='Generate the inputs as NumPy arrays (for the vectorized variants)')
+    parser.add_argument('--max-value', type=int, default=MAX_VALUE,
+                        help='Largest value in the generated inputs')
+    parser.add_argument('--seed', type=int, help='Seed for the generated inputs')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Measure even when a cached result exists (the new timing is added to the cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Neither read nor write the result cache')
+    parser.add_argument('--cache-path', help='Result cache file (default: ~/.sortingviz/result_cache.sqlite)')
+    parser.add_argument('--workers', nargs='+', type=int,
+                        help='Worker counts to run the parallel algorithms with (default: one per CPU)')
+    parser.add_argument('--trace-dir', help='Record a replayable trace of every visual run into this directory')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='Profile every run with cProfile or the low-overhead sampling profiler')
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR,
+                        help='Directory for the .pstats and collapsed-stack files (default: %(default)s)')
+    parser.add_argument('--log', metavar='USERNAME',
+                        help='Also store the results in performance_logs under this user')
+    parser.add_argument('--async-log', action='store_true',
+                        help='With --log, store the results with one COPY over the async driver (psycopg 3)')
+    parser.add_argument('-o', '--output', help='CSV file for the per-run results (default: stdout)')
+    args = parser.parse_args(argv)
+
+    if args.list_algorithms:
+        list_algorithms(sys.stdout)
+        return
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_path) if args.cache_path else ResultCache()
+    runner = BenchmarkRunner(args.algorithms, args.trials, args.memory, args.seed, args.fast,
+                             args.numpy_input, args.max_value, cache, args.fresh, args.trace_dir,
+                             args.workers, args.profile, args.profile_dir)
+    results = runner.run(args.sizes)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write_csv(results, f)
+    else:
+        write_csv(results, sys.stdout)
+
+    if args.log:
+        logger = ResultLogger(args.log, use_async=args.async_log)
+        if args.async_log:
+            logger.log_async(results)
+        else:
+            logger.log(results)
+
+    for point in summarize(results):
+        name = point['algorithm']
+        if point['workers']:
+            name += f" x{point['workers']}"
+        line = f"{name:<24} n={point['array_size']:<8} {point['avg_time_ms']:10.2f}ms"
+        if point['avg_peak_memory_kb'] is not None:
+            line += f" {point['avg_peak_memory_kb']:10.1f}KB peak"
+        if point['baseline_ratio'] is not None:
+            line += f" {point['baseline_ratio']:10.1f}x {BASELINE_ALGORITHM}"
+        if point['vectorized_speedup'] is not None:
+            line += f" {point['vectorized_speedup']:8.1f}x faster than {VECTORIZED_COUNTERPARTS[point['algorithm']]}"
+        if point['parallel_speedup'] is not None:
+            line += (f" {point['parallel_speedup']:6.2f}x speedup over {PARALLEL_COUNTERPARTS[point['algorithm']]}"
+                     f" ({point['parallel_efficiency']:.0%} efficiency)")
+        print(line, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Head-to-head comparison of two algorithms with a significance test.
+
+A single timing of each algorithm is too noisy to pick a winner, so both
+fast paths are timed over several interleaved trials on the same input and a
+Mann-Whitney U test decides whether one is really faster. When the test is
+not significant there is no winner.
+
+With a ResultCache, fast-path timings of the same implementations on the same
+input are reused instead of measured again, unless a fresh run is requested.
+"""
+import math
+import time
+
+from algorithms import FAST_ALGORITHMS
+
+DEFAULT_TRIALS = 15
+DEFAULT_ALPHA = 0.05
+
+
+def mann_whitney_u(a, b):
+    """Two-sided Mann-Whitney U test.
+
+    Returns (u, p_value, effect_size) where u is the U statistic of `a`,
+    p_value uses the normal approximation with tie and continuity correction,
+    and effect_size is Cliff's delta in [-1, 1]: positive when values in `a`
+    tend to be larger than values in `b`.
+    """
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Both samples need at least one value")
+
+    # Rank the pooled samples, giving tied values their average rank
+    pooled = sorted([(val, 0) for val in a] + [(val, 1) for val in b])
+    ranks = [0.0] * len(pooled)
+    tie_term = 0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j+1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        tie_term += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+
+    rank_sum_a = sum(rank for rank, (_, sample) in zip(ranks, pooled) if sample == 0)
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    mean_u = n1 * n2 / 2
+    n = n1 + n2
+    var_u = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0
+
+    if var_u <= 0:
+        # Every value identical: no evidence of any difference
+        p_value = 1.0
+    else:
+        z = (abs(u - mean_u) - 0.5) / math.sqrt(var_u)
+        p_value = min(1.0, math.erfc(max(z, 0) / math.sqrt(2)))
+
+    effect_size = 2 * u / (n1 * n2) - 1
+    return u, p_value, effect_size
+
+
+def compare_algorithms(left_algo, right_algo, data, trials=DEFAULT_TRIALS, alpha=DEFAULT_ALPHA,
+                       cache=None, fresh=False):
+    """Time both algorithms' fast paths over interleaved trials and test the difference.
+
+    The run order alternates every trial so drift (CPU frequency, caches,
+    other load) affects both algorithms alike. Returns a dict with the
+    per-trial times, the test result and 'winner' set to 'left', 'right' or
+    None when the difference is not significant at `alpha`. 'cached' is True
+    when the times came from `cache` rather than a new measurement.
+    """
+    keys = None
+    if cache is not None:
+        keys = [cache.make_key(name, FAST_ALGORITHMS[name], 'fast', data) for name in (left_algo, right_algo)]
+        entries = [None, None] if fresh else [cache.get(key) for key in keys]
+        if all(entry and len(entry.get('times', [])) >= trials for entry in entries):
+            return evaluate(left_algo, right_algo, entries[0]['times'][-trials:],
+                            entries[1]['times'][-trials:], alpha, cached=True)
+
+    left_times = []
+    right_times = []
+    for trial in range(trials):
+        order = [(left_algo, left_times), (right_algo, right_times)]
+        if trial % 2:
+            order.reverse()
+        for name, times in order:
+            arr = data.copy()
+            start = time.perf_counter()
+            FAST_ALGORITHMS[name](arr)
+            times.append((time.perf_counter() - start) * 1000)
+
+    if keys:
+        cache.add_timings(keys[0], left_times)
+        if keys[1] != keys[0]:
+            cache.add_timings(keys[1], right_times)
+    return evaluate(left_algo, right_algo, left_times, right_times, alpha)
+
+
+def evaluate(left_algo, right_algo, left_times, right_times, alpha=DEFAULT_ALPHA, cached=False):
+    """Test two timing samples and package the outcome"""
+    _, p_value, effect_size = mann_whitney_u(left_times, right_times)
+    winner = None
+    # An algorithm compared with itself never has a winner, whatever the noise
+    if p_value < alpha and left_algo != right_algo:
+        # Positive effect size: left tends to take longer
+        winner = 'right' if effect_size > 0 else 'left'
+
+    return {
+        'left_times': left_times,
+        'right_times': right_times,
+        'trials': len(left_times),
+        'p_value': p_value,
+        'effect_size': effect_size,
+        'winner': winner,
+        'cached': cached
+    }
@@ -0,0 +1,314 @@
+"""External merge sort for integer files larger than memory.
+
+The input is read in chunks that fit the memory budget, each chunk is sorted
+in memory with any registered algorithm (its fast path) and spilled to a
+temporary run file of little-endian int64 values. The runs are then merged
+`fan_in` at a time, reading each run through mmap in fixed-size blocks, until
+a single pass writes the output. I/O volume and throughput of every phase are
+reported, for benchmarking disk-bound sorting.
+
+Input and output files are either raw little-endian int64 ('.bin', '.i64',
+'.raw') or text with one integer per line (anything else, e.g. '.csv'). Text
+lines that don't start with an integer, such as a CSV header, are skipped
+with a warning naming the line.
+
+Example:
+    python external_sort.py --generate 500000000 big.bin
+    python external_sort.py big.bin sorted.bin --memory 512M --fan-in 32
+"""
+import argparse
+import heapq
+import logging
+import mmap
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+
+from algorithms import FAST_ALGORITHMS, BASELINE_ALGORITHM, load_plugins
+
+BINARY_EXTENSIONS = ('.bin', '.i64', '.raw')
+ITEM_SIZE = array('q').itemsize
+# Memory a value takes while a run is sorted as a Python list: the int object
+# plus its list slot (sys.getsizeof(2**40) + 8)
+LIST_ITEM_BYTES = 40
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+DEFAULT_FAN_IN = 16
+# Skipped text lines that are logged individually; the rest are only counted
+MAX_SKIP_WARNINGS = 10
+
+
+def is_binary(path):
+    return os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS
+
+
+def parse_size(text):
+    """Byte count from '512M', '2G', '64k' or a plain number"""
+    units = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+    text = text.strip().lower().rstrip('b')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+class IOStats:
+    """Bytes moved and time spent per phase of an external sort"""
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, phase, bytes_read=0, bytes_written=0, seconds=0.0):
+        stats = self.phases.setdefault(phase, {'bytes_read': 0, 'bytes_written': 0, 'seconds': 0.0})
+        stats['bytes_read'] += bytes_read
+        stats['bytes_written'] += bytes_written
+        stats['seconds'] += seconds
+
+    def totals(self):
+        return {
+            key: sum(stats[key] for stats in self.phases.values())
+            for key in ('bytes_read', 'bytes_written', 'seconds')
+        }
+
+    def report(self):
+        """One line per phase plus a total, with MB/s over read + written bytes"""
+        lines = []
+        for phase, stats in list(self.phases.items()) + [('total', self.totals())]:
+            moved = (stats['bytes_read'] + stats['bytes_written']) / 1024 ** 2
+            throughput = moved / stats['seconds'] if stats['seconds'] else 0.0
+            lines.append(f"{phase:<10} read {stats['bytes_read'] / 1024 ** 2:10.1f}MB  "
+                         f"written {stats['bytes_written'] / 1024 ** 2:10.1f}MB  "
+                         f"{stats['seconds']:8.2f}s  {throughput:8.1f}MB/s")
+        return '\n'.join(lines)
+
+
+def read_chunks(path, chunk_items, on_skip=None):
+    """Yield the integers of `path` as lists of at most `chunk_items` values.
+
+    Non-empty text lines that aren't integers are passed to
+    on_skip(line_number, line) and left out.
+    """
+    if is_binary(path):
+        with open(path, 'rb') as f:
+            while True:
+                values = array('q')
+                try:
+                    values.fromfile(f, chunk_items)
+                except EOFError:
+                    # Short last chunk: fromfile keeps what it could read
+                    pass
+                if not values:
+                    return
+                yield values.tolist()
+    else:
+        with open(path) as f:
+            chunk = []
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    chunk.append(int(line.split(',')[0]))
+                except ValueError:
+                    if on_skip:
+                        on_skip(line_number, line)
+                    continue
+                if len(chunk) >= chunk_items:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+
+def read_run(path, block_items):
+    """Yield the values of a run file in order, reading it through mmap a block at a time"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        block_bytes = block_items * ITEM_SIZE
+        for offset in range(0, size, block_bytes):
+            block = array('q')
+            block.frombytes(mm[offset:offset + block_bytes])
+            yield from block.tolist()
+
+
+class RunWriter:
+    """Buffered writer of sorted values as int64 (run files, binary output) or text"""
+
+    def __init__(self, path, buffer_items, binary=True):
+        self.path = path
+        self.binary = binary
+        self.buffer_items = buffer_items
+        self.buffer = []
+        self.bytes_written = 0
+        self.file = open(path, 'wb' if binary else 'w')
+
+    def write_all(self, values):
+        if isinstance(values, list):
+            # Already in memory: write it in buffer-sized slices, skipping the per-value loop
+            self.flush()
+            for i in range(0, len(values), self.buffer_items):
+                self.buffer = values[i:i + self.buffer_items]
+                self.flush()
+            return
+        buffer = self.buffer
+        for value in values:
+            buffer.append(value)
+            if len(buffer) >= self.buffer_items:
+                self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.binary:
+            data = array('q', self.buffer).tobytes()
+            self.file.write(data)
+        else:
+            data = '\n'.join(map(str, self.buffer)) + '\n'
+            self.file.write(data)
+        self.bytes_written += len(data)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class ExternalSorter:
+    def __init__(self, algorithm=BASELINE_ALGORITHM, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 fan_in=DEFAULT_FAN_IN, temp_dir=None):
+        if algorithm not in FAST_ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        if fan_in < 2:
+            raise ValueError("The fan-in must be at least 2")
+        self.algorithm = algorithm
+        self.memory_budget = memory_budget
+        self.fan_in = fan_in
+        self.temp_dir = temp_dir
+        # A whole run is sorted as a Python list
+        self.run_items = max(1024, memory_budget // LIST_ITEM_BYTES)
+        # While merging, the budget is shared by one read block per input run
+        # and the output buffer
+        self.block_items = max(1024, memory_budget // ((fan_in + 1) * LIST_ITEM_BYTES))
+        self.stats = IOStats()
+        self.runs_created = 0
+        self.merge_passes = 0
+        self.skipped_lines = 0
+
+    def sort(self, input_path, output_path):
+        """Sort the integers of `input_path` into `output_path`; returns the IOStats"""
+        work_dir = tempfile.mkdtemp(prefix='external_sort_', dir=self.temp_dir)
+        try:
+            runs = self.create_runs(input_path, work_dir)
+            while len(runs) > self.fan_in:
+                runs = self.merge_pass(runs, work_dir)
+            self.merge(runs, output_path, binary=is_binary(output_path), phase='final')
+        finally:
+            # Run files can be as large as the input; never leave them behind
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if self.skipped_lines:
+            logging.warning(f"Skipped {self.skipped_lines} non-integer lines of {input_path}")
+        return self.stats
+
+    def skip_line(self, line_number, line):
+        self.skipped_lines += 1
+        if self.skipped_lines <= MAX_SKIP_WARNINGS:
+            logging.warning(f"Skipping line {line_number}, not an integer: {line[:60]!r}")
+
+    def create_runs(self, input_path, work_dir):
+        """Phase 1: sort memory-sized chunks of the input and spill them as run files"""
+        sort = FAST_ALGORITHMS[self.algorithm]
+        runs = []
+        start = time.perf_counter()
+        for chunk in read_chunks(input_path, self.run_items, self.skip_line):
+            sort(chunk)
+            path = os.path.join(work_dir, f"run_{len(runs):06d}.bin")
+            writer = RunWriter(path, self.block_items)
+            writer.write_all(chunk)
+            writer.close()
+            self.stats.add('runs', bytes_written=writer.bytes_written)
+            runs.append(path)
+            logging.info(f"Run {len(runs)}: {len(chunk)} values sorted with {self.algorithm}")
+        self.stats.add('runs', bytes_read=os.path.getsize(input_path),
+                       seconds=time.perf_counter() - start)
+        self.runs_created = len(runs)
+        return runs
+
+    def merge_pass(self, runs, work_dir):
+        """Merge the runs `fan_in` at a time into fewer, longer runs"""
+        self.merge_passes += 1
+        merged = []
+        for i in range(0, len(runs), self.fan_in):
+            path = os.path.join(work_dir, f"pass{self.merge_passes}_{len(merged):06d}.bin")
+            self.merge(runs[i:i + self.fan_in], path, binary=True, phase=f"pass {self.merge_passes}")
+            merged.append(path)
+        return merged
+
+    def merge(self, runs, output_path, binary, phase):
+        start = time.perf_counter()
+        bytes_read = sum(os.path.getsize(path) for path in runs)
+        writer = RunWriter(output_path, self.block_items, binary)
+        try:
+            writer.write_all(heapq.merge(*[read_run(path, self.block_items) for path in runs]))
+        finally:
+            writer.close()
+        # Merged runs are no longer needed; free the disk space early
+        for path in runs:
+            os.remove(path)
+        if phase == 'final':
+            self.merge_passes += 1
+        self.stats.add(phase, bytes_read=bytes_read, bytes_written=writer.bytes_written,
+                       seconds=time.perf_counter() - start)
+
+
+def generate_input(path, count, max_value=2**31 - 1, seed=None):
+    """Write `count` random integers to `path`, in chunks so any size fits in memory"""
+    rng = random.Random(seed)
+    writer = RunWriter(path, 1 << 16, is_binary(path))
+    remaining = count
+    while remaining:
+        batch = min(remaining, 1 << 16)
+        writer.write_all([rng.randint(0, max_value) for _ in range(batch)])
+        remaining -= batch
+    writer.close()
+    return writer.bytes_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sort integer files larger than memory')
+    parser.add_argument('input', nargs='?', help='File to sort (.bin/.i64/.raw: int64, otherwise text)')
+    parser.add_argument('output', help='Sorted output file, or the file to create with --generate')
+    parser.add_argument('--algorithm', default=BASELINE_ALGORITHM,
+                        help='Registered algorithm that sorts the in-memory runs (default: %(default)s)')
+    parser.add_argument('--memory', default='256M', help='Memory budget, e.g. 512M or 2G (default: %(default)s)')
+    parser.add_argument('--fan-in', type=int, default=DEFAULT_FAN_IN, help='Runs merged at a time')
+    parser.add_argument('--temp-dir', help='Directory for the spilled runs (default: system temp)')
+    parser.add_argument('--generate', type=int, metavar='COUNT',
+                        help='Instead of sorting, write COUNT random integers to the output file')
+    parser.add_argument('--seed', type=int, help='Seed for --generate')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_plugins()
+
+    if args.generate is not None:
+        start = time.perf_counter()
+        written = generate_input(args.output, args.generate, seed=args.seed)
+        logging.info(f"Wrote {args.generate} values ({written / 1024 ** 2:.1f}MB) "
+                     f"in {time.perf_counter() - start:.1f}s")
+        return
+    if not args.input:
+        parser.error('an input file is required unless --generate is used')
+
+    sorter = ExternalSorter(args.algorithm, parse_size(args.memory), args.fan_in, args.temp_dir)
+    stats = sorter.sort(args.input, args.output)
+    print(f"{sorter.runs_created} runs, {sorter.merge_passes} merge passes, fan-in {sorter.fan_in}",
+          file=sys.stderr)
+    print(stats.report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""Load generator for the database layer.
+
+Simulates concurrent users of the visualizer against PostgreSQL, driving the
+same code the GUI uses: UserSystem registration and login, LoggingSystem.add_log
+after a comparison, FeedbackSystem writes and reads, and the statistics
+queries. Each virtual user runs on its own thread and picks operations from a
+weighted mix, pausing between them for an exponentially distributed think
+time (so each user averages --rate operations per second).
+
+Reported per operation: throughput, error rate and latency percentiles; for
+the connection pool: how long operations waited for a connection; and the
+statements that took the most database time (see query_stats). Runs
+are repeatable: every user's operation sequence and inputs come from --seed,
+so two runs with the same arguments issue the same workload and can be
+compared before and after a scaling change (--json writes the report for
+that).
+
+The virtual users are registered as <prefix>_<n> and their rows stay in the
+database; use a scratch database.
+
+Example:
+    python loadgen.py --users 50 --duration 60 --rate 2 --pool-size 10 --json before.json
+    python loadgen.py --users 50 --duration 60 --rate 2 --pool-size 20 --json after.json
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from algorithms import FAST_ALGORITHMS, BASELINE_ALGORITHM, REGISTRY, load_plugins, sync_catalog
+from benchmark import time_fast
+from metrics import percentile
+from sortingviz import UserSystem, LoggingSystem, FeedbackSystem, DatabaseConnection
+# sortingviz puts the backend directory on the path
+import config
+
+PASSWORD = 'loadgen'
+# Statements listed in the text report, most database time first
+QUERY_REPORT_LIMIT = 5
+# Relative frequency of each operation after a user has logged in
+DEFAULT_MIX = {
+    'login': 5,
+    'compare': 40,
+    'feedback': 10,
+    'feedback_page': 15,
+    'comparison_stats': 15,
+    'performance_stats': 15
+}
+
+
+def parse_mix(text):
+    """Operation weights from 'compare=40,login=5,...'; unnamed operations get 0"""
+    mix = {name: 0 for name in DEFAULT_MIX}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in mix:
+            raise ValueError(f"Unknown operation: {name} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight)
+    if not any(mix.values()):
+        raise ValueError('At least one operation needs a positive weight')
+    return mix
+
+
+class OperationStats:
+    """Latencies and errors of one operation, shared by all virtual users"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies_ms = []
+        self.errors = 0
+        self.error_messages = {}
+
+    def record(self, latency_ms, error=None):
+        with self.lock:
+            self.latencies_ms.append(latency_ms)
+            if error:
+                self.errors += 1
+                self.error_messages[error] = self.error_messages.get(error, 0) + 1
+
+    def summary(self, seconds):
+        latencies = self.latencies_ms
+        calls = len(latencies)
+        return {
+            'calls': calls,
+            'errors': self.errors,
+            'error_rate': self.errors / calls if calls else 0.0,
+            'throughput': calls / seconds if seconds else 0.0,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'max_ms': max(latencies) if latencies else None,
+            'top_errors': sorted(self.error_messages.items(), key=lambda item: -item[1])[:3]
+        }
+
+
+class VirtualUser:
+    def __init__(self, index, prefix, seed, mix, rate, array_size, algorithms, stats):
+        self.username = f"{prefix}_{index}"
+        # One generator per user, so the sequence doesn't depend on thread scheduling
+        self.random = random.Random(f"{seed}-{index}")
+        self.operations = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.operations]
+        self.rate = rate
+        self.array_size = array_size
+        self.algorithms = algorithms
+        self.stats = stats
+        self.user_system = UserSystem()
+        self.session = None
+        self.logger = None
+        self.feedback_system = None
+
+    def timed(self, name, operation):
+        """Run an operation that returns an error message or None, and record it"""
+        start = time.perf_counter()
+        try:
+            error = operation()
+        except Exception as e:
+            error = type(e).__name__
+        self.stats[name].record((time.perf_counter() - start) * 1000, error)
+
+    def register(self):
+        # An existing user is fine: runs reuse the users of earlier runs
+        self.user_system.register_user(self.username, PASSWORD)
+
+    def login(self):
+        session = self.user_system.verify_user(self.username, PASSWORD)
+        if not session:
+            return 'login failed'
+        self.session = session
+        self.logger = LoggingSystem(session)
+        self.feedback_system = FeedbackSystem(session)
+
+    def compare(self):
+        left, right = self.random.sample(self.algorithms, 2)
+        data = [self.random.randint(1, 600) for _ in range(self.array_size)]
+        time1 = time_fast(left, data, repeats=1)
+        time2 = time_fast(right, data, repeats=1)
+        if not self.logger.add_log(self.username, left, right, time1, time2, data):
+            return 'comparison not logged'
+
+    def feedback(self):
+        if not self.feedback_system.add_feedback(self.username, f"load test {self.random.randrange(10 ** 6)}"):
+            return 'feedback not saved'
+
+    def feedback_page(self):
+        if self.feedback_system.get_feedback_page() is None:
+            return 'feedback not loaded'
+
+    def comparison_stats(self):
+        if self.logger.get_comparison_stats().startswith('Error'):
+            return 'comparison stats failed'
+
+    def performance_stats(self):
+        if self.logger.get_performance_stats().startswith('Error'):
+            return 'performance stats failed'
+
+    def run(self, deadline, max_operations):
+        self.timed('register', self.register)
+        self.timed('login', self.login)
+        if not self.session:
+            return
+        done = 0
+        while time.perf_counter() < deadline and (max_operations is None or done < max_operations):
+            name = self.random.choices(self.operations, self.weights)[0]
+            self.timed(name, getattr(self, name))
+            done += 1
+            if self.rate:
+                time.sleep(self.random.expovariate(self.rate))
+
+
+def run_load(users=10, duration=30.0, rate=1.0, mix=None, seed=0, prefix='loadgen', array_size=100,
+             operations=None):
+    """Run the virtual users and return the report dict"""
+    mix = mix or DEFAULT_MIX
+    # Parallel algorithms would start process pools inside every virtual user
+    algorithms = sorted(name for name in FAST_ALGORITHMS
+                        if name != BASELINE_ALGORITHM and not REGISTRY.get(name).parallel)
+    stats = {name: OperationStats() for name in ['register'] + list(DEFAULT_MIX)}
+    db = DatabaseConnection()
+    # add_log looks the algorithms up by name; a fresh database has none of them
+    sync_catalog(db)
+    db.pool_stats(reset=True)
+    db.query_stats.reset()
+    virtual_users = [VirtualUser(i, prefix, seed, mix, rate, array_size, algorithms, stats) for i in range(users)]
+
+    start = time.perf_counter()
+    deadline = start + duration
+    with ThreadPoolExecutor(users) as executor:
+        for future in [executor.submit(user.run, deadline, operations) for user in virtual_users]:
+            future.result()
+    seconds = time.perf_counter() - start
+
+    report = {
+        'config': {'users': users, 'duration': duration, 'rate': rate, 'mix': mix, 'seed': seed,
+                   'array_size': array_size, 'operations': operations, 'pool_size': config.DB_POOL['maxconn']},
+        'seconds': seconds,
+        'operations': {name: op.summary(seconds) for name, op in stats.items() if op.latencies_ms},
+        'pool': db.pool_stats(),
+        'queries': db.query_stats.summary()
+    }
+    calls = sum(op['calls'] for op in report['operations'].values())
+    errors = sum(op['errors'] for op in report['operations'].values())
+    report['total'] = {'calls': calls, 'errors': errors, 'throughput': calls / seconds if seconds else 0.0,
+                       'error_rate': errors / calls if calls else 0.0}
+    return report
+
+
+def format_report(report):
+    def ms(value):
+        return '-' if value is None else f"{value:.1f}"
+    lines = [f"{'operation':<18} {'calls':>7} {'ops/s':>8} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+    for name, op in list(report['operations'].items()) + [('total', None)]:
+        if op is None:
+            total = report['total']
+            lines.append(f"{'total':<18} {total['calls']:>7} {total['throughput']:>8.1f} "
+                         f"{total['error_rate']:>6.1%}")
+            continue
+        lines.append(f"{name:<18} {op['calls']:>7} {op['throughput']:>8.1f} {op['error_rate']:>6.1%} "
+                     f"{ms(op['p50_ms']):>8} {ms(op['p95_ms']):>8} {ms(op['p99_ms']):>8} {ms(op['max_ms']):>8}")
+        for message, count in op['top_errors']:
+            lines.append(f"    {count} x {message}")
+    pool = report['pool']
+    lines.append(f"pool ({pool['maxconn']} connections): {pool['acquired']} checkouts, wait p50/p95/p99 "
+                 f"{ms(pool['wait_p50_ms'])}/{ms(pool['wait_p95_ms'])}/{ms(pool['wait_p99_ms'])}ms, "
+                 f"max {ms(pool['wait_max_ms'])}ms, {pool['timeouts']} timeouts")
+    if report['queries']:
+        lines.append('statements with the most database time:')
+    for query in report['queries'][:QUERY_REPORT_LIMIT]:
+        text = query['fingerprint']
+        if len(text) > 60:
+            text = text[:57] + '...'
+        lines.append(f"  {query['calls']:>7} calls {ms(query['total_ms']):>9}ms total "
+                     f"p95 {ms(query['p95_ms']):>7}ms  {text}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate concurrent users against the database')
+    parser.add_argument('--users', type=int, default=10, help='Virtual users, one thread each')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--operations', type=int, help='Stop each user after this many operations instead')
+    parser.add_argument('--rate', type=float, default=1.0,
+                        help='Operations per second per user (0: no think time)')
+    parser.add_argument('--mix', type=parse_mix, help='Operation weights, e.g. compare=40,performance_stats=10')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the users\' operation sequences')
+    parser.add_argument('--prefix', default='loadgen', help='Username prefix of the virtual users')
+    parser.add_argument('--array-size', type=int, default=100, help='Array size of each comparison')
+    parser.add_argument('--pool-size', type=int, help='Maximum pool connections (default: DB_POOL)')
+    parser.add_argument('--pool-timeout', type=float, help='Seconds to wait for a connection (default: DB_POOL)')
+    parser.add_argument('--json', help='Also write the report to this JSON file')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_plugins()
+    # Must be set before the first DatabaseConnection creates the pool
+    if args.pool_size:
+        config.DB_POOL['maxconn'] = args.pool_size
+    if args.pool_timeout:
+        config.DB_POOL['timeout'] = args.pool_timeout
+
+    report = run_load(args.users, args.duration, args.rate, args.mix, args.seed, args.prefix, args.array_size,
+                      args.operations)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    DatabaseConnection().close_all()
+
+
+if __name__ == '__main__':
+    main()
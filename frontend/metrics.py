@@ -0,0 +1,136 @@
+"""Frame-time and step-rate metrics for the visualizer.
+
+The animation is driven by a QTimer that asks for one step per tick, and each
+step triggers a repaint. These metrics show how close that comes to the
+requested rate:
+
+* steps/sec and frames/sec over a rolling window;
+* paint time percentiles, from timing paintEvent;
+* timer drift, how much later than its interval each tick arrived;
+* dropped frames, the ticks that would have fitted into a late tick's delay.
+
+Everything is tracked per panel (left and right), kept in memory over a
+rolling window and written to the log every LOG_INTERVAL seconds, so a
+rendering regression shows up in the session log as numbers.
+"""
+import logging
+import time
+from collections import deque
+
+# Samples kept per rolling window
+WINDOW_SIZE = 240
+# Seconds between metric lines in the log
+LOG_INTERVAL = 10.0
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values`, or None if there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def rate(timestamps):
+    """Events per second over a window of event timestamps"""
+    if len(timestamps) < 2:
+        return 0.0
+    elapsed = timestamps[-1] - timestamps[0]
+    return (len(timestamps) - 1) / elapsed if elapsed > 0 else 0.0
+
+
+class PanelMetrics:
+    """Rolling step, frame and timer statistics of one visualization panel"""
+
+    def __init__(self, window=WINDOW_SIZE):
+        self.step_times = deque(maxlen=window)
+        self.frame_times = deque(maxlen=window)
+        self.paint_ms = deque(maxlen=window)
+        self.drift_ms = deque(maxlen=window)
+        self.dropped_frames = 0
+        self.total_steps = 0
+        self.last_tick = None
+
+    def tick(self, now, interval_ms, steps=1):
+        """A timer tick at `now` (seconds) that advanced the panel by `steps`"""
+        if self.last_tick is not None and interval_ms > 0:
+            late_ms = (now - self.last_tick) * 1000 - interval_ms
+            self.drift_ms.append(late_ms)
+            # Whole intervals that passed without a tick are frames we never showed
+            self.dropped_frames += max(0, int(late_ms // interval_ms))
+        self.last_tick = now
+        for _ in range(steps):
+            self.step_times.append(now)
+        self.total_steps += steps
+
+    def paint(self, now, duration):
+        """A repaint that finished at `now` and took `duration` seconds"""
+        self.frame_times.append(now)
+        self.paint_ms.append(duration * 1000)
+
+    def pause(self):
+        """The timer stopped; the next tick shouldn't count the pause as drift"""
+        self.last_tick = None
+
+    def snapshot(self):
+        paint_ms = list(self.paint_ms)
+        drift_ms = list(self.drift_ms)
+        return {
+            'steps_per_sec': rate(self.step_times),
+            'fps': rate(self.frame_times),
+            'paint_p50_ms': percentile(paint_ms, 0.50),
+            'paint_p95_ms': percentile(paint_ms, 0.95),
+            'paint_p99_ms': percentile(paint_ms, 0.99),
+            'drift_mean_ms': sum(drift_ms) / len(drift_ms) if drift_ms else None,
+            'drift_max_ms': max(drift_ms) if drift_ms else None,
+            'dropped_frames': self.dropped_frames,
+            'total_steps': self.total_steps
+        }
+
+
+class VisualizerMetrics:
+    """Metrics of both panels, with periodic logging for the session"""
+
+    def __init__(self, panels=('left', 'right'), log_interval=LOG_INTERVAL, clock=time.perf_counter):
+        self.panels = {name: PanelMetrics() for name in panels}
+        self.log_interval = log_interval
+        self.clock = clock
+        self.last_log = clock()
+
+    def tick(self, panel, interval_ms, steps=1):
+        self.panels[panel].tick(self.clock(), interval_ms, steps)
+        self.maybe_log()
+
+    def paint_started(self):
+        """Timestamp to pass to paint_finished"""
+        return self.clock()
+
+    def paint_finished(self, panel, started):
+        now = self.clock()
+        self.panels[panel].paint(now, now - started)
+
+    def pause(self):
+        for panel in self.panels.values():
+            panel.pause()
+
+    def snapshot(self):
+        return {name: panel.snapshot() for name, panel in self.panels.items()}
+
+    def maybe_log(self):
+        now = self.clock()
+        if now - self.last_log < self.log_interval:
+            return
+        self.last_log = now
+        for name, stats in self.snapshot().items():
+            if stats['total_steps']:
+                logging.info(f"Render metrics [{name}]: {format_metrics(stats)}")
+
+
+def format_metrics(stats):
+    """One-line summary of a panel snapshot, as shown in the HUD and the log"""
+    def ms(value):
+        return '-' if value is None else f"{value:.1f}"
+    return (f"{stats['steps_per_sec']:.0f} steps/s, {stats['fps']:.0f} fps, "
+            f"paint p50/p95/p99 {ms(stats['paint_p50_ms'])}/{ms(stats['paint_p95_ms'])}/"
+            f"{ms(stats['paint_p99_ms'])}ms, drift {ms(stats['drift_mean_ms'])}ms "
+            f"(max {ms(stats['drift_max_ms'])}), {stats['dropped_frames']} dropped")
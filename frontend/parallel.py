@@ -0,0 +1,282 @@
+"""Multi-process parallel sorting algorithms.
+
+Both algorithms copy the input into a shared memory block of int64 values,
+so worker processes read and write it directly and only small metadata (the
+block name, bounds, bucket counts) goes through the pool's pipes.
+
+* Parallel merge sort: each worker sorts one contiguous chunk with the
+  sequential merge sort, then the parent does a k-way heap merge of the
+  sorted chunks.
+* Parallel sample sort: splitters are picked from a random sample, each
+  worker counts how many of its chunk's values fall into every bucket, the
+  parent turns the counts into offsets and the workers scatter their values
+  into a second block at those offsets. The buckets are then sorted
+  independently with a three-way partitioning quick sort. Values equal to a
+  splitter go to a bucket of their own that needs no sorting, and the
+  three-way partition sorts the other buckets in O(m log k) for m values
+  with k distinct ones, so inputs with many duplicates don't degrade the
+  bucket sorts (Lomuto partitioning, as in quick_sort_fast, is quadratic
+  there).
+  The same sort is used below MIN_PARALLEL_SIZE, and is registered on its
+  own as Three-Way Quick Sort, the sequential baseline of the speedup
+  reports.
+
+Both take the number of worker processes as an argument (WORKERS, one per
+CPU, by default) and fall back to the sequential algorithm below
+MIN_PARALLEL_SIZE elements, where starting the work costs more than it
+saves. Values must fit in 64 bits. The worker processes start with the
+first sort of a worker count; call warm_up() first to keep that out of a
+measurement.
+"""
+import atexit
+import heapq
+import os
+import random
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from algorithms import merge_sort_fast
+from registry import AlgorithmPlugin, IN_PLACE, PARALLEL
+
+WORKERS = os.cpu_count() or 1
+MIN_PARALLEL_SIZE = 4096
+# Sample size per bucket when choosing the sample sort splitters
+OVERSAMPLING = 32
+
+# Sequential algorithm each parallel one is measured against, for speedup reports
+PARALLEL_COUNTERPARTS = {
+    'Parallel Merge Sort': 'Merge Sort',
+    'Parallel Sample Sort': 'Three-Way Quick Sort'
+}
+
+_pools = {}
+
+
+def _pool(workers):
+    # Pools are kept for reuse, so repeated sorts don't pay for process startup
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(workers)
+    return _pools[workers]
+
+
+def _ready(_):
+    return os.getpid()
+
+
+def warm_up(workers=None):
+    """Start the pool of `workers` processes, so the next sort doesn't pay for it"""
+    workers = workers or WORKERS
+    if workers < 2:
+        return
+    pool = _pool(workers)
+    # One task per process: the pool only starts processes as tasks need them
+    list(pool.map(_ready, range(workers)))
+
+
+@atexit.register
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+class SharedArray:
+    """An int64 array in shared memory, created from `data` or attached by name"""
+
+    def __init__(self, data=None, size=None, name=None):
+        if name is not None:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        else:
+            size = len(data) if data is not None else size
+            # A zero-size block is not allowed
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, size) * 8)
+            self.owner = True
+        self.values = self.shm.buf.cast('q')
+        if data is not None:
+            self.values[:len(data)] = array('q', data)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.values.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _chunk_bounds(n, parts):
+    return [(i * n // parts, (i + 1) * n // parts) for i in range(parts)]
+
+
+def _classify(value, splitters):
+    """Bucket of `value`: 2b for values between splitters b-1 and b, 2b + 1 for splitter b itself"""
+    b = bisect_left(splitters, value)
+    if b < len(splitters) and splitters[b] == value:
+        return 2 * b + 1
+    return 2 * b
+
+
+def quick_sort_3way(arr):
+    """Quick sort with a three-way (<, =, >) partition around a median-of-three pivot.
+
+    Runs of the pivot value are finished in one pass, so many duplicates make
+    it faster rather than quadratic.
+    """
+    stack = [(0, len(arr) - 1)]
+    while stack:
+        low, high = stack.pop()
+        while low < high:
+            mid = (low + high) // 2
+            pivot = sorted((arr[low], arr[mid], arr[high]))[1]
+            # arr[low:lt] < pivot, arr[lt:i] == pivot, arr[gt+1:high+1] > pivot
+            lt, i, gt = low, low, high
+            while i <= gt:
+                value = arr[i]
+                if value < pivot:
+                    arr[lt], arr[i] = value, arr[lt]
+                    lt += 1
+                    i += 1
+                elif value > pivot:
+                    arr[gt], arr[i] = value, arr[gt]
+                    gt -= 1
+                else:
+                    i += 1
+            # Defer the larger side, loop on the smaller
+            if lt - low < high - gt:
+                stack.append((gt + 1, high))
+                high = lt - 1
+            else:
+                stack.append((low, lt - 1))
+                low = gt + 1
+
+
+# Worker functions; they run in the pool processes
+
+def _sort_chunk(name, lo, hi, sorter):
+    shared = SharedArray(name=name)
+    try:
+        chunk = shared.values[lo:hi].tolist()
+        sorter(chunk)
+        shared.values[lo:hi] = array('q', chunk)
+    finally:
+        shared.close()
+
+
+def _count_buckets(name, lo, hi, splitters):
+    shared = SharedArray(name=name)
+    try:
+        counts = [0] * (2 * len(splitters) + 1)
+        for value in shared.values[lo:hi].tolist():
+            counts[_classify(value, splitters)] += 1
+        return counts
+    finally:
+        shared.close()
+
+
+def _scatter(source_name, target_name, lo, hi, splitters, offsets):
+    source = SharedArray(name=source_name)
+    target = SharedArray(name=target_name)
+    try:
+        buckets = [[] for _ in offsets]
+        for value in source.values[lo:hi].tolist():
+            buckets[_classify(value, splitters)].append(value)
+        for offset, bucket in zip(offsets, buckets):
+            if bucket:
+                target.values[offset:offset + len(bucket)] = array('q', bucket)
+    finally:
+        source.close()
+        target.close()
+
+
+def parallel_merge_sort(arr, workers=None):
+    workers = workers or WORKERS
+    n = len(arr)
+    if workers < 2 or n < MIN_PARALLEL_SIZE:
+        merge_sort_fast(arr)
+        return
+    bounds = _chunk_bounds(n, workers)
+    with SharedArray(arr) as shared:
+        pool = _pool(workers)
+        list(pool.map(_sort_chunk, *zip(*[(shared.name, lo, hi, merge_sort_fast) for lo, hi in bounds])))
+        runs = [shared.values[lo:hi].tolist() for lo, hi in bounds]
+    arr[:] = heapq.merge(*runs)
+
+
+def parallel_sample_sort(arr, workers=None):
+    workers = workers or WORKERS
+    n = len(arr)
+    if workers < 2 or n < MIN_PARALLEL_SIZE:
+        quick_sort_3way(arr)
+        return
+    # Evenly spaced splitters from a sorted random sample; duplicates collapse
+    # into one splitter whose equal values get an (unsorted) bucket of their own
+    sample = sorted(random.sample(arr, min(n, OVERSAMPLING * workers)))
+    splitters = sorted({sample[i * len(sample) // workers] for i in range(1, workers)})
+    bounds = _chunk_bounds(n, workers)
+    pool = _pool(workers)
+
+    with SharedArray(arr) as source, SharedArray(size=n) as target:
+        counts = list(pool.map(_count_buckets, *zip(*[(source.name, lo, hi, splitters) for lo, hi in bounds])))
+
+        # Bucket b is laid out as worker 0's values, then worker 1's, and so on
+        buckets = len(counts[0])
+        offsets = [[0] * buckets for _ in range(workers)]
+        bucket_bounds = []
+        position = 0
+        for b in range(buckets):
+            start = position
+            for w in range(workers):
+                offsets[w][b] = position
+                position += counts[w][b]
+            bucket_bounds.append((start, position))
+        list(pool.map(_scatter, *zip(*[(source.name, target.name, lo, hi, splitters, offsets[w])
+                                        for w, (lo, hi) in enumerate(bounds)])))
+
+        # Odd buckets hold a single repeated value and are already sorted
+        unsorted = [(target.name, lo, hi, quick_sort_3way)
+                    for b, (lo, hi) in enumerate(bucket_bounds) if b % 2 == 0 and hi - lo > 1]
+        if unsorted:
+            list(pool.map(_sort_chunk, *zip(*unsorted)))
+        arr[:] = target.values.tolist()
+
+
+def parallel_merge_sort_fast(arr, workers=None):
+    parallel_merge_sort(arr, workers)
+
+
+def parallel_sample_sort_fast(arr, workers=None):
+    parallel_sample_sort(arr, workers)
+
+
+PLUGINS = [
+    AlgorithmPlugin(
+        'Three-Way Quick Sort',
+        'Quick sort that partitions around a median-of-three pivot into smaller, equal and larger values, finishing runs of the pivot in one pass, so k distinct values take O(n log k).',
+        'O(n log n) average, O(n²) worst', 'O(log n)',
+        fast=quick_sort_3way, capabilities={IN_PLACE}
+    ),
+    AlgorithmPlugin(
+        'Parallel Merge Sort',
+        'Sorts one chunk per worker process with merge sort over shared memory, then k-way merges the sorted chunks with a heap.',
+        'O((n/p) log(n/p) + n log p)', 'O(n)',
+        fast=parallel_merge_sort_fast, capabilities={PARALLEL}
+    ),
+    AlgorithmPlugin(
+        'Parallel Sample Sort',
+        'Picks splitters from a random sample, redistributes the values into buckets in shared memory and sorts the buckets in parallel with a three-way partitioning quick sort.',
+        'O((n/p) log(n/p)) expected', 'O(n)',
+        fast=parallel_sample_sort_fast, capabilities={PARALLEL}
+    )
+]
+
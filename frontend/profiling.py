@@ -0,0 +1,343 @@
+"""Opt-in profiling of sorting runs.
+
+Profiling is kept separate from timing: tracing every allocation or call
+slows an algorithm down, so callers time a run first and profile a second run
+on a copy of the same input.
+
+MemoryProfiler measures memory. CallProfiler (cProfile) and SamplingProfiler
+show where the time goes inside an algorithm: each writes a collapsed-stack
+file (one "frame;frame;frame microseconds" line per stack, the input of
+flamegraph.pl, speedscope and similar viewers), and CallProfiler also a
+.pstats file for pstats/snakeviz. Frames are labelled module:function
+without line numbers, so profiles of two versions of an implementation can
+be compared with diff_profiles:
+
+    python profiling.py old/merge_sort_n10000.pstats new/merge_sort_n10000.pstats
+"""
+import argparse
+import cProfile
+import gc
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROFILE_MODES = ('cprofile', 'sampling')
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.sortingviz', 'profiles')
+# Seconds between samples of SamplingProfiler
+SAMPLE_INTERVAL = 0.001
+# Stacks deeper than this are cut off at the root end in collapsed-stack files
+MAX_STACK_DEPTH = 128
+
+
+def current_rss_kb():
+    """Resident set size of this process in KB, or None if it can't be read"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1024
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemoryProfiler:
+    """Measures the memory used while driving a sorting generator to completion"""
+
+    def __init__(self, sample_every=64):
+        # Live block count and RSS are sampled every `sample_every` steps;
+        # tracemalloc tracks the peak on every allocation regardless
+        self.sample_every = sample_every
+
+    def profile(self, steps):
+        """Run `steps` (an algorithm generator) to completion and return its memory usage.
+
+        Returns a dict with:
+          peak_memory_kb - peak traced Python allocation during the run
+          peak_blocks    - peak number of live allocated blocks above the starting
+                           count (not the number of allocations made)
+          rss_delta_kb   - growth of the process RSS (None if RSS is unavailable)
+        """
+        gc.collect()
+        rss_before = current_rss_kb()
+        peak_rss = rss_before
+        blocks_before = sys.getallocatedblocks()
+        peak_blocks = 0
+
+        peak_traced = 0
+        # Traced bytes the samples themselves left allocated
+        sampler_bytes = 0
+        tracemalloc.start()
+        try:
+            for step, _ in enumerate(steps):
+                if step % self.sample_every == 0:
+                    # Reading RSS allocates too (psutil, /proc): take the peak
+                    # so far first and restart it after the sample, so the
+                    # sampler's allocations never count as the algorithm's
+                    current, peak = tracemalloc.get_traced_memory()
+                    peak_traced = max(peak_traced, peak - sampler_bytes)
+                    peak_blocks = max(peak_blocks, sys.getallocatedblocks() - blocks_before)
+                    if rss_before is not None:
+                        peak_rss = max(peak_rss, current_rss_kb())
+                    sampler_bytes += tracemalloc.get_traced_memory()[0] - current
+                    tracemalloc.reset_peak()
+            peak_blocks = max(peak_blocks, sys.getallocatedblocks() - blocks_before)
+            peak_traced = max(peak_traced, tracemalloc.get_traced_memory()[1] - sampler_bytes)
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'peak_memory_kb': peak_traced / 1024,
+            'peak_blocks': peak_blocks,
+            'rss_delta_kb': peak_rss - rss_before if rss_before is not None else None
+        }
+
+
+def frame_label(filename, funcname):
+    """module:function label of a frame, stable across edits to the module"""
+    # cProfile files built-ins under '~'
+    if filename == '~':
+        return funcname
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{funcname}" if module else funcname
+
+
+def hotspots(functions, limit=5):
+    """The `limit` functions with the most self time, as (label, self_ms) pairs"""
+    ranked = sorted(functions.items(), key=lambda item: -item[1][0])
+    return [(label, self_ms) for label, (self_ms, _) in ranked[:limit] if self_ms > 0]
+
+
+def write_folded(stacks, path):
+    """Write {stack tuple: microseconds} as a collapsed-stack file"""
+    with open(path, 'w') as f:
+        for stack, weight in sorted(stacks.items()):
+            if weight > 0:
+                f.write(f"{';'.join(stack)} {int(round(weight))}\n")
+
+
+class CallProfiler:
+    """Profiles a sorting run with cProfile.
+
+    Every call and generator resumption is traced, so this is exact but
+    slows pure-Python algorithms down by a factor of two or more.
+    """
+
+    def profile(self, steps, path):
+        """Run `steps` to completion and write `path`.pstats and `path`.folded.
+
+        Returns a dict with:
+          profile_path - the .pstats file
+          folded_path  - the collapsed stacks derived from it
+          hotspots     - (function, self ms) of the functions with the most self time
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            for _ in steps:
+                pass
+        finally:
+            profiler.disable()
+        stats = pstats.Stats(profiler)
+        # The profiler's own disable() call is recorded as well
+        for func in [func for func in stats.stats if '_lsprof.Profiler' in func[2]]:
+            del stats.stats[func]
+        profile_path = path + '.pstats'
+        folded_path = path + '.folded'
+        stats.dump_stats(profile_path)
+        write_folded(self.folded_stacks(stats), folded_path)
+        return {
+            'profile_path': profile_path,
+            'folded_path': folded_path,
+            'hotspots': hotspots(pstats_functions(stats.stats))
+        }
+
+    def folded_stacks(self, stats):
+        """Approximate {stack: microseconds} from the caller/callee edges of a profile.
+
+        cProfile keeps one level of callers per function, not whole stacks, so
+        each function's time is split between its callers in proportion to
+        the time spent under each. Recursion is folded into the outermost
+        call, as cProfile does for cumulative time.
+        """
+        callees = {}
+        for func, (_, _, _, _, callers) in stats.stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, []).append((func, edge[3]))
+        labels = {func: frame_label(func[0], func[2]) for func in stats.stats}
+        stacks = Counter()
+
+        def expand(func, stack, share):
+            """Add `share` (0-1) of `func`'s time under `stack`"""
+            _, _, tottime, cumtime, _ = stats.stats[func]
+            stack = stack + (labels[func],)
+            stacks[stack[-MAX_STACK_DEPTH:]] += tottime * share * 1e6
+            for callee, edge_time in callees.get(func, []):
+                callee_time = stats.stats[callee][3]
+                if labels[callee] in stack or not callee_time:
+                    continue
+                callee_share = edge_time * share / callee_time
+                # Paths under a microsecond don't show up in a flamegraph
+                if callee_time * callee_share >= 1e-6:
+                    expand(callee, stack, callee_share)
+
+        for func, (_, _, _, _, callers) in stats.stats.items():
+            if not callers:
+                expand(func, (), 1.0)
+        return stacks
+
+
+class SamplingProfiler:
+    """Profiles a sorting run by sampling its stack from a second thread.
+
+    The algorithm runs untraced; every `interval` seconds the sampler records
+    the running thread's stack, including the chain of generators it is
+    resumed through (e.g. merge_sort's recursive helpers). The sampler can only run
+    when the sorting thread releases the GIL, so the thread switch interval is
+    lowered to `interval` for the duration of the run.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+
+    def profile(self, steps, path):
+        """Run `steps` to completion and write `path`.folded.
+
+        Returns a dict like CallProfiler.profile; profile_path is the .folded
+        file, as there is no .pstats.
+        """
+        target = threading.get_ident()
+        root = sys._getframe()
+        samples = Counter()
+        done = threading.Event()
+        running = True
+
+        def sample():
+            while not done.wait(self.interval):
+                frame = sys._current_frames().get(target)
+                stack = []
+                while frame is not None and frame is not root:
+                    stack.append(frame_label(frame.f_code.co_filename, frame.f_code.co_name))
+                    frame = frame.f_back
+                # Samples taken after the run (while stopping the sampler) are dropped
+                if stack and running:
+                    samples[tuple(reversed(stack[:MAX_STACK_DEPTH]))] += 1
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, self.interval))
+        sampler = threading.Thread(target=sample, name='sampling-profiler', daemon=True)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            for _ in steps:
+                pass
+        finally:
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            running = False
+            done.set()
+            sampler.join()
+            sys.setswitchinterval(switch_interval)
+
+        # Weight samples by the run's actual duration, so the numbers are
+        # comparable with CallProfiler's even when samples were late
+        count = sum(samples.values())
+        stacks = {stack: n * elapsed_us / count for stack, n in samples.items()} if count else {}
+        folded_path = path + '.folded'
+        write_folded(stacks, folded_path)
+        return {
+            'profile_path': folded_path,
+            'folded_path': folded_path,
+            'hotspots': hotspots(folded_functions(stacks))
+        }
+
+
+PROFILERS = {'cprofile': CallProfiler, 'sampling': SamplingProfiler}
+
+
+def pstats_functions(stats):
+    """{label: [self ms, cumulative ms]} from pstats' raw stats dict"""
+    functions = {}
+    for (filename, _, funcname), (_, _, tottime, cumtime, _) in stats.items():
+        times = functions.setdefault(frame_label(filename, funcname), [0.0, 0.0])
+        times[0] += tottime * 1000
+        times[1] += cumtime * 1000
+    return functions
+
+
+def folded_functions(stacks):
+    """{label: [self ms, inclusive ms]} from {stack: microseconds}"""
+    functions = {}
+    for stack, weight in stacks.items():
+        functions.setdefault(stack[-1], [0.0, 0.0])[0] += weight / 1000
+        for label in set(stack):
+            functions.setdefault(label, [0.0, 0.0])[1] += weight / 1000
+    return functions
+
+
+def load_profile(path):
+    """{label: [self ms, cumulative ms]} of a .pstats or collapsed-stack file"""
+    if path.endswith('.pstats'):
+        return pstats_functions(pstats.Stats(path).stats)
+    stacks = Counter()
+    with open(path) as f:
+        for line in f:
+            stack, _, weight = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[tuple(stack.split(';'))] += float(weight)
+    return folded_functions(stacks)
+
+
+def diff_profiles(old_path, new_path):
+    """Per-function change in self and cumulative time between two profiles.
+
+    The profiles may be of either kind. Returns dicts sorted by the largest
+    change in self time first.
+    """
+    old = load_profile(old_path)
+    new = load_profile(new_path)
+    rows = []
+    for label in set(old) | set(new):
+        old_self, old_total = old.get(label, (0.0, 0.0))
+        new_self, new_total = new.get(label, (0.0, 0.0))
+        rows.append({
+            'function': label,
+            'old_self_ms': old_self,
+            'new_self_ms': new_self,
+            'self_delta_ms': new_self - old_self,
+            'old_total_ms': old_total,
+            'new_total_ms': new_total
+        })
+    return sorted(rows, key=lambda row: -abs(row['self_delta_ms']))
+
+
+def format_diff(rows, limit=20):
+    lines = [f"{'old self':>10} {'new self':>10} {'delta':>10} {'old cum':>10} {'new cum':>10}  function"]
+    for row in rows[:limit]:
+        lines.append(f"{row['old_self_ms']:>10.2f} {row['new_self_ms']:>10.2f} {row['self_delta_ms']:>+10.2f} "
+                     f"{row['old_total_ms']:>10.2f} {row['new_total_ms']:>10.2f}  {row['function']}")
+    old_total = sum(row['old_self_ms'] for row in rows)
+    new_total = sum(row['new_self_ms'] for row in rows)
+    lines.append(f"{old_total:>10.2f} {new_total:>10.2f} {new_total - old_total:>+10.2f} {'':>10} {'':>10}  total")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two profiles of a sorting run (times in ms)')
+    parser.add_argument('old', help='.pstats or collapsed-stack file of the old version')
+    parser.add_argument('new', help='.pstats or collapsed-stack file of the new version')
+    parser.add_argument('--limit', type=int, default=20, help='Functions to show (default: %(default)s)')
+    args = parser.parse_args(argv)
+    print(format_diff(diff_profiles(args.old, args.new), args.limit))
+
+
+if __name__ == '__main__':
+    main()
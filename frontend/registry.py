@@ -0,0 +1,142 @@
+"""Registry of sorting algorithm plugins.
+
+Every algorithm, built in or not, is an AlgorithmPlugin declaring its name,
+complexity metadata, implementations and capabilities. The built-in
+algorithms are registered by the algorithms module; others are discovered
+through the 'sortingviz.algorithms' entry point group, so a package can add
+tuned implementations to the visualizer and the benchmark runner without
+patching them. In its packaging metadata:
+
+    [project.entry-points."sortingviz.algorithms"]
+    tuned_merge = "tuned_sorts:PLUGINS"
+
+An entry point may name an AlgorithmPlugin, a list of them, or a callable
+returning either.
+"""
+import logging
+from importlib import metadata
+
+ENTRY_POINT_GROUP = 'sortingviz.algorithms'
+
+# Capabilities an algorithm can declare
+STABLE = 'stable'
+IN_PLACE = 'in_place'
+# The fast function of a parallel algorithm takes a `workers` keyword argument
+PARALLEL = 'parallel'
+CAPABILITIES = (STABLE, IN_PLACE, PARALLEL)
+
+
+class AlgorithmPlugin:
+    """One sorting algorithm and what is known about it.
+
+    `visual` is a generator function yielding a step event per step (needed
+    to show the algorithm in the GUI), `fast` sorts a list in place without
+    yielding (needed to benchmark and compare it). At least one is required.
+    """
+
+    def __init__(self, name, description, time_complexity, space_complexity, visual=None, fast=None,
+                 capabilities=()):
+        if visual is None and fast is None:
+            raise ValueError(f"Algorithm {name} has neither a visual nor a fast implementation")
+        unknown = set(capabilities) - set(CAPABILITIES)
+        if unknown:
+            raise ValueError(f"Unknown capabilities for {name}: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.description = description
+        self.time_complexity = time_complexity
+        self.space_complexity = space_complexity
+        self.visual = visual
+        self.fast = fast
+        self.capabilities = frozenset(capabilities)
+
+    @property
+    def stable(self):
+        return STABLE in self.capabilities
+
+    @property
+    def in_place(self):
+        return IN_PLACE in self.capabilities
+
+    @property
+    def parallel(self):
+        return PARALLEL in self.capabilities
+
+    def catalog_row(self):
+        """Row for the sorting_algorithms table"""
+        return (self.name, self.description, self.time_complexity, self.space_complexity)
+
+    def __repr__(self):
+        return f"AlgorithmPlugin({self.name!r})"
+
+
+class AlgorithmRegistry:
+    """Registered plugins by name, in registration order.
+
+    `visual` and `fast` map names to implementations. They are the dicts the
+    rest of the code looks algorithms up in, and are kept up to date as
+    plugins are registered.
+    """
+
+    def __init__(self, visual=None, fast=None):
+        self.plugins = {}
+        self.visual = {} if visual is None else visual
+        self.fast = {} if fast is None else fast
+        self.entry_points_loaded = False
+
+    def register(self, plugin, replace=False):
+        if plugin.name in self.plugins and not replace:
+            raise ValueError(f"Algorithm already registered: {plugin.name}")
+        self.plugins[plugin.name] = plugin
+        for implementations, func in ((self.visual, plugin.visual), (self.fast, plugin.fast)):
+            if func is not None:
+                implementations[plugin.name] = func
+            else:
+                implementations.pop(plugin.name, None)
+        return plugin
+
+    def get(self, name):
+        return self.plugins[name]
+
+    def __contains__(self, name):
+        return name in self.plugins
+
+    def __iter__(self):
+        return iter(self.plugins.values())
+
+    def with_capability(self, capability):
+        return [plugin for plugin in self if capability in plugin.capabilities]
+
+    def catalog_rows(self):
+        return [plugin.catalog_row() for plugin in self]
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """Register the plugins of every installed entry point in `group`, once.
+
+        A broken plugin is logged and skipped rather than stopping the app.
+        Returns the newly registered plugins.
+        """
+        if self.entry_points_loaded:
+            return []
+        self.entry_points_loaded = True
+        loaded = []
+        for entry_point in _entry_points(group):
+            try:
+                provided = entry_point.load()
+                if callable(provided) and not isinstance(provided, AlgorithmPlugin):
+                    provided = provided()
+                if isinstance(provided, AlgorithmPlugin):
+                    provided = [provided]
+                for plugin in provided:
+                    loaded.append(self.register(plugin))
+                    logging.info(f"Loaded algorithm plugin {plugin.name} from {entry_point.value}")
+            except Exception as e:
+                logging.error(f"Error loading algorithm plugin {entry_point.name}: {e}")
+        return loaded
+
+
+def _entry_points(group):
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        return entry_points.select(group=group)
+    # Python < 3.10 returns a dict of group -> entry points
+    return entry_points.get(group, [])
@@ -0,0 +1,312 @@
+"""Off-screen rendering of recorded sort runs.
+
+Frames are rasterized straight from the array values into NumPy pixel
+buffers (32-bit 0xffRRGGBB, the layout of QImage.Format_RGB32), so rendering
+needs neither a display nor a QPainter, and costs the same however many
+elements the array has: columns that hold several elements show the tallest.
+
+A video of one run, or of two runs side by side, is rendered from trace files
+(see sort_trace). The frames are split into contiguous chunks and rendered in
+parallel worker processes; each worker opens its own TraceReader, seeks to
+the first step of its chunk and plays forward from there. The frames are
+then encoded as an animated GIF or APNG (which needs Pillow) or written as a
+raw RGB24 stream that can be piped into a video encoder, e.g.
+
+    python render.py left.trace right.trace -o - | \\
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 1200x600 -r 30 -i - out.mp4
+
+Example:
+    python render.py traces/heap_sort_n3000_t0.trace traces/merge_sort_n3000_t0.trace -o race.gif
+"""
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithms import np, COMPARE, SWAP, WRITE
+from sort_trace import TraceReader
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_WIDTH = 1200
+DEFAULT_HEIGHT = 600
+DEFAULT_FRAMES = 300
+DEFAULT_FPS = 30
+SEPARATOR_WIDTH = 2
+
+# Palette indices; a higher index wins when several elements share a column
+BACKGROUND = 0
+BAR = 1
+COMPLETE = 2
+SEPARATOR = 3
+# Highlight colors of the step events, at SEPARATOR + event kind
+HIGHLIGHT_COLORS = {
+    COMPARE: (231, 76, 60),
+    SWAP: (52, 152, 219),
+    WRITE: (243, 156, 18)
+}
+
+
+def rgb(color):
+    """0xffRRGGBB pixel value of an (r, g, b) tuple or '#rrggbb' string"""
+    if isinstance(color, str):
+        color = tuple(int(color.lstrip('#')[i:i + 2], 16) for i in (0, 2, 4))
+    r, g, b = color
+    return 0xff000000 | (r << 16) | (g << 8) | b
+
+
+def make_palette(bar=(170, 183, 184), complete=(100, 180, 100), background=(255, 255, 255),
+                 separator=(189, 195, 199)):
+    """Pixel value of every palette index, same default colors as the visualizer"""
+    palette = np.zeros(SEPARATOR + max(HIGHLIGHT_COLORS) + 1, dtype=np.uint32)
+    palette[BACKGROUND] = rgb(background)
+    palette[BAR] = rgb(bar)
+    palette[COMPLETE] = rgb(complete)
+    palette[SEPARATOR] = rgb(separator)
+    for kind, color in HIGHLIGHT_COLORS.items():
+        palette[SEPARATOR + kind] = rgb(color)
+    return palette
+
+
+def event_highlights(event):
+    """(element index, palette index) pairs highlighting a step event, if any"""
+    if not event:
+        return ()
+    kind, i, j = event
+    return ((i, SEPARATOR + kind), (j, SEPARATOR + kind))
+
+
+def columns(per_element, width):
+    """Spread per-element values over `width` pixel columns.
+
+    Small arrays get bars several pixels wide with a one pixel gap, centered
+    like the live view; arrays wider than `width` are bucketed and each column
+    keeps the largest value in its bucket. Gaps and margins are 0.
+    """
+    n = len(per_element)
+    result = np.zeros(width, dtype=per_element.dtype)
+    if n == 0:
+        return result
+    if n <= width:
+        bar_width = width // n
+        bars = np.repeat(per_element, bar_width).reshape(n, bar_width)
+        if bar_width > 2:
+            bars[:, -1] = 0
+        start = (width - n * bar_width) // 2
+        result[start:start + n * bar_width] = bars.ravel()
+    else:
+        starts = np.arange(width, dtype=np.int64) * n // width
+        result[:] = np.maximum.reduceat(per_element, starts)
+    return result
+
+
+def element_columns(i, n, width):
+    """Slice of the pixel columns `columns` puts element i of n in"""
+    if n <= width:
+        bar_width = width // n
+        start = (width - n * bar_width) // 2 + i * bar_width
+        return slice(start, start + bar_width - (1 if bar_width > 2 else 0))
+    # Last bucket whose first element is <= i
+    column = ((i + 1) * width - 1) // n
+    return slice(column, column + 1)
+
+
+def rasterize(values, width, height, palette, color_index=None, default=BAR, max_value=None,
+              highlights=()):
+    """Render the bars of `values` into a (height, width) uint32 pixel buffer.
+
+    Bar heights are scaled so `max_value` (default: the largest value) fills
+    the height. `color_index` gives a palette index per element; without it
+    every bar gets `default`. `highlights` are (element index, palette index)
+    pairs recolored on top, which is cheaper than a full `color_index` for the
+    one or two elements a step touches.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if max_value is None:
+        max_value = int(values.max()) if len(values) else 1
+    heights = columns(values * height // max(max_value, 1), width)
+    if color_index is None:
+        colors = np.where(heights > 0, palette[default], palette[BACKGROUND])
+    else:
+        colors = palette[columns(np.asarray(color_index, dtype=np.uint8), width)]
+    for i, index in highlights:
+        colors[element_columns(i, len(values), width)] = palette[index]
+
+    rows = np.arange(height, dtype=np.int32)[:, None]
+    mask = rows >= (height - heights).astype(np.int32)[None, :]
+    return np.where(mask, colors[None, :], palette[BACKGROUND]).astype(np.uint32, copy=False)
+
+
+def to_rgb(frame):
+    """(height, width, 3) uint8 RGB copy of a pixel buffer"""
+    return np.stack([(frame >> 16) & 0xff, (frame >> 8) & 0xff, frame & 0xff], axis=-1).astype(np.uint8)
+
+
+def to_qimage(frame):
+    """Wrap a pixel buffer as a QImage without copying; keep `frame` alive while it's used"""
+    from PyQt5.QtGui import QImage
+    frame = np.ascontiguousarray(frame, dtype=np.uint32)
+    height, width = frame.shape
+    return QImage(frame.data, width, height, width * 4, QImage.Format_RGB32)
+
+
+def frame_steps(total_steps, frames):
+    """Evenly spaced steps to render, always including the first and the last"""
+    if frames <= 1 or total_steps == 0:
+        return [total_steps]
+    return sorted({round(i * total_steps / (frames - 1)) for i in range(frames)})
+
+
+def compose(panels, palette):
+    """Lay the panel buffers out side by side with a separator between them"""
+    if len(panels) == 1:
+        return panels[0]
+    height = panels[0].shape[0]
+    separator = np.full((height, SEPARATOR_WIDTH), palette[SEPARATOR], dtype=np.uint32)
+    parts = []
+    for panel in panels:
+        if parts:
+            parts.append(separator)
+        parts.append(panel)
+    return np.hstack(parts)
+
+
+def panel_widths(width, count):
+    """Widths of `count` panels filling `width` exactly, separators included"""
+    available = width - SEPARATOR_WIDTH * (count - 1)
+    widths = [available // count] * count
+    widths[-1] += available % count
+    return widths
+
+
+def _render_chunk(paths, steps, width, height, palette, max_values):
+    """Worker: render the frames for `steps` (ascending) from each trace in `paths`"""
+    readers = [TraceReader(path) for path in paths]
+    try:
+        # Stop one step short so the first frame knows what its step wrote
+        arrays = [reader.seek(steps[0] - 1) for reader in readers]
+        widths = panel_widths(width, len(readers))
+        frames = []
+        for step in steps:
+            panels = []
+            for reader, arr, panel, max_value in zip(readers, arrays, widths, max_values):
+                # Runs of different length: the shorter one stays on its last frame
+                target = min(step, reader.total_steps)
+                written = []
+                while reader.step < target:
+                    written = reader.advance(arr)
+                done = reader.step >= reader.total_steps
+                # Highlight what the last step wrote, as the live view does
+                highlights = [] if done else [(i, SEPARATOR + WRITE) for i in written]
+                panels.append(rasterize(arr, panel, height, palette, default=COMPLETE if done else BAR,
+                                        max_value=max_value, highlights=highlights))
+            frames.append(to_rgb(compose(panels, palette)))
+        return np.stack(frames)
+    finally:
+        for reader in readers:
+            reader.close()
+
+
+class TraceRenderer:
+    """Renders one or more traces of the same input side by side into video frames"""
+
+    def __init__(self, paths, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, palette=None, workers=None):
+        if np is None:
+            raise RuntimeError("NumPy is required for off-screen rendering")
+        self.paths = list(paths)
+        self.width = width
+        self.height = height
+        self.palette = make_palette() if palette is None else palette
+        self.workers = workers or os.cpu_count() or 1
+
+        self.total_steps = 0
+        self.max_values = []
+        for path in self.paths:
+            reader = TraceReader(path)
+            self.total_steps = max(self.total_steps, reader.total_steps)
+            # Sorting only permutes the values, so the first keyframe has the maximum
+            values = reader.keyframe(0)
+            self.max_values.append(max(values) if values else 1)
+            reader.close()
+
+    def chunks(self, steps):
+        """Split the frame steps into contiguous runs, a few per worker for load balancing"""
+        count = min(len(steps), self.workers * 4)
+        size = -(-len(steps) // count)
+        return [steps[i:i + size] for i in range(0, len(steps), size)]
+
+    def frames(self, count=DEFAULT_FRAMES):
+        """Yield (height, width, 3) RGB frames in order, rendered in parallel"""
+        chunks = self.chunks(frame_steps(self.total_steps, count))
+        args = [(self.paths, chunk, self.width, self.height, self.palette, self.max_values)
+                for chunk in chunks]
+        if self.workers == 1:
+            for chunk_args in args:
+                yield from _render_chunk(*chunk_args)
+            return
+        with ProcessPoolExecutor(self.workers) as pool:
+            # map() returns the chunks in submission order while later ones still render
+            for rendered in pool.map(_render_chunk, *zip(*args)):
+                yield from rendered
+
+    def write_raw(self, output, count=DEFAULT_FRAMES):
+        """Stream the frames as raw RGB24 to a binary file object; returns the frame count"""
+        written = 0
+        for frame in self.frames(count):
+            output.write(frame.tobytes())
+            written += 1
+        return written
+
+    def palette_image(self, frame):
+        """Paletted Pillow image of an RGB frame, skipping Pillow's slow color quantization"""
+        # Frames only ever contain palette colors, so each pixel maps to its palette index
+        keys = (frame[..., 0].astype(np.uint32) << 16) | (frame[..., 1].astype(np.uint32) << 8) | frame[..., 2]
+        colors = self.palette & 0xffffff
+        order = np.argsort(colors)
+        indices = order[np.searchsorted(colors[order], keys)].astype(np.uint8)
+        image = Image.fromarray(indices, 'P')
+        image.putpalette(to_rgb(self.palette).ravel().tolist())
+        return image
+
+    def write_animation(self, path, count=DEFAULT_FRAMES, fps=DEFAULT_FPS):
+        """Encode the frames as an animated GIF or APNG, chosen by the file extension"""
+        if Image is None:
+            raise RuntimeError("Pillow is required for GIF/APNG export; use a raw stream instead")
+        images = [self.palette_image(frame) for frame in self.frames(count)]
+        images[0].save(path, save_all=True, append_images=images[1:],
+                       duration=int(1000 / fps), loop=0)
+        return len(images)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render recorded sort runs to an animation or raw video')
+    parser.add_argument('traces', nargs='+', help='Trace files to show side by side (same input)')
+    parser.add_argument('-o', '--output', required=True,
+                        help='.gif or .png/.apng for an animation; anything else (or -) for raw RGB24 frames')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help='Number of frames to render')
+    parser.add_argument('--fps', type=int, default=DEFAULT_FPS, help='Frame rate of the animation')
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH)
+    parser.add_argument('--height', type=int, default=DEFAULT_HEIGHT)
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    renderer = TraceRenderer(args.traces, args.width, args.height, workers=args.workers)
+    extension = os.path.splitext(args.output)[1].lower()
+    if extension in ('.gif', '.png', '.apng'):
+        count = renderer.write_animation(args.output, args.frames, args.fps)
+    elif args.output == '-':
+        count = renderer.write_raw(sys.stdout.buffer, args.frames)
+    else:
+        with open(args.output, 'wb') as f:
+            count = renderer.write_raw(f, args.frames)
+    logging.info(f"Rendered {count} frames of {renderer.width}x{renderer.height} to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Persistent cache of measured sorting results.
+
+Entries are keyed by (algorithm, variant, code version, input hash, machine
+fingerprint), so a result is only reused for the exact same implementation
+sorting the exact same input on the same machine. Each entry holds the
+operation (step) count, the timing distribution collected so far, memory
+measurements and the path of a recorded trace, if any.
+
+The cache is a small SQLite file with least-recently-used eviction once the
+stored entries exceed a size cap.
+"""
+import hashlib
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import time
+from array import array
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.sortingviz', 'result_cache.sqlite')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Only the most recent timings of an entry are kept
+MAX_TIMINGS = 1000
+
+
+def code_version(func):
+    """Hash of the source of `func` and every module-level function it calls, transitively"""
+    module_globals = func.__globals__
+    seen = set()
+    pending = [func]
+    sources = []
+    while pending:
+        current = pending.pop()
+        if current.__name__ in seen:
+            continue
+        seen.add(current.__name__)
+        try:
+            sources.append(inspect.getsource(current))
+        except (OSError, TypeError):
+            # Builtins and C extensions have no source; their name is the best we have
+            sources.append(current.__qualname__)
+            continue
+        # Walk nested functions too, since helpers are often called from inner defs
+        codes = [current.__code__]
+        while codes:
+            code = codes.pop()
+            for name in code.co_names:
+                referenced = module_globals.get(name)
+                if inspect.isfunction(referenced) and referenced.__globals__ is module_globals:
+                    pending.append(referenced)
+            codes.extend(const for const in code.co_consts if inspect.iscode(const))
+    return hashlib.sha256('\n'.join(sorted(sources)).encode()).hexdigest()
+
+
+def input_hash(data):
+    """Content hash of an input list or NumPy array"""
+    digest = hashlib.sha256()
+    if hasattr(data, 'tobytes'):
+        digest.update(str(data.dtype).encode())
+        digest.update(data.tobytes())
+    else:
+        try:
+            digest.update(array('q', data).tobytes())
+        except (OverflowError, TypeError):
+            digest.update(repr(data).encode())
+    return digest.hexdigest()
+
+
+def machine_fingerprint():
+    """Identifies the hardware and interpreter that produced a measurement"""
+    parts = [
+        platform.node(),
+        platform.machine(),
+        platform.processor(),
+        platform.python_implementation(),
+        platform.python_version(),
+        str(os.cpu_count())
+    ]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:16]
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.machine = machine_fingerprint()
+        self._versions = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)')
+        self.conn.commit()
+
+    def make_key(self, algorithm_name, func, variant, data):
+        """Key for `func` (the implementation of `algorithm_name`) sorting `data`"""
+        # Hashing the source is comparatively slow, and it can't change while running
+        if func not in self._versions:
+            self._versions[func] = code_version(func)
+        parts = [algorithm_name, variant, self._versions[func], input_hash(data), self.machine]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+    def get(self, key):
+        """Cached entry for `key` (marking it as recently used), or None"""
+        row = self.conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, entry):
+        value = json.dumps(entry)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+            (key, value, len(value), time.time())
+        )
+        self.evict()
+        self.conn.commit()
+
+    def update(self, key, **fields):
+        """Merge `fields` into the entry for `key`, creating it if needed"""
+        entry = self.get(key) or {}
+        entry.update(fields)
+        self.put(key, entry)
+        return entry
+
+    def add_timing(self, key, elapsed_ms, **fields):
+        """Append a measurement to the entry's timing distribution"""
+        return self.add_timings(key, [elapsed_ms], **fields)
+
+    def add_timings(self, key, times, **fields):
+        entry = self.get(key) or {}
+        entry['times'] = (entry.get('times', []) + list(times))[-MAX_TIMINGS:]
+        entry.update(fields)
+        self.put(key, entry)
+        return entry
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute('SELECT key, size FROM results ORDER BY last_access').fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.conn.execute('DELETE FROM results WHERE key = ?', (key,))
+            total -= size
+
+    def clear(self):
+        self.conn.execute('DELETE FROM results')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
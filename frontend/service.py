@@ -0,0 +1,547 @@
+"""Local HTTP/JSON service for running benchmarks and reading statistics.
+
+Lets scripts and dashboards on a benchmark host use the benchmark runner and
+the logged statistics without the GUI:
+
+    POST   /jobs                      submit a benchmark job (JSON body, see parse_job)
+    GET    /jobs                      all jobs, newest first
+    GET    /jobs/{id}                 status, progress, results and summary of a job
+    GET    /jobs/{id}/events          progress as newline-delimited JSON until the job ends
+    DELETE /jobs/{id}                 cancel a queued or running job
+    GET    /stats/performance         time per algorithm, size and run mode from performance_logs
+    GET    /stats/comparisons         wins per algorithm from comparison_logs
+    GET    /traces/{id}/{name}        download a trace recorded by a job
+    GET    /health                    queue and worker status
+
+Jobs wait in a bounded queue (submissions beyond it get 429) and at most
+--max-jobs run at once, each on its own thread. The default is one, so jobs
+don't disturb each other's timings. The stats endpoints accept algorithm,
+run_mode, since and until filters, run at most STATS_CONCURRENCY queries at
+once and cache their responses for --cache-ttl seconds; concurrent requests
+for the same uncached response share one query.
+
+Needs aiohttp. The stats endpoints use the async driver (async_connect) when
+psycopg 3 is installed, otherwise DatabaseConnection on a worker thread.
+
+Example:
+    python service.py --port 8765 --trace-dir traces
+    curl -X POST localhost:8765/jobs -d '{"algorithms": ["Merge Sort"], "sizes": [1000, 10000], "fast": true}'
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from algorithms import ALGORITHMS, FAST_ALGORITHMS, load_plugins
+from benchmark import BenchmarkRunner, ResultLogger, summarize
+from result_cache import ResultCache
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_JOBS = 1
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_CACHE_TTL = 30.0
+# Limits on what a single job may ask for
+MAX_ARRAY_SIZE = 1_000_000
+MAX_SIZES = 20
+MAX_TRIALS = 100
+# Finished jobs kept for GET /jobs; older ones are forgotten
+MAX_FINISHED_JOBS = 200
+# Stats queries running at once, however many requests arrive
+STATS_CONCURRENCY = 4
+CACHE_ENTRIES = 256
+MAX_BODY_BYTES = 64 * 1024
+
+FINAL_STATES = ('finished', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """A benchmark job and its progress, updated on the event loop thread"""
+
+    def __init__(self, spec):
+        self.id = uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.status = 'queued'
+        self.done = 0
+        self.total = None
+        self.last_result = None
+        self.results = None
+        self.summary = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        # One queue per open /events stream
+        self.listeners = set()
+
+    def snapshot(self, detail=False):
+        state = {
+            'id': self.id,
+            'status': self.status,
+            'spec': self.spec,
+            'done': self.done,
+            'total': self.total,
+            'last_result': self.last_result,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+        if detail:
+            state['results'] = self.results
+            state['summary'] = self.summary
+        return state
+
+    def changed(self):
+        snapshot = self.snapshot()
+        for listener in self.listeners:
+            listener.put_nowait(snapshot)
+
+    def start(self):
+        self.status = 'running'
+        self.started = time.time()
+        self.changed()
+
+    def progress(self, done, total, result):
+        self.done = done
+        self.total = total
+        self.last_result = result
+        self.changed()
+
+    def end(self, status, results=None, error=None):
+        self.status = status
+        self.results = results
+        self.summary = summarize(results) if results else None
+        self.error = error
+        self.finished = time.time()
+        self.changed()
+
+
+def parse_job(body):
+    """Validated job spec from a request body; raises ValueError with the reason.
+
+    Keys: sizes (required), algorithms, trials, fast, memory, seed, workers,
+    trace (record traces of the visual runs), cache (use the result cache,
+    default true) and log (username to store the results under).
+    """
+    if not isinstance(body, dict):
+        raise ValueError('The body must be a JSON object')
+    unknown = set(body) - {'sizes', 'algorithms', 'trials', 'fast', 'memory', 'seed', 'workers', 'trace',
+                           'cache', 'log'}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    sizes = body.get('sizes')
+    if (not isinstance(sizes, list) or not sizes or len(sizes) > MAX_SIZES
+            or not all(isinstance(n, int) and 0 < n <= MAX_ARRAY_SIZE for n in sizes)):
+        raise ValueError(f"sizes must be a list of 1-{MAX_SIZES} integers between 1 and {MAX_ARRAY_SIZE}")
+    fast = bool(body.get('fast', False))
+    available = FAST_ALGORITHMS if fast else ALGORITHMS
+    algorithms = body.get('algorithms')
+    if algorithms is not None:
+        if not isinstance(algorithms, list) or not algorithms:
+            raise ValueError('algorithms must be a non-empty list')
+        missing = [name for name in algorithms if name not in available]
+        if missing:
+            raise ValueError(f"Unknown algorithms: {', '.join(map(str, missing))}")
+    trials = body.get('trials', 1)
+    if not isinstance(trials, int) or not 0 < trials <= MAX_TRIALS:
+        raise ValueError(f"trials must be an integer between 1 and {MAX_TRIALS}")
+    seed = body.get('seed')
+    if seed is not None and not isinstance(seed, int):
+        raise ValueError('seed must be an integer')
+    workers = body.get('workers')
+    if workers is not None and (not isinstance(workers, list)
+                                or not all(isinstance(w, int) and 0 < w <= (os.cpu_count() or 1) * 4
+                                           for w in workers)):
+        raise ValueError('workers must be a list of positive worker counts')
+    log = body.get('log')
+    if log is not None and not isinstance(log, str):
+        raise ValueError('log must be a username')
+    return {
+        'sizes': sizes,
+        'algorithms': algorithms,
+        'trials': trials,
+        'fast': fast,
+        'memory': bool(body.get('memory', False)),
+        'seed': seed,
+        'workers': workers,
+        'trace': bool(body.get('trace', False)),
+        'cache': bool(body.get('cache', True)),
+        'log': log
+    }
+
+
+def run_job(job, loop, trace_dir):
+    """Run a job on a worker thread; progress goes back to the event loop"""
+    spec = job.spec
+
+    def progress(done, total, result):
+        if job.cancel_requested:
+            raise JobCancelled()
+        loop.call_soon_threadsafe(job.progress, done, total, result)
+
+    # The result cache is SQLite, whose connections can't cross threads
+    cache = ResultCache() if spec['cache'] else None
+    try:
+        job_trace_dir = os.path.join(trace_dir, job.id) if spec['trace'] and trace_dir else None
+        runner = BenchmarkRunner(spec['algorithms'], spec['trials'], spec['memory'], spec['seed'], spec['fast'],
+                                 cache=cache, trace_dir=job_trace_dir, workers=spec['workers'])
+        results = runner.run(spec['sizes'], progress)
+    finally:
+        if cache:
+            cache.close()
+    for result in results:
+        # Traces are served by name, not by their path on this host
+        if result['trace_path']:
+            result['trace_path'] = f"/traces/{job.id}/{os.path.basename(result['trace_path'])}"
+    if spec['log']:
+        ResultLogger(spec['log']).log(results)
+    return results
+
+
+class ResponseCache:
+    """Time-limited LRU cache of computed responses.
+
+    Requests for a key that is being computed wait for that computation
+    instead of starting their own.
+    """
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL, max_entries=CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.pending = {}
+
+    async def get(self, key, compute):
+        """(value, cached) for `key`, computing it with the coroutine function `compute` if needed"""
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.entries.move_to_end(key)
+            return entry[1], True
+        if key in self.pending:
+            return await asyncio.shield(self.pending[key]), True
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark a failure as seen, so it isn't reported when nobody else waited
+        future.add_done_callback(lambda f: f.exception())
+        self.pending[key] = future
+        try:
+            value = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self.pending[key]
+        future.set_result(value)
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return value, False
+
+    def clear(self):
+        self.entries.clear()
+
+
+PERFORMANCE_STATS_QUERY = """
+    SELECT
+        sa.name,
+        pl.array_size,
+        pl.run_mode,
+        COUNT(*) AS runs,
+        AVG(pl.execution_time_ms) AS avg_time_ms,
+        MIN(pl.execution_time_ms) AS min_time_ms,
+        MAX(pl.execution_time_ms) AS max_time_ms,
+        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY pl.execution_time_ms) AS median_time_ms,
+        AVG(pl.peak_memory_kb) AS avg_peak_memory_kb
+    FROM performance_logs pl
+    JOIN sorting_algorithms sa ON pl.algorithm_id = sa.algorithm_id
+    {where}
+    GROUP BY sa.name, pl.array_size, pl.run_mode
+    ORDER BY sa.name, pl.array_size, pl.run_mode
+"""
+
+COMPARISON_STATS_QUERY = """
+    SELECT
+        wa.name AS winner,
+        COUNT(*) AS wins,
+        AVG(cl.p_value) AS avg_p_value,
+        AVG(cl.effect_size) AS avg_effect_size
+    FROM comparison_logs cl
+    JOIN sorting_algorithms la ON cl.left_algorithm_id = la.algorithm_id
+    JOIN sorting_algorithms ra ON cl.right_algorithm_id = ra.algorithm_id
+    LEFT JOIN sorting_algorithms wa ON cl.winner_algorithm_id = wa.algorithm_id
+    {where}
+    GROUP BY wa.name
+    ORDER BY wins DESC
+"""
+
+
+def stats_filters(query, time_column, algorithm_columns, run_mode_column=None):
+    """WHERE clause and parameters from the request's query string"""
+    conditions = []
+    params = []
+    for key, operator in (('since', '>='), ('until', '<')):
+        if key in query:
+            try:
+                params.append(datetime.fromisoformat(query[key]))
+            except ValueError:
+                raise ValueError(f"{key} must be an ISO date or date/time")
+            conditions.append(f"{time_column} {operator} %s")
+    if 'algorithm' in query:
+        names = query.getall('algorithm')
+        conditions.append('(' + ' OR '.join(f"{column} = ANY(%s)" for column in algorithm_columns) + ')')
+        params.extend([names] * len(algorithm_columns))
+    if run_mode_column and 'run_mode' in query:
+        conditions.append(f"{run_mode_column} = %s")
+        params.append(query['run_mode'])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return where, params
+
+
+class BenchmarkService:
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, queue_size=DEFAULT_QUEUE_SIZE, trace_dir=None,
+                 cache_ttl=DEFAULT_CACHE_TTL, use_database=True):
+        self.max_jobs = max_jobs
+        self.trace_dir = os.path.abspath(trace_dir) if trace_dir else None
+        self.use_database = use_database
+        self.jobs = OrderedDict()
+        # Cancelled jobs stay in the queue until a worker skips them, so the
+        # limit is checked against the jobs still waiting instead of qsize()
+        self.queue = asyncio.Queue()
+        self.queue_size = queue_size
+        self.queued = 0
+        self.executor = ThreadPoolExecutor(max_jobs, thread_name_prefix='benchmark-job')
+        self.workers = []
+        self.cache = ResponseCache(cache_ttl)
+        self.stats_slots = asyncio.Semaphore(STATS_CONCURRENCY)
+        self.db = None
+        self.async_db = None
+
+    def app(self):
+        app = web.Application(client_max_size=MAX_BODY_BYTES)
+        app.add_routes([
+            web.post('/jobs', self.submit_job),
+            web.get('/jobs', self.list_jobs),
+            web.get('/jobs/{id}', self.get_job),
+            web.get('/jobs/{id}/events', self.job_events),
+            web.delete('/jobs/{id}', self.cancel_job),
+            web.get('/stats/performance', self.performance_stats),
+            web.get('/stats/comparisons', self.comparison_stats),
+            web.get('/traces/{id}/{name}', self.download_trace),
+            web.get('/health', self.health)
+        ])
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.stop)
+        return app
+
+    async def start(self, app):
+        self.workers = [asyncio.create_task(self.work()) for _ in range(self.max_jobs)]
+        if not self.use_database:
+            return
+        try:
+            from async_connect import AsyncDatabaseConnection, psycopg
+            if psycopg is not None:
+                self.async_db = await AsyncDatabaseConnection(max_size=STATS_CONCURRENCY).open()
+                return
+        except Exception as e:
+            logging.error(f"Error opening async database connection: {e}")
+        from connect import DatabaseConnection
+        self.db = DatabaseConnection()
+
+    async def stop(self, app):
+        for worker in self.workers:
+            worker.cancel()
+        for job in self.jobs.values():
+            job.cancel_requested = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.async_db:
+            await self.async_db.close_all()
+
+    async def work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.cancel_requested:
+                    continue
+                self.queued -= 1
+                job.start()
+                try:
+                    results = await loop.run_in_executor(self.executor, run_job, job, loop, self.trace_dir)
+                    job.end('finished', results)
+                    if job.spec['log']:
+                        # New rows in performance_logs
+                        self.cache.clear()
+                except JobCancelled:
+                    job.end('cancelled')
+                except Exception as e:
+                    logging.error(f"Error running job {job.id}: {e}")
+                    job.end('failed', error=str(e))
+            finally:
+                self.queue.task_done()
+
+    def forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINAL_STATES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def job_or_404(self, request):
+        job = self.jobs.get(request.match_info['id'])
+        if job is None:
+            raise web.HTTPNotFound(text='{"error": "No such job"}', content_type='application/json')
+        return job
+
+    async def submit_job(self, request):
+        try:
+            spec = parse_job(await request.json())
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        if spec['trace'] and not self.trace_dir:
+            return web.json_response({'error': 'This service was started without --trace-dir'}, status=400)
+        if self.queued >= self.queue_size:
+            return web.json_response({'error': 'The job queue is full, retry later'}, status=429,
+                                     headers={'Retry-After': '10'})
+        job = Job(spec)
+        self.queue.put_nowait(job)
+        self.queued += 1
+        self.jobs[job.id] = job
+        self.forget_old_jobs()
+        return web.json_response(job.snapshot(), status=202, headers={'Location': f"/jobs/{job.id}"})
+
+    async def list_jobs(self, request):
+        return web.json_response([job.snapshot() for job in reversed(self.jobs.values())])
+
+    async def get_job(self, request):
+        return web.json_response(self.job_or_404(request).snapshot(detail=True))
+
+    async def job_events(self, request):
+        job = self.job_or_404(request)
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        listener = asyncio.Queue()
+        job.listeners.add(listener)
+        try:
+            snapshot = job.snapshot()
+            while True:
+                await response.write((json.dumps(snapshot) + '\n').encode())
+                if snapshot['status'] in FINAL_STATES:
+                    break
+                snapshot = await listener.get()
+        finally:
+            job.listeners.discard(listener)
+        await response.write_eof()
+        return response
+
+    async def cancel_job(self, request):
+        job = self.job_or_404(request)
+        if job.status in FINAL_STATES:
+            return web.json_response({'error': f"Job already {job.status}"}, status=409)
+        job.cancel_requested = True
+        if job.status == 'queued':
+            # Skipped by the worker when it comes off the queue, but frees its slot now
+            self.queued -= 1
+            job.end('cancelled')
+        return web.json_response(job.snapshot(), status=202)
+
+    async def query(self, sql, params):
+        """Rows of a stats query, with at most STATS_CONCURRENCY running at once"""
+        if not self.use_database:
+            raise web.HTTPServiceUnavailable(text='{"error": "Started without a database"}',
+                                             content_type='application/json')
+        async with self.stats_slots:
+            if self.async_db:
+                return await self.async_db.execute_query(sql, params)
+            return await asyncio.get_running_loop().run_in_executor(None, self.db.execute_query, sql, params)
+
+    async def cached_stats(self, request, compute):
+        try:
+            value, cached = await self.cache.get(request.path_qs, compute)
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        return web.json_response(value, headers={'X-Cache': 'hit' if cached else 'miss'})
+
+    async def performance_stats(self, request):
+        async def compute():
+            where, params = stats_filters(request.query, 'pl.timestamp', ['sa.name'], 'pl.run_mode')
+            rows = await self.query(PERFORMANCE_STATS_QUERY.format(where=where), params)
+            columns = ['algorithm', 'array_size', 'run_mode', 'runs', 'avg_time_ms', 'min_time_ms',
+                       'max_time_ms', 'median_time_ms', 'avg_peak_memory_kb']
+            return [dict(zip(columns, row)) for row in rows or []]
+        return await self.cached_stats(request, compute)
+
+    async def comparison_stats(self, request):
+        async def compute():
+            where, params = stats_filters(request.query, 'cl.timestamp', ['la.name', 'ra.name'])
+            rows = await self.query(COMPARISON_STATS_QUERY.format(where=where), params)
+            columns = ['winner', 'wins', 'avg_p_value', 'avg_effect_size']
+            # A NULL winner groups the comparisons without a significant difference
+            return [dict(zip(columns, row)) for row in rows or []]
+        return await self.cached_stats(request, compute)
+
+    async def download_trace(self, request):
+        name = request.match_info['name']
+        job_id = request.match_info['id']
+        if not self.trace_dir or os.sep in name or name.startswith('.') or job_id not in self.jobs:
+            raise web.HTTPNotFound()
+        path = os.path.join(self.trace_dir, job_id, name)
+        if not os.path.isfile(path):
+            raise web.HTTPNotFound()
+        return web.FileResponse(path, headers={'Content-Type': 'application/octet-stream'})
+
+    async def health(self, request):
+        running = sum(1 for job in self.jobs.values() if job.status == 'running')
+        return web.json_response({
+            'queued': self.queued,
+            'running': running,
+            'max_jobs': self.max_jobs,
+            'queue_size': self.queue_size,
+            'database': 'async' if self.async_db else 'sync' if self.db else None
+        })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local HTTP/JSON service for benchmarks and statistics')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-jobs', type=int, default=DEFAULT_MAX_JOBS,
+                        help='Jobs run at once; more than one skews the timings (default: %(default)s)')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='Jobs that can wait before submissions are refused')
+    parser.add_argument('--trace-dir', help='Directory for traces recorded by jobs (enables "trace": true)')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL,
+                        help='Seconds a stats response is reused')
+    parser.add_argument('--no-db', action='store_true', help='Run jobs only, without the stats endpoints')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if web is None:
+        parser.error('the service needs aiohttp (pip install aiohttp)')
+    load_plugins()
+
+    async def make_app():
+        # The service's queue and semaphore belong to the loop that runs the app
+        service = BenchmarkService(args.max_jobs, args.queue_size, args.trace_dir, args.cache_ttl, not args.no_db)
+        return service.app()
+    web.run_app(make_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Chunked binary trace files for recording and replaying sort runs.
+
+A trace stores every write an algorithm makes to its array, so a run can be
+replayed (or scrubbed to any step) without re-running the generator and
+without keeping the steps in memory. Layout, all little-endian:
+
+    header    magic, version, array length, keyframe interval
+    chunk 0   keyframe (the full array before step 0) + write records
+    chunk 1   keyframe (the full array before step K) + write records
+    ...
+    index     (first step, file offset) of every chunk
+    trailer   index offset, chunk count, total steps, end magic
+
+A write record is a fixed-width (index, value) pair; a record with index
+STEP_MARK closes a step. A new chunk starts every `keyframe_interval` steps,
+so seeking to step s means jumping straight to chunk s // K, copying its
+keyframe and applying at most K steps of records.
+
+Files are written with buffered streaming I/O and read through mmap, so both
+recording and playback use constant memory however long the run is.
+"""
+import mmap
+import struct
+from array import array
+
+from algorithms import WRITE
+
+MAGIC = b'SVTRACE1'
+END_MAGIC = b'SVTREND1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQ')       # magic, version, array length, keyframe interval
+RECORD = struct.Struct('<Iq')          # array index, new value
+INDEX_ENTRY = struct.Struct('<QQ')     # first step of the chunk, file offset of its keyframe
+TRAILER = struct.Struct('<QQQ8s')      # index offset, chunk count, total steps, end magic
+STEP_MARK = 0xFFFFFFFF
+DEFAULT_KEYFRAME_INTERVAL = 4096
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+class TraceWriter:
+    """Streams a trace to disk; use as a context manager so the index gets written"""
+
+    def __init__(self, path, initial, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.path = path
+        self.n = len(initial)
+        self.keyframe_interval = keyframe_interval
+        self.total_steps = 0
+        self.index = []
+        self.buffer = bytearray()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.n, keyframe_interval))
+        self.offset = HEADER.size
+        self.write_keyframe(initial)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _append(self, data):
+        self.buffer += data
+        self.offset += len(data)
+        if len(self.buffer) >= WRITE_BUFFER_SIZE:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def write_keyframe(self, arr):
+        self.index.append((self.total_steps, self.offset))
+        self._append(array('q', arr).tobytes())
+
+    def record_write(self, index, value):
+        self._append(RECORD.pack(index, value))
+
+    def end_step(self, arr):
+        """Close the current step; `arr` is the array after it, used for keyframes"""
+        self._append(RECORD.pack(STEP_MARK, 0))
+        self.total_steps += 1
+        if self.total_steps % self.keyframe_interval == 0:
+            self.write_keyframe(arr)
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.offset
+        for first_step, offset in self.index:
+            self._append(INDEX_ENTRY.pack(first_step, offset))
+        self._append(TRAILER.pack(index_offset, len(self.index), self.total_steps, END_MAGIC))
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.close()
+
+
+class TracedList(list):
+    """A list that reports every element assignment to a TraceWriter"""
+
+    def __init__(self, data, writer):
+        super().__init__(data)
+        self.writer = writer
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        if isinstance(index, slice):
+            for i in range(*index.indices(len(self))):
+                self.writer.record_write(i, super().__getitem__(i))
+        else:
+            self.writer.record_write(index % len(self), value)
+
+
+def record_trace(algorithm, data, path, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+    """Run the visual generator `algorithm` on a copy of `data`, writing its trace to `path`.
+
+    Returns the number of steps recorded.
+    """
+    with TraceWriter(path, data, keyframe_interval) as writer:
+        arr = TracedList(data, writer)
+        for _ in algorithm(arr):
+            writer.end_step(arr)
+        # Writes after the last yield still belong to the run
+        writer.end_step(arr)
+    return writer.total_steps
+
+
+class TraceReader:
+    """Replays a trace file through mmap, keeping only the current array in memory"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, self.keyframe_interval = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a sort trace file: {path}")
+        index_offset, self.chunk_count, self.total_steps, end_magic = TRAILER.unpack_from(
+            self.mm, len(self.mm) - TRAILER.size)
+        if end_magic != END_MAGIC:
+            raise ValueError(f"Trace file is incomplete: {path}")
+        self.index_offset = index_offset
+        self.keyframe_size = self.n * array('q').itemsize
+        self.step = 0
+        self.position = 0
+        self.seek(0)
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+    def chunk(self, k):
+        """(first step, keyframe offset) of chunk k"""
+        return INDEX_ENTRY.unpack_from(self.mm, self.index_offset + k * INDEX_ENTRY.size)
+
+    def keyframe(self, k):
+        """The full array at the start of chunk k"""
+        _, offset = self.chunk(k)
+        values = array('q')
+        values.frombytes(self.mm[offset:offset + self.keyframe_size])
+        return values
+
+    def seek(self, step, arr=None):
+        """Move to just before `step` and return the array at that point.
+
+        If `arr` is given it is updated in place, otherwise a new list is returned.
+        """
+        step = max(0, min(step, self.total_steps))
+        k = min(step // self.keyframe_interval, self.chunk_count - 1)
+        first_step, offset = self.chunk(k)
+        values = self.keyframe(k)
+        if arr is None:
+            arr = values.tolist()
+        else:
+            arr[:] = values
+        self.step = first_step
+        self.position = offset + self.keyframe_size
+        while self.step < step:
+            self.advance(arr)
+        return arr
+
+    def advance(self, arr):
+        """Apply the writes of the next step to `arr`; returns the indices written"""
+        written = []
+        mm = self.mm
+        position = self.position
+        while True:
+            index, value = RECORD.unpack_from(mm, position)
+            position += RECORD.size
+            if index == STEP_MARK:
+                break
+            arr[index] = value
+            written.append(index)
+        self.step += 1
+        # A keyframe follows the last step of every full chunk
+        if self.step % self.keyframe_interval == 0 and self.step < self.total_steps:
+            position += self.keyframe_size
+        self.position = position
+        return written
+
+    def replay(self, arr):
+        """Generator that plays the trace forward from the current step.
+
+        Yields a WRITE event per step, like the visual generators, spanning
+        the first and last index the step wrote (None if it wrote nothing).
+        """
+        while self.step < self.total_steps:
+            written = self.advance(arr)
+            yield (WRITE, written[0], written[-1]) if written else None
@@ -2,19 +2,30 @@ import sys
 import random
 import hashlib
 import os
+import threading
 from datetime import datetime
 import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                             QMessageBox, QStackedWidget, QDialog, QSlider,
                             QColorDialog, QFormLayout, QComboBox, QFrame,
-                            QTextEdit, QScrollArea)
-from PyQt5.QtCore import Qt, QTimer, QTime
+                            QTextEdit, QScrollArea, QCheckBox, QFileDialog,
+                            QListView)
+from PyQt5.QtCore import Qt, QTimer, QTime, QAbstractListModel, QModelIndex, pyqtSignal
 from PyQt5.QtGui import QPainter, QColor, QFont
 
 # Add the backend directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 from connect import DatabaseConnection
+from async_connect import BackgroundDatabase, psycopg
+from algorithms import ALGORITHMS, BASELINE_ALGORITHM, sync_catalog, load_plugins
+from benchmark import time_fast, file_slug
+from comparison import compare_algorithms
+from result_cache import ResultCache
+from profiling import MemoryProfiler, CallProfiler, DEFAULT_PROFILE_DIR
+from metrics import VisualizerMetrics, format_metrics
+from sort_trace import TraceReader
+from render import rasterize, make_palette, to_qimage, event_highlights, BAR, COMPLETE, np
 import logging
 
 # Constants
@@ -22,8 +33,62 @@ WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 700
 ARR_SIZE = 100
 RECT_WIDTH = 10
+# Positions of the trace scrub slider
+SCRUB_RESOLUTION = 1000
 LOGIN_WIDTH = 500
 LOGIN_HEIGHT = 400
+# Feedback entries fetched per page in the feedback dialog
+FEEDBACK_PAGE_SIZE = 50
+# Delay after the last keystroke before the feedback search runs
+SEARCH_DEBOUNCE_MS = 300
+# Delay after the speed slider stops before the settings are saved
+SETTINGS_SAVE_DEBOUNCE_MS = 500
+
+# Shared async connection for background queries (see background_database)
+_background_db = None
+_background_db_failed = False
+_background_db_lock = threading.Lock()
+
+
+def background_database():
+    """The shared BackgroundDatabase, or None if psycopg 3 is missing or it couldn't connect.
+
+    Never waits for the database: the first call starts opening the pool in
+    the background, and queries made meanwhile wait for it on the loop.
+    """
+    global _background_db, _background_db_failed
+    if psycopg is None:
+        return None
+    with _background_db_lock:
+        if _background_db is not None and _background_db.failed:
+            # Callers fall back to DatabaseConnection on a thread
+            logging.error(f"Error opening background database connection: {_background_db.opened.exception()}")
+            _background_db.close()
+            _background_db = None
+            _background_db_failed = True
+        if _background_db is None and not _background_db_failed:
+            _background_db = BackgroundDatabase()
+        return _background_db
+
+
+def close_background_database():
+    global _background_db
+    with _background_db_lock:
+        if _background_db is not None:
+            _background_db.close()
+            _background_db = None
+
+class Session:
+    """The logged-in user, created by UserSystem.verify_user.
+
+    Holds the user id and settings, so the subsystems don't look the user up
+    again for every action.
+    """
+
+    def __init__(self, user_id, username, settings):
+        self.user_id = user_id
+        self.username = username
+        self.settings = settings
 
 class UserSystem:
     def __init__(self):
@@ -47,23 +112,35 @@ class UserSystem:
             return False
     
     def verify_user(self, username, password):
+        """Session of the user if the password is right, otherwise None"""
         try:
-            # Get user's password hash
-            query = "SELECT password_hash FROM users WHERE username = %s"
+            # Password hash, user id and saved settings in one round trip
+            query = """
+                SELECT u.password_hash, u.id, s.default_color, s.complete_color, s.animation_speed
+                FROM users u
+                LEFT JOIN user_settings s ON s.user_id = u.id
+                WHERE u.username = %s
+            """
             result = self.db.execute_query(query, (username,))
             
             if not result:
-                return False
+                return None
             
             # Verify password
+            password_hash, user_id, *saved = result[0]
             hashed = hashlib.sha256(password.encode()).hexdigest()
-            return result[0][0] == hashed
+            if password_hash != hashed:
+                return None
+            return Session(user_id, username, Settings(username, user_id, saved))
         except Exception as e:
             logging.error(f"Error verifying user: {e}")
-            return False
+            return None
 
 class LoggingSystem:
-    def __init__(self):
+    def __init__(self, session=None):
+        self.session = session
+        # Algorithm ids don't change while the app runs
+        self.algorithm_ids = {}
         try:
             self.db = DatabaseConnection()
         except Exception as e:
@@ -71,6 +148,8 @@ class LoggingSystem:
             raise
     
     def get_user_id(self, username):
+        if self.session and self.session.username == username:
+            return self.session.user_id
         try:
             query = "SELECT id FROM users WHERE username = %s"
             result = self.db.execute_query(query, (username,))
@@ -82,60 +161,79 @@ class LoggingSystem:
             return None
     
     def get_algorithm_id(self, algorithm_name):
+        if algorithm_name in self.algorithm_ids:
+            return self.algorithm_ids[algorithm_name]
         try:
             query = "SELECT algorithm_id FROM sorting_algorithms WHERE name = %s"
             result = self.db.execute_query(query, (algorithm_name,))
             if result:
+                self.algorithm_ids[algorithm_name] = result[0][0]
                 return result[0][0]
             return None
         except Exception as e:
             logging.error(f"Error getting algorithm ID: {e}")
             return None
     
-    def add_log(self, username, left_algo, right_algo, time1, time2, array_data):
+    def add_log(self, username, left_algo, right_algo, time1, time2, array_data, memory1=None, memory2=None,
+                comparison=None, profile1=None, profile2=None):
         try:
             # Get user ID
             user_id = self.get_user_id(username)
             if not user_id:
                 logging.error(f"User ID not found for username: {username}")
-                return
+                return False
             
             # Get algorithm IDs
             left_algo_id = self.get_algorithm_id(left_algo)
             right_algo_id = self.get_algorithm_id(right_algo)
             if not left_algo_id or not right_algo_id:
                 logging.error(f"Algorithm ID not found for one or both algorithms: {left_algo}, {right_algo}")
-                return
+                return False
             
-            # Determine winner algorithm ID
-            winner_algo_id = left_algo_id if time1 < time2 else right_algo_id
+            # Winner comes from the significance test; None means no significant difference
+            comparison = comparison or {}
+            winner_algo_id = {'left': left_algo_id, 'right': right_algo_id}.get(comparison.get('winner'))
             
             # Add to comparison logs
             comparison_query = """
                 INSERT INTO comparison_logs 
-                (user_id, left_algorithm_id, right_algorithm_id, array_size, winner_algorithm_id)
-                VALUES (%s, %s, %s, %s, %s)
+                (user_id, left_algorithm_id, right_algorithm_id, array_size, winner_algorithm_id,
+                 trials, p_value, effect_size)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """
             comparison_params = (
                 user_id,
                 left_algo_id,
                 right_algo_id,
                 len(array_data),
-                winner_algo_id
+                winner_algo_id,
+                comparison.get('trials'),
+                comparison.get('p_value'),
+                comparison.get('effect_size')
             )
             self.db.execute_query(comparison_query, comparison_params)
             
             # Add to performance logs
             performance_query = """
                 INSERT INTO performance_logs 
-                (user_id, algorithm_id, execution_time_ms, array_size, array_data)
-                VALUES (%s, %s, %s, %s, %s)
+                (user_id, algorithm_id, execution_time_ms, array_size, array_data,
+                 peak_memory_kb, peak_blocks, rss_delta_kb, profile_path)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             """
+            memory1 = memory1 or {}
+            memory2 = memory2 or {}
+            profile1 = profile1 or {}
+            profile2 = profile2 or {}
             performance_params = [
-                (user_id, left_algo_id, time1, len(array_data), str(array_data)),
-                (user_id, right_algo_id, time2, len(array_data), str(array_data))
+                (user_id, left_algo_id, time1, len(array_data), str(array_data),
+                 memory1.get('peak_memory_kb'), memory1.get('peak_blocks'), memory1.get('rss_delta_kb'),
+                 profile1.get('profile_path')),
+                (user_id, right_algo_id, time2, len(array_data), str(array_data),
+                 memory2.get('peak_memory_kb'), memory2.get('peak_blocks'), memory2.get('rss_delta_kb'),
+                 profile2.get('profile_path'))
             ]
             self.db.execute_many(performance_query, performance_params)
+            return True
         except Exception as e:
             logging.error(f"Error adding log: {e}")
             raise
@@ -145,11 +243,12 @@ class LoggingSystem:
         try:
             query = """
                 SELECT 
-                    COUNT(*) as total_comparisons,
+                    SUM(COUNT(*)) OVER () as total_comparisons,
                     sa.name as winner,
-                    COUNT(*) as win_count
+                    COUNT(*) as win_count,
+                    AVG(cl.p_value) as avg_p_value
                 FROM comparison_logs cl
-                JOIN sorting_algorithms sa ON cl.winner_algorithm_id = sa.algorithm_id
+                LEFT JOIN sorting_algorithms sa ON cl.winner_algorithm_id = sa.algorithm_id
                 GROUP BY sa.name
                 ORDER BY win_count DESC
             """
@@ -163,8 +262,13 @@ class LoggingSystem:
             stats.append(f"Total comparisons: {results[0][0]}")
             
             stats.append("\nAlgorithm Win Counts:")
-            for _, algo, count in results:
-                stats.append(f"{algo}: {count} wins")
+            for _, algo, count, avg_p_value in results:
+                if algo is None:
+                    stats.append(f"No significant difference: {count}")
+                elif avg_p_value is not None:
+                    stats.append(f"{algo}: {count} wins (mean p = {avg_p_value:.3f})")
+                else:
+                    stats.append(f"{algo}: {count} wins")
             
             return "\n".join(stats)
         except Exception as e:
@@ -174,19 +278,33 @@ class LoggingSystem:
     def get_performance_stats(self):
         """Get statistics about algorithm performance"""
         try:
+            # Benchmark timings are compared with the native baseline at the same
+            # array size; animated GUI timings include the timer delay, so they get no ratio
             query = """
+                WITH baseline AS (
+                    SELECT pl.array_size, AVG(pl.execution_time_ms) as baseline_time
+                    FROM performance_logs pl
+                    JOIN sorting_algorithms sa ON pl.algorithm_id = sa.algorithm_id
+                    WHERE sa.name = %s
+                    GROUP BY pl.array_size
+                )
                 SELECT 
                     sa.name as algorithm,
+                    pl.run_mode,
                     AVG(pl.execution_time_ms) as avg_time,
                     MIN(pl.execution_time_ms) as min_time,
                     MAX(pl.execution_time_ms) as max_time,
-                    COUNT(*) as total_runs
+                    COUNT(*) as total_runs,
+                    AVG(pl.peak_memory_kb) as avg_peak_memory,
+                    AVG(pl.execution_time_ms / NULLIF(b.baseline_time, 0))
+                        FILTER (WHERE pl.run_mode <> 'visual') as baseline_ratio
                 FROM performance_logs pl
                 JOIN sorting_algorithms sa ON pl.algorithm_id = sa.algorithm_id
-                GROUP BY sa.name
-                ORDER BY avg_time
+                LEFT JOIN baseline b ON b.array_size = pl.array_size
+                GROUP BY sa.name, pl.run_mode
+                ORDER BY pl.run_mode, avg_time
             """
-            results = self.db.execute_query(query)
+            results = self.db.execute_query(query, (BASELINE_ALGORITHM,))
             
             if not results:
                 return "No performance data available"
@@ -195,12 +313,17 @@ class LoggingSystem:
             stats.append("Performance Statistics:")
             stats.append("\nAlgorithm Performance (in milliseconds):")
             
-            for algo, avg_time, min_time, max_time, total_runs in results:
-                stats.append(f"\n{algo}:")
+            for (algo, run_mode, avg_time, min_time, max_time, total_runs,
+                 avg_peak_memory, baseline_ratio) in results:
+                stats.append(f"\n{algo} ({run_mode}):")
                 stats.append(f"  Average time: {avg_time:.2f}ms")
                 stats.append(f"  Best time: {min_time:.2f}ms")
                 stats.append(f"  Worst time: {max_time:.2f}ms")
                 stats.append(f"  Total runs: {total_runs}")
+                if avg_peak_memory is not None:
+                    stats.append(f"  Average peak memory: {avg_peak_memory:.1f}KB")
+                if baseline_ratio is not None:
+                    stats.append(f"  vs {BASELINE_ALGORITHM}: {baseline_ratio:.1f}x")
             
             return "\n".join(stats)
         except Exception as e:
@@ -208,7 +331,8 @@ class LoggingSystem:
             return "Error retrieving performance statistics"
 
 class FeedbackSystem:
-    def __init__(self):
+    def __init__(self, session=None):
+        self.session = session
         try:
             self.db = DatabaseConnection()
         except Exception as e:
@@ -216,6 +340,8 @@ class FeedbackSystem:
             raise
     
     def get_user_id(self, username):
+        if self.session and self.session.username == username:
+            return self.session.user_id
         try:
             query = "SELECT id FROM users WHERE username = %s"
             result = self.db.execute_query(query, (username,))
@@ -245,34 +371,164 @@ class FeedbackSystem:
             logging.error(f"Error adding feedback: {e}")
             return False
     
+    def get_feedback_page(self, before=None, limit=FEEDBACK_PAGE_SIZE, search=None):
+        """One page of feedback, newest first, as (id, username, message, timestamp) rows.
+
+        `before` is the (timestamp, id) of the last row of the previous page;
+        the next page continues from there using the (timestamp, id) index
+        instead of an OFFSET. `search` is matched with full-text search.
+        Returns None on error.
+        """
+        try:
+            query, params = self.feedback_page_query(before, limit, search)
+            return self.db.execute_query(query, params) or []
+        except Exception as e:
+            logging.error(f"Error getting feedback: {e}")
+            return None
+
+    def feedback_page_query(self, before=None, limit=FEEDBACK_PAGE_SIZE, search=None):
+        """The query and parameters of get_feedback_page"""
+        conditions = []
+        params = []
+        if before is not None:
+            conditions.append("(uf.timestamp, uf.id) < (%s, %s)")
+            params.extend(before)
+        if search:
+            conditions.append("to_tsvector('english', uf.message) @@ websearch_to_tsquery('english', %s)")
+            params.append(search)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+            SELECT
+                uf.id,
+                u.username,
+                uf.message,
+                uf.timestamp
+            FROM user_feedback uf
+            JOIN users u ON uf.user_id = u.id
+            {where}
+            ORDER BY uf.timestamp DESC, uf.id DESC
+            LIMIT %s
+        """
+        params.append(limit)
+        return query, tuple(params)
+
     def get_feedback(self, limit=50):
         """Get recent feedback with user information"""
+        results = self.get_feedback_page(limit=limit)
+        if results is None:
+            return "Error retrieving feedback"
+        if not results:
+            return "No feedback available"
+
+        feedback = []
+        feedback.append("Recent Feedback:")
+        for _, username, message, timestamp in results:
+            feedback.append(f"\n{username} ({timestamp}):")
+            feedback.append(f"{message}")
+
+        return "\n".join(feedback)
+
+
+class FeedbackListModel(QAbstractListModel):
+    """Feedback entries for a list view, fetched a page at a time as it scrolls.
+
+    Pages are queried in the background so scrolling never waits for the
+    database: on the shared async connection (background_database) when
+    psycopg 3 is installed, otherwise with DatabaseConnection on a thread. The
+    rows arrive through page_loaded, a queued signal.
+    """
+    page_loaded = pyqtSignal(object, int)
+    status_changed = pyqtSignal(str)
+
+    def __init__(self, feedback_system, page_size=FEEDBACK_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.feedback_system = feedback_system
+        self.page_size = page_size
+        self.entries = []
+        self.search = None
+        self.exhausted = False
+        self.loading = False
+        # Bumped on every reset so pages of an earlier search are dropped
+        self.generation = 0
+        self.page_loaded.connect(self.append_page)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        _, username, message, timestamp = self.entries[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{username} ({timestamp:%Y-%m-%d %H:%M}):\n{message}"
+        if role == Qt.ToolTipRole:
+            return message
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.loading or self.exhausted:
+            return
+        self.loading = True
+        self.status_changed.emit('Loading...')
+        before = None
+        if self.entries:
+            last_id, _, _, last_timestamp = self.entries[-1]
+            before = (last_timestamp, last_id)
+        background = background_database()
+        if background is None:
+            threading.Thread(target=self.load_page, args=(before, self.search, self.generation),
+                             daemon=True).start()
+            return
+        query, params = self.feedback_system.feedback_page_query(before, self.page_size, self.search)
+        generation = self.generation
+        # The callback runs on the event loop's thread; the signal queues the rows to the GUI thread
+        background.execute_query(query, params).add_done_callback(
+            lambda future: self.page_loaded.emit(self.page_result(future), generation))
+
+    def load_page(self, before, search, generation):
+        rows = self.feedback_system.get_feedback_page(before, self.page_size, search)
+        self.page_loaded.emit(rows, generation)
+
+    def page_result(self, future):
+        """Rows of a finished background query, None if it failed"""
         try:
-            query = """
-                SELECT 
-                    u.username,
-                    uf.message,
-                    uf.timestamp
-                FROM user_feedback uf
-                JOIN users u ON uf.user_id = u.id
-                ORDER BY uf.timestamp DESC
-                LIMIT %s
-            """
-            results = self.db.execute_query(query, (limit,))
-            
-            if not results:
-                return "No feedback available"
-            
-            feedback = []
-            feedback.append("Recent Feedback:")
-            for username, message, timestamp in results:
-                feedback.append(f"\n{username} ({timestamp}):")
-                feedback.append(f"{message}")
-            
-            return "\n".join(feedback)
+            return future.result() or []
         except Exception as e:
             logging.error(f"Error getting feedback: {e}")
-            return "Error retrieving feedback"
+            return None
+
+    def append_page(self, rows, generation):
+        if generation != self.generation:
+            return
+        self.loading = False
+        if rows is None:
+            self.exhausted = True
+            self.status_changed.emit('Error retrieving feedback')
+            return
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.entries), len(self.entries) + len(rows) - 1)
+            self.entries.extend(rows)
+            self.endInsertRows()
+        self.exhausted = len(rows) < self.page_size
+        if not self.entries:
+            self.status_changed.emit('No feedback available')
+        else:
+            more = '' if self.exhausted else ', scroll for more'
+            self.status_changed.emit(f"{len(self.entries)} entries{more}")
+
+    def set_search(self, search):
+        """Start over with only the feedback matching `search` (None for all)"""
+        self.beginResetModel()
+        self.entries = []
+        self.search = search or None
+        self.exhausted = False
+        self.loading = False
+        self.generation += 1
+        self.endResetModel()
+        self.fetchMore()
 
 class LoginWindow(QWidget):
     def __init__(self, main_window):
@@ -407,7 +663,9 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, 'Error', 'Please enter both username and password')
             return
             
-        if self.user_system.verify_user(username, password):
+        session = self.user_system.verify_user(username, password)
+        if session:
+            self.main_window.session = session
             self.main_window.current_user = username
             self.main_window.show_sorting_visualizer()
         else:
@@ -431,93 +689,93 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, 'Error', 'Username already exists')
 
 class Settings:
-    def __init__(self, username=None):
+    def __init__(self, username=None, user_id=None, saved=None):
+        """Settings of `username`, loaded from the database unless the caller
+        already has the user id and the saved (default_color, complete_color,
+        animation_speed) row, all None if the user never saved any"""
         self.username = username
-        self.user_id = None
+        self.user_id = user_id
+        self.reset_to_defaults()
+        self.db = DatabaseConnection()
+        if user_id is None:
+            self.load_user_settings()
+        elif saved:
+            self.apply_saved(*saved)
+
+    def reset_to_defaults(self):
         self.default_color = QColor(170, 183, 184)  # Default bar color
         self.complete_color = QColor(100, 180, 100)  # Color when sorting is complete
         self.animation_speed = 1  # Speed multiplier (1-10)
-        self.db = DatabaseConnection()
-        if username:
-            self.get_user_id()
-        self.load_user_settings()
-    
-    def get_user_id(self):
-        try:
-            query = "SELECT id FROM users WHERE username = %s"
-            result = self.db.execute_query(query, (self.username,))
-            if result:
-                self.user_id = result[0][0]
-        except Exception as e:
-            logging.error(f"Error getting user ID: {e}")
-            self.user_id = None
-        
+        self.saved_values = None
+
+    def values(self):
+        return (self.default_color.name(), self.complete_color.name(), self.animation_speed)
+
+    def is_dirty(self):
+        """Whether the settings changed since they were last loaded or saved"""
+        return self.values() != self.saved_values
+
     def save_settings(self):
+        """Write the settings back, only if they changed"""
+        if not self.user_id or not self.is_dirty():
+            return
         try:
-            if self.user_id:
-                # Check if user settings exist
-                check_query = "SELECT id FROM user_settings WHERE user_id = %s"
-                result = self.db.execute_query(check_query, (self.user_id,))
-                
-                if result:
-                    # Update existing settings
-                    update_query = """
-                        UPDATE user_settings 
-                        SET default_color = %s, complete_color = %s, animation_speed = %s
-                        WHERE user_id = %s
-                    """
-                    self.db.execute_query(update_query, (
-                        self.default_color.name(),
-                        self.complete_color.name(),
-                        self.animation_speed,
-                        self.user_id
-                    ))
-                else:
-                    # Insert new settings
-                    insert_query = """
-                        INSERT INTO user_settings (user_id, default_color, complete_color, animation_speed)
-                        VALUES (%s, %s, %s, %s)
-                    """
-                    self.db.execute_query(insert_query, (
-                        self.user_id,
-                        self.default_color.name(),
-                        self.complete_color.name(),
-                        self.animation_speed
-                    ))
+            query = """
+                INSERT INTO user_settings (user_id, default_color, complete_color, animation_speed)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (user_id) DO UPDATE
+                SET default_color = EXCLUDED.default_color,
+                    complete_color = EXCLUDED.complete_color,
+                    animation_speed = EXCLUDED.animation_speed,
+                    updated_at = CURRENT_TIMESTAMP
+            """
+            values = self.values()
+            self.db.execute_query(query, (self.user_id,) + values)
+            self.saved_values = values
         except Exception as e:
             logging.error(f"Error saving settings: {e}")
             raise
-    
+
+    def apply_values(self, default_color, complete_color, animation_speed):
+        self.default_color = QColor(default_color)
+        self.complete_color = QColor(complete_color)
+        self.animation_speed = int(animation_speed)
+
+    def apply_saved(self, default_color, complete_color, animation_speed):
+        if default_color is None:
+            return
+        self.apply_values(default_color, complete_color, animation_speed)
+        self.saved_values = self.values()
+
     def load_user_settings(self):
+        """Look up the user id and the saved settings in one query"""
+        if not self.username:
+            return
         try:
-            if self.user_id:
-                query = """
-                    SELECT default_color, complete_color, animation_speed
-                    FROM user_settings
-                    WHERE user_id = %s
-                """
-                result = self.db.execute_query(query, (self.user_id,))
-                
-                if result:
-                    self.default_color = QColor(result[0][0])
-                    self.complete_color = QColor(result[0][1])
-                    self.animation_speed = int(result[0][2])
-                else:
-                    # Reset to defaults if no settings found for user
-                    self.default_color = QColor(170, 183, 184)
-                    self.complete_color = QColor(100, 180, 100)
-                    self.animation_speed = 1
+            query = """
+                SELECT u.id, s.default_color, s.complete_color, s.animation_speed
+                FROM users u
+                LEFT JOIN user_settings s ON s.user_id = u.id
+                WHERE u.username = %s
+            """
+            result = self.db.execute_query(query, (self.username,))
+            if not result:
+                return
+            self.user_id, *saved = result[0]
+            self.apply_saved(*saved)
         except Exception as e:
             logging.error(f"Error loading settings: {e}")
             # Use defaults if there's an error
-            self.default_color = QColor(170, 183, 184)
-            self.complete_color = QColor(100, 180, 100)
-            self.animation_speed = 1
+            self.reset_to_defaults()
 
 class SettingsDialog(QDialog):
     def __init__(self, settings, parent=None):
         super().__init__(parent)
         self.settings = settings
+        # Restored on Cancel
+        self.loaded_values = settings.values()
+        # Whether a debounced save has written a value since the dialog opened
+        self.autosaved = False
         self.init_ui()
         
     def init_ui(self):
@@ -542,6 +800,10 @@ class SettingsDialog(QDialog):
         self.speed_slider.setMaximum(10)
         self.speed_slider.setValue(self.settings.animation_speed)
         self.speed_slider.valueChanged.connect(self.update_speed)
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SETTINGS_SAVE_DEBOUNCE_MS)
+        self.save_timer.timeout.connect(self.autosave)
         
         # Speed value label
         self.speed_label = QLabel(f"Speed: {self.settings.animation_speed}x")
@@ -573,10 +835,28 @@ class SettingsDialog(QDialog):
     def update_speed(self, value):
         self.settings.animation_speed = value
         self.speed_label.setText(f"Speed: {value}x")
+        # Save once the slider comes to rest, not for every value it passes
+        self.save_timer.start()
+    
+    def autosave(self):
+        if self.settings.is_dirty():
+            self.settings.save_settings()
+            self.autosaved = True
     
     def save_and_close(self):
+        self.save_timer.stop()
         self.settings.save_settings()
         self.accept()
+    
+    def reject(self):
+        """Cancel: drop a pending save and put back the values the dialog opened with"""
+        self.save_timer.stop()
+        self.settings.apply_values(*self.loaded_values)
+        # Only write if a debounced save stored a cancelled value; a user
+        # without saved settings would otherwise get a row for nothing
+        if self.autosaved:
+            self.settings.save_settings()
+        super().reject()
 
 class FeedbackDialog(QDialog):
     def __init__(self, feedback_system, username, parent=None):
@@ -587,7 +867,7 @@ class FeedbackDialog(QDialog):
         
     def init_ui(self):
         self.setWindowTitle('Submit Feedback')
-        self.setFixedSize(500, 400)
+        self.setFixedSize(500, 650)
         
         layout = QVBoxLayout()
         
@@ -656,7 +936,38 @@ class FeedbackDialog(QDialog):
         button_layout.addWidget(cancel_btn)
         
         layout.addLayout(button_layout)
+        
+        # Recent feedback, loaded a page at a time as the list is scrolled
+        recent_label = QLabel('Recent Feedback:')
+        recent_label.setFont(QFont('Arial', 10))
+        layout.addWidget(recent_label)
+        
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('Search feedback...')
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_feedback)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        layout.addWidget(self.search_input)
+        
+        self.feedback_model = FeedbackListModel(self.feedback_system, parent=self)
+        self.feedback_list = QListView()
+        self.feedback_list.setModel(self.feedback_model)
+        self.feedback_list.setWordWrap(True)
+        self.feedback_list.setAlternatingRowColors(True)
+        layout.addWidget(self.feedback_list, 1)
+        
+        self.feedback_status = QLabel()
+        self.feedback_status.setStyleSheet('color: #7f8c8d;')
+        self.feedback_model.status_changed.connect(self.feedback_status.setText)
+        layout.addWidget(self.feedback_status)
+        
         self.setLayout(layout)
+        self.feedback_model.fetchMore()
+    
+    def search_feedback(self):
+        self.feedback_model.set_search(self.search_input.text().strip())
     
     def submit_feedback(self):
         message = self.message_input.toPlainText().strip()
@@ -675,38 +986,8 @@ class SortingAlgorithms:
     
     def initialize_algorithms(self):
         try:
-            # Check if algorithms already exist
-            check_query = "SELECT COUNT(*) FROM sorting_algorithms"
-            result = self.db.execute_query(check_query)
-            
-            if result[0][0] == 0:
-                # Insert default algorithms
-                algorithms_data = [
-                    ('Bubble Sort', 
-                     'Repeatedly steps through the list, compares adjacent elements and swaps them if they are in the wrong order.',
-                     'O(n²)', 'O(1)'),
-                    ('Selection Sort',
-                     'Divides the input into a sorted and unsorted region, and iteratively shrinks the unsorted region by extracting the smallest element.',
-                     'O(n²)', 'O(1)'),
-                    ('Insertion Sort',
-                     'Builds the final sorted array one item at a time by comparing each item with the already sorted portion and inserting it at the correct position.',
-                     'O(n²)', 'O(1)'),
-                    ('Quick Sort',
-                     'Uses a divide-and-conquer strategy, picking a pivot element and partitioning the array around it.',
-                     'O(n log n) average, O(n²) worst', 'O(log n)'),
-                    ('Merge Sort',
-                     'Divides the array into halves, recursively sorts them, and then merges the sorted halves.',
-                     'O(n log n)', 'O(n)'),
-                    ('Heap Sort',
-                     'Uses a binary heap data structure to sort elements, converting the array into a max heap and repeatedly extracting the maximum.',
-                     'O(n log n)', 'O(1)')
-                ]
-                
-                insert_query = """
-                    INSERT INTO sorting_algorithms (name, description, time_complexity, space_complexity)
-                    VALUES (%s, %s, %s, %s)
-                """
-                self.db.execute_many(insert_query, algorithms_data)
+            # Adds newly catalogued algorithms to databases seeded by older versions
+            sync_catalog(self.db)
         except Exception as e:
             logging.error(f"Error initializing algorithms: {e}")
             raise
@@ -733,14 +1014,69 @@ class SortingAlgorithms:
             return None
 
 class ResultsDialog(QDialog):
-    def __init__(self, left_algo_name, right_algo_name, time1, time2, algorithms, parent=None):
+    def __init__(self, left_algo_name, right_algo_name, time1, time2, algorithms, parent=None,
+                 memory1=None, memory2=None, array_data=None, comparison=None, profile1=None, profile2=None):
         super().__init__(parent)
+        self.comparison = comparison
+        self.array_data = array_data or []
         self.left_algo_name = left_algo_name
         self.right_algo_name = right_algo_name
         self.time1 = time1
         self.time2 = time2
         self.algorithms = algorithms
+        self.memory1 = memory1
+        self.memory2 = memory2
+        self.profile1 = profile1
+        self.profile2 = profile2
         self.init_ui()
+    
+    def format_winner(self):
+        """Describe the significance-tested outcome of the comparison"""
+        if not self.comparison:
+            return "No timing trials were run, so no winner was determined"
+        trials = self.comparison['trials']
+        p_value = self.comparison['p_value']
+        effect_size = self.comparison['effect_size']
+        left_median = sorted(self.comparison['left_times'])[trials // 2]
+        right_median = sorted(self.comparison['right_times'])[trials // 2]
+        medians = (f"Median over {trials} interleaved trials: {left_median:.3f}ms vs {right_median:.3f}ms\n"
+                   f"Mann-Whitney U p-value: {p_value:.4f}, effect size (Cliff's delta): {effect_size:.2f}")
+        if self.comparison['cached']:
+            medians += "\n(timings reused from the result cache)"
+        if self.comparison['winner'] is None:
+            return f"No significant difference\n{medians}"
+        winner = self.left_algo_name if self.comparison['winner'] == 'left' else self.right_algo_name
+        return f"{winner} is significantly faster\n{medians}"
+    
+    def format_baseline(self):
+        """Fast-path times of both algorithms relative to the native baseline"""
+        try:
+            baseline_time = time_fast(BASELINE_ALGORITHM, self.array_data)
+            lines = [f"{BASELINE_ALGORITHM}: {baseline_time:.3f}ms"]
+            for name in (self.left_algo_name, self.right_algo_name):
+                algo_time = time_fast(name, self.array_data)
+                ratio = algo_time / baseline_time if baseline_time else float('inf')
+                lines.append(f"{name} (fast path): {algo_time:.3f}ms, {ratio:.1f}x slower")
+            return "\n".join(lines)
+        except Exception as e:
+            logging.error(f"Error timing baseline: {e}")
+            return "Baseline timing unavailable"
+    
+    def format_memory(self, memory):
+        """Format a MemoryProfiler result for the details panel"""
+        if not memory:
+            return ""
+        rss = memory['rss_delta_kb']
+        rss_text = f"{rss:.1f}KB" if rss is not None else "n/a"
+        return (f"Peak Memory: {memory['peak_memory_kb']:.1f}KB "
+                f"(peak {memory['peak_blocks']} live blocks, RSS +{rss_text})")
+    
+    def format_profile(self, profile):
+        """Format a CallProfiler result for the details panel"""
+        if not profile:
+            return ""
+        hot = ", ".join(f"{label} {self_ms:.1f}ms" for label, self_ms in profile['hotspots'][:3])
+        return f"Hottest Functions: {hot}\n        Profile: {profile['profile_path']}"
         
     def init_ui(self):
         self.setWindowTitle('Sorting Comparison Results')
@@ -782,6 +1118,8 @@ class ResultsDialog(QDialog):
         
         left_details = QLabel(f"""
         Execution Time: {self.time1}ms
+        {self.format_memory(self.memory1)}
+        {self.format_profile(self.profile1)}
         Time Complexity: {left_algo_details['TimeComplexity']}
         Space Complexity: {left_algo_details['SpaceComplexity']}
         
@@ -812,6 +1150,8 @@ class ResultsDialog(QDialog):
         
         right_details = QLabel(f"""
         Execution Time: {self.time2}ms
+        {self.format_memory(self.memory2)}
+        {self.format_profile(self.profile2)}
         Time Complexity: {right_algo_details['TimeComplexity']}
         Space Complexity: {right_algo_details['SpaceComplexity']}
         
@@ -823,6 +1163,30 @@ class ResultsDialog(QDialog):
         right_group.setLayout(right_layout)
         scroll_layout.addWidget(right_group)
         
+        # Native baseline section: the animated times above include the timer
+        # delay, so time the fast paths on the same array instead
+        baseline_group = QFrame()
+        baseline_group.setFrameStyle(QFrame.StyledPanel)
+        baseline_group.setStyleSheet('''
+            QFrame {
+                background-color: #f8f9fa;
+                border-radius: 10px;
+                padding: 15px;
+            }
+        ''')
+        baseline_layout = QVBoxLayout()
+        
+        baseline_title = QLabel('Native Baseline')
+        baseline_title.setFont(QFont('Arial', 14, QFont.Bold))
+        baseline_title.setStyleSheet('color: #2c3e50;')
+        baseline_layout.addWidget(baseline_title)
+        
+        baseline_details = QLabel(self.format_baseline())
+        baseline_details.setWordWrap(True)
+        baseline_layout.addWidget(baseline_details)
+        baseline_group.setLayout(baseline_layout)
+        scroll_layout.addWidget(baseline_group)
+        
         # Winner section
         winner_group = QFrame()
         winner_group.setFrameStyle(QFrame.StyledPanel)
@@ -840,11 +1204,7 @@ class ResultsDialog(QDialog):
         winner_title.setStyleSheet('color: #2c3e50;')
         winner_layout.addWidget(winner_title)
         
-        winner = self.left_algo_name if self.time1 < self.time2 else self.right_algo_name
-        time_diff = abs(self.time1 - self.time2)
-        winner_details = QLabel(f"""
-        {winner} was faster by {time_diff}ms
-        """)
+        winner_details = QLabel(self.format_winner())
         winner_details.setWordWrap(True)
         winner_layout.addWidget(winner_details)
         winner_group.setLayout(winner_layout)
@@ -879,6 +1239,9 @@ class ResultsDialog(QDialog):
         self.setLayout(layout)
 
 class SortingVisualizer(QWidget):
+    # Results of analyze, from its worker thread to show_results
+    analysis_finished = pyqtSignal(object)
+    
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
@@ -889,9 +1252,12 @@ class SortingVisualizer(QWidget):
         self.complete2 = False
         self.current_algo1 = None
         self.current_algo2 = None
-        self.settings = Settings(self.main_window.current_user)
-        self.logger = LoggingSystem()
-        self.feedback_system = FeedbackSystem()
+        self.session = self.main_window.session
+        self.settings = self.session.settings
+        self.logger = LoggingSystem(self.session)
+        self.feedback_system = FeedbackSystem(self.session)
+        # Register installed algorithm plugins before the catalog gets synced
+        load_plugins()
         self.algorithms = SortingAlgorithms()  # Initialize algorithms database
         self.completion_message = ""
         self.start_time = None
@@ -901,15 +1267,31 @@ class SortingVisualizer(QWidget):
         self.time2 = None
         self.running_second = False
         
+        self.memory1 = None
+        self.memory2 = None
+        self.memory_profiler = MemoryProfiler()
+        self.profile1 = None
+        self.profile2 = None
+        self.call_profiler = CallProfiler()
+        self.comparison = None
+        self.steps1 = 0
+        self.steps2 = 0
+        # Last step event of each side, for highlighting
+        self.event1 = None
+        self.event2 = None
+        self.trace_reader = None
+        # Trials and profiles of a finished comparison are running (see start_analysis)
+        self.analyzing = False
+        self.analysis_finished.connect(self.show_results)
+        self.metrics = VisualizerMetrics()
+        try:
+            self.result_cache = ResultCache()
+        except Exception as e:
+            logging.error(f"Error opening result cache: {e}")
+            self.result_cache = None
+        
         # Define algorithm map
-        self.algo_map = {
-            'Bubble Sort': lambda arr: self.bubble_sort(arr),
-            'Selection Sort': lambda arr: self.selection_sort(arr),
-            'Insertion Sort': lambda arr: self.insertion_sort(arr),
-            'Quick Sort': lambda arr: self.quick_sort(arr),
-            'Merge Sort': lambda arr: self.merge_sort(arr),
-            'Heap Sort': lambda arr: self.heap_sort(arr)
-        }
+        self.algo_map = ALGORITHMS
         
         self.init_ui()
         
@@ -922,15 +1304,6 @@ class SortingVisualizer(QWidget):
         # Menu bar
         menu_layout = QHBoxLayout()
         
-        algorithms = [
-            ('Merge Sort', self.merge_sort),
-            ('Quick Sort', self.quick_sort),
-            ('Bubble Sort', self.bubble_sort),
-            ('Insertion Sort', self.insertion_sort),
-            ('Selection Sort', self.selection_sort),
-            ('Heap Sort', self.heap_sort)
-        ]
-        
         # Settings button with gear icon (no background)
         settings_btn = QPushButton('⚙️')
         settings_btn.setStyleSheet('''
@@ -950,8 +1323,8 @@ class SortingVisualizer(QWidget):
         menu_layout.addWidget(settings_btn)
         
         # Randomize button
-        randomize_btn = QPushButton('Randomize')
-        randomize_btn.setStyleSheet('''
+        self.randomize_btn = QPushButton('Randomize')
+        self.randomize_btn.setStyleSheet('''
             QPushButton {
                 background-color: #3498db;
                 color: white;
@@ -965,8 +1338,87 @@ class SortingVisualizer(QWidget):
                 background-color: #2980b9;
             }
         ''')
-        randomize_btn.clicked.connect(self.randomize_array)
-        menu_layout.addWidget(randomize_btn)
+        self.randomize_btn.clicked.connect(self.randomize_array)
+        menu_layout.addWidget(self.randomize_btn)
+        
+        # Replay a trace recorded by the benchmark runner
+        load_trace_btn = QPushButton('Load Trace')
+        load_trace_btn.setStyleSheet('''
+            QPushButton {
+                background-color: #34495e;
+                color: white;
+                padding: 8px 20px;
+                border: none;
+                border-radius: 5px;
+                font-size: 12px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #2c3e50;
+            }
+        ''')
+        load_trace_btn.clicked.connect(self.load_trace)
+        menu_layout.addWidget(load_trace_btn)
+        
+        # Opt-in memory profiling of each run (adds a second, traced run per algorithm)
+        self.profile_memory_check = QCheckBox('Profile Memory')
+        self.profile_memory_check.setStyleSheet('''
+            QCheckBox {
+                font-size: 12px;
+                color: #2c3e50;
+                padding: 5px;
+            }
+        ''')
+        menu_layout.addWidget(self.profile_memory_check)
+        
+        # Opt-in cProfile run of each algorithm, saved under DEFAULT_PROFILE_DIR
+        self.profile_cpu_check = QCheckBox('Profile CPU')
+        self.profile_cpu_check.setStyleSheet('''
+            QCheckBox {
+                font-size: 12px;
+                color: #2c3e50;
+                padding: 5px;
+            }
+        ''')
+        menu_layout.addWidget(self.profile_cpu_check)
+        
+        # Measure again even if this comparison's results are cached
+        self.fresh_check = QCheckBox('Fresh Measurement')
+        self.fresh_check.setStyleSheet('''
+            QCheckBox {
+                font-size: 12px;
+                color: #2c3e50;
+                padding: 5px;
+            }
+        ''')
+        menu_layout.addWidget(self.fresh_check)
+        
+        # Color the elements each step compares or moves
+        self.highlight_check = QCheckBox('Highlight Steps')
+        self.highlight_check.setChecked(True)
+        self.highlight_check.setStyleSheet('''
+            QCheckBox {
+                font-size: 12px;
+                color: #2c3e50;
+                padding: 5px;
+            }
+        ''')
+        self.highlight_check.toggled.connect(lambda: self.visualization1.update())
+        self.highlight_check.toggled.connect(lambda: self.visualization2.update())
+        menu_layout.addWidget(self.highlight_check)
+        
+        # Overlay the step rate and frame timing metrics of each panel
+        self.hud_check = QCheckBox('Show HUD')
+        self.hud_check.setStyleSheet('''
+            QCheckBox {
+                font-size: 12px;
+                color: #2c3e50;
+                padding: 5px;
+            }
+        ''')
+        self.hud_check.toggled.connect(lambda: self.visualization1.update())
+        self.hud_check.toggled.connect(lambda: self.visualization2.update())
+        menu_layout.addWidget(self.hud_check)
         
         # Add flexible space
         menu_layout.addStretch()
@@ -1016,8 +1468,8 @@ class SortingVisualizer(QWidget):
         center_layout = QHBoxLayout()
         center_layout.addStretch()
         
-        compare_btn = QPushButton('Start Comparison')
-        compare_btn.setStyleSheet('''
+        self.compare_btn = QPushButton('Start Comparison')
+        self.compare_btn.setStyleSheet('''
             QPushButton {
                 background-color: #2ecc71;
                 color: white;
@@ -1036,8 +1488,8 @@ class SortingVisualizer(QWidget):
                 background-color: #219a52;
             }
         ''')
-        compare_btn.clicked.connect(self.start_comparison)
-        center_layout.addWidget(compare_btn)
+        self.compare_btn.clicked.connect(self.start_comparison)
+        center_layout.addWidget(self.compare_btn)
         center_layout.addStretch()
         
         layout.addLayout(center_layout)
@@ -1074,7 +1526,7 @@ class SortingVisualizer(QWidget):
                 border: 2px solid #3498db;
             }
         ''')
-        for name, _ in algorithms:
+        for name in self.algo_map:
             self.left_algo_combo.addItem(name)
         left_algo_layout.addWidget(self.left_algo_combo)
         left_viz.addLayout(left_algo_layout)
@@ -1123,7 +1575,7 @@ class SortingVisualizer(QWidget):
                 border: 2px solid #3498db;
             }
         ''')
-        for name, _ in algorithms:
+        for name in self.algo_map:
             self.right_algo_combo.addItem(name)
         right_algo_layout.addWidget(self.right_algo_combo)
         right_viz.addLayout(right_algo_layout)
@@ -1131,6 +1583,13 @@ class SortingVisualizer(QWidget):
         viz_layout.addLayout(right_viz)
         
         layout.addLayout(viz_layout)
+        
+        # Scrubs through a loaded trace; hidden otherwise
+        self.scrub_slider = QSlider(Qt.Horizontal)
+        self.scrub_slider.setRange(0, SCRUB_RESOLUTION)
+        self.scrub_slider.sliderMoved.connect(self.scrub_trace)
+        self.scrub_slider.hide()
+        layout.addWidget(self.scrub_slider)
         self.setLayout(layout)
         
         # Timer for animation
@@ -1146,6 +1605,7 @@ class SortingVisualizer(QWidget):
             self.visualization2.update()
     
     def randomize_array(self):
+        self.close_trace()
         self.Barr = [random.randint(10, WINDOW_HEIGHT-100) for _ in range(ARR_SIZE)]
         self.arr1 = self.Barr.copy()
         self.arr2 = self.Barr.copy()
@@ -1155,6 +1615,8 @@ class SortingVisualizer(QWidget):
         self.visualization2.update()
         
     def start_comparison(self):
+        self.close_trace()
+        
         # Get selected algorithms
         self.left_algo_name = self.left_algo_combo.currentText()
         self.right_algo_name = self.right_algo_combo.currentText()
@@ -1168,23 +1630,45 @@ class SortingVisualizer(QWidget):
         self.start_time = None
         self.time1 = None
         self.time2 = None
+        self.memory1 = None
+        self.memory2 = None
+        self.profile1 = None
+        self.profile2 = None
+        self.comparison = None
+        self.steps1 = 0
+        self.steps2 = 0
+        self.event1 = None
+        self.event2 = None
         self.running_second = False
         
         # Start first algorithm
         self.current_algo1 = self.algo_map[self.left_algo_name](self.arr1)
         self.current_algo2 = None
+        self.start_timer()
+    
+    def start_timer(self):
+        # The time since the last run isn't timer drift
+        self.metrics.pause()
         self.timer.start(100 // self.settings.animation_speed)
     
     def update_visualization(self):
+        if self.trace_reader:
+            self.update_trace_replay()
+            return
+        
         if not self.start_time:
             self.start_time = QTime.currentTime()
             
         if self.current_algo1 or self.current_algo2:
             try:
                 if self.current_algo1:
-                    next(self.current_algo1)
+                    self.event1 = next(self.current_algo1)
+                    self.steps1 += 1
+                    self.metrics.tick('left', self.timer.interval())
                 elif self.current_algo2:
-                    next(self.current_algo2)
+                    self.event2 = next(self.current_algo2)
+                    self.steps2 += 1
+                    self.metrics.tick('right', self.timer.interval())
                 
                 # Update visualizations
                 self.visualization1.update()
@@ -1206,27 +1690,7 @@ class SortingVisualizer(QWidget):
                     self.current_algo2 = None
                     self.time2 = self.start_time.msecsTo(current_time)
                     self.timer.stop()
-                    
-                    # Show results dialog
-                    dialog = ResultsDialog(
-                        self.left_algo_name,
-                        self.right_algo_name,
-                        self.time1,
-                        self.time2,
-                        self.algorithms,
-                        self
-                    )
-                    dialog.exec_()
-                    
-                    # Log the comparison results
-                    self.logger.add_log(
-                        username=self.main_window.current_user,
-                        left_algo=self.left_algo_name,
-                        right_algo=self.right_algo_name,
-                        time1=self.time1,
-                        time2=self.time2,
-                        array_data=self.Barr.copy()
-                    )
+                    self.start_analysis()
                 
                 self.visualization1.update()
                 self.visualization2.update()
@@ -1240,138 +1704,228 @@ class SortingVisualizer(QWidget):
                 self.time1,
                 self.time2,
                 self.algorithms,
-                self
+                self,
+                memory1=self.memory1,
+                memory2=self.memory2,
+                array_data=self.Barr,
+                comparison=self.comparison,
+                profile1=self.profile1,
+                profile2=self.profile2
             )
             dialog.exec_()
             self.visualization1.update()
             self.visualization2.update()
     
-    def logout(self):
-        # Save current settings before logout
-        self.settings.save_settings()
-        self.main_window.show_login()
+    def start_analysis(self):
+        """Run the trials and profiles of the finished comparison on a worker thread.
+
+        They sort the array many more times than the animation did, so the
+        window would stop responding; the results come back through
+        analysis_finished, a queued signal.
+        """
+        self.analyzing = True
+        self.compare_btn.setEnabled(False)
+        self.compare_btn.setText('Running trials...')
+        self.randomize_btn.setEnabled(False)
+        options = {
+            'fresh': self.fresh_check.isChecked(),
+            'memory': self.profile_memory_check.isChecked(),
+            'cpu': self.profile_cpu_check.isChecked()
+        }
+        threading.Thread(target=self.analyze, args=(self.Barr.copy(), options), daemon=True).start()
+    
+    def analyze(self, data, options):
+        """Worker thread: trials, step counts and the requested profiles of `data`"""
+        results = {'comparison': None, 'memory1': None, 'memory2': None, 'profile1': None, 'profile2': None}
+        cache = None
+        try:
+            # A SQLite connection can't be shared between threads; open another on the same file
+            if self.result_cache:
+                cache = ResultCache(self.result_cache.path)
+            results['comparison'] = self.run_trials(cache, data, options['fresh'])
+            self.cache_step_counts(cache, data)
+            if options['memory']:
+                results['memory1'], results['memory2'] = self.profile_memory(cache, data, options['fresh'])
+            if options['cpu']:
+                results['profile1'], results['profile2'] = self.profile_cpu(data)
+        except Exception as e:
+            logging.error(f"Error analyzing comparison: {e}")
+        finally:
+            if cache:
+                cache.close()
+            self.analysis_finished.emit(results)
+    
+    def show_results(self, results):
+        """Show the results dialog and log the comparison, once analyze is done"""
+        self.analyzing = False
+        self.compare_btn.setEnabled(True)
+        self.compare_btn.setText('Start Comparison')
+        self.randomize_btn.setEnabled(True)
+        self.comparison = results['comparison']
+        self.memory1 = results['memory1']
+        self.memory2 = results['memory2']
+        self.profile1 = results['profile1']
+        self.profile2 = results['profile2']
+        
+        # Show results dialog
+        dialog = ResultsDialog(
+            self.left_algo_name,
+            self.right_algo_name,
+            self.time1,
+            self.time2,
+            self.algorithms,
+            self,
+            memory1=self.memory1,
+            memory2=self.memory2,
+            array_data=self.Barr,
+            comparison=self.comparison,
+            profile1=self.profile1,
+            profile2=self.profile2
+        )
+        dialog.exec_()
         
-    # Sorting algorithms
-    def bubble_sort(self, arr):
-        for i in range(ARR_SIZE-1):
-            for j in range(ARR_SIZE-1-i):
-                if arr[j+1] < arr[j]:
-                    arr[j], arr[j+1] = arr[j+1], arr[j]
-                    yield
+        # Log the comparison results, unless they were reused from
+        # the cache and so have been logged already
+        if not (self.comparison and self.comparison['cached']):
+            self.logger.add_log(
+                username=self.main_window.current_user,
+                left_algo=self.left_algo_name,
+                right_algo=self.right_algo_name,
+                time1=self.time1,
+                time2=self.time2,
+                array_data=self.Barr.copy(),
+                memory1=self.memory1,
+                memory2=self.memory2,
+                comparison=self.comparison,
+                profile1=self.profile1,
+                profile2=self.profile2
+            )
+        self.visualization1.update()
+        self.visualization2.update()
     
-    def selection_sort(self, arr):
-        n = len(arr)
-        for i in range(n):
-            min_idx = i
-            # Find minimum element in unsorted array
-            for j in range(i + 1, n):
-                # Show comparison
-                if arr[j] < arr[min_idx]:
-                    min_idx = j
-                yield  # Yield after each comparison to show the process
-            # Swap if minimum element is not at current position
-            if min_idx != i:
-                arr[i], arr[min_idx] = arr[min_idx], arr[i]
-                yield  # Yield after each swap
+    def run_trials(self, cache, data, fresh):
+        """Time both algorithms over interleaved trials to decide the winner"""
+        try:
+            return compare_algorithms(self.left_algo_name, self.right_algo_name, data,
+                                      cache=cache, fresh=fresh)
+        except Exception as e:
+            logging.error(f"Error running comparison trials: {e}")
+            return None
     
-    def insertion_sort(self, arr):
-        for i in range(1, ARR_SIZE):
-            key = arr[i]
-            j = i-1
-            while j >= 0 and arr[j] > key:
-                arr[j+1] = arr[j]
-                j -= 1
-                yield
-            arr[j+1] = key
-            yield
+    def visual_cache_key(self, cache, algorithm_name, data):
+        """Result cache key of the visual generator sorting `data`"""
+        return cache.make_key(algorithm_name, self.algo_map[algorithm_name], 'generator', data)
     
-    def quick_sort(self, arr):
-        def partition(low, high):
-            i = low - 1
-            pivot = arr[high]
-            for j in range(low, high):
-                if arr[j] <= pivot:
-                    i += 1
-                    arr[i], arr[j] = arr[j], arr[i]
-                    yield
-            arr[i+1], arr[high] = arr[high], arr[i+1]
-            return i + 1
-
-        def quick_sort_helper(low, high):
-            if low < high:
-                pi = yield from partition(low, high)
-                yield from quick_sort_helper(low, pi-1)
-                yield from quick_sort_helper(pi+1, high)
-
-        yield from quick_sort_helper(0, len(arr)-1)
+    def cache_step_counts(self, cache, data):
+        try:
+            if cache:
+                cache.update(self.visual_cache_key(cache, self.left_algo_name, data), steps=self.steps1)
+                cache.update(self.visual_cache_key(cache, self.right_algo_name, data), steps=self.steps2)
+        except Exception as e:
+            logging.error(f"Error caching step counts: {e}")
     
-    def merge_sort(self, arr):
-        def merge(l, m, r):
-            left = arr[l:m+1]
-            right = arr[m+1:r+1]
-            i = j = 0
-            k = l
-            while i < len(left) and j < len(right):
-                if left[i] <= right[j]:
-                    arr[k] = left[i]
-                    i += 1
-                else:
-                    arr[k] = right[j]
-                    j += 1
-                k += 1
-                yield
-
-            while i < len(left):
-                arr[k] = left[i]
-                i += 1
-                k += 1
-                yield
-
-            while j < len(right):
-                arr[k] = right[j]
-                j += 1
-                k += 1
-                yield
-
-        def merge_sort_helper(l, r):
-            if l < r:
-                m = (l + r) // 2
-                yield from merge_sort_helper(l, m)
-                yield from merge_sort_helper(m + 1, r)
-                yield from merge(l, m, r)
-
-        yield from merge_sort_helper(0, len(arr)-1)
+    def profile_memory(self, cache, data, fresh):
+        """Re-run both algorithms on the original array under the memory profiler"""
+        try:
+            return (self.profile_algorithm(cache, self.left_algo_name, data, fresh),
+                    self.profile_algorithm(cache, self.right_algo_name, data, fresh))
+        except Exception as e:
+            logging.error(f"Error profiling memory: {e}")
+            return None, None
     
-    def heap_sort(self, arr):
-        def heapify(n, i):
-            largest = i
-            left = 2 * i + 1
-            right = 2 * i + 2
-
-            if left < n and arr[left] > arr[largest]:
-                largest = left
-
-            if right < n and arr[right] > arr[largest]:
-                largest = right
-
-            if largest != i:
-                arr[i], arr[largest] = arr[largest], arr[i]
-                yield
-                yield from heapify(n, largest)
-
-        def build_heap():
-            n = len(arr)
-            for i in range(n//2 - 1, -1, -1):
-                yield from heapify(n, i)
-
-        n = len(arr)
-        yield from build_heap()
-
-        for i in range(n-1, 0, -1):
-            arr[0], arr[i] = arr[i], arr[0]
-            yield
-            yield from heapify(i, 0)
-
+    def profile_algorithm(self, cache, algorithm_name, data, fresh):
+        """Memory profile of one algorithm on `data`, from the cache when possible"""
+        key = None
+        if cache:
+            key = self.visual_cache_key(cache, algorithm_name, data)
+            entry = cache.get(key)
+            if entry and 'peak_blocks' in (entry.get('memory') or {}) and not fresh:
+                return entry['memory']
+        memory = self.memory_profiler.profile(self.algo_map[algorithm_name](data.copy()))
+        if key:
+            cache.update(key, memory=memory)
+        return memory
+    
+    def profile_cpu(self, data):
+        """Re-run both algorithms on the original array under cProfile"""
+        try:
+            os.makedirs(DEFAULT_PROFILE_DIR, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            profiles = []
+            for algorithm_name in (self.left_algo_name, self.right_algo_name):
+                name = f"{file_slug(algorithm_name)}_visual_n{len(data)}_{stamp}"
+                path = os.path.join(DEFAULT_PROFILE_DIR, name)
+                profiles.append(self.call_profiler.profile(self.algo_map[algorithm_name](data.copy()), path))
+            return tuple(profiles)
+        except Exception as e:
+            logging.error(f"Error profiling algorithms: {e}")
+            return None, None
+    
+    def load_trace(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Load Trace', '', 'Sort traces (*.trace);;All files (*)')
+        if not path:
+            return
+        try:
+            reader = TraceReader(path)
+        except Exception as e:
+            logging.error(f"Error loading trace: {e}")
+            QMessageBox.warning(self, 'Error', f'Could not load trace: {e}')
+            return
+        
+        self.timer.stop()
+        self.close_trace()
+        self.trace_reader = reader
+        self.current_algo2 = None
+        self.event1 = None
+        self.arr1 = reader.seek(0)
+        self.arr2 = []
+        self.complete1 = False
+        self.complete2 = False
+        self.scrub_slider.setValue(0)
+        self.scrub_slider.show()
+        self.current_algo1 = reader.replay(self.arr1)
+        self.start_timer()
+    
+    def update_trace_replay(self):
+        """Plays the loaded trace one step per tick in the left panel"""
+        try:
+            self.event1 = next(self.current_algo1)
+            self.metrics.tick('left', self.timer.interval())
+        except StopIteration:
+            self.timer.stop()
+            self.complete1 = True
+        reader = self.trace_reader
+        if reader.total_steps:
+            self.scrub_slider.setValue(reader.step * SCRUB_RESOLUTION // reader.total_steps)
+        self.visualization1.update()
+    
+    def scrub_trace(self, position):
+        """Jump the replay to the step under the scrub slider and keep playing from there"""
+        reader = self.trace_reader
+        if not reader:
+            return
+        reader.seek(position * reader.total_steps // SCRUB_RESOLUTION, self.arr1)
+        self.event1 = None
+        self.complete1 = reader.step >= reader.total_steps
+        self.current_algo1 = reader.replay(self.arr1)
+        if not self.complete1 and not self.timer.isActive():
+            self.start_timer()
+        self.visualization1.update()
+    
+    def close_trace(self):
+        if self.trace_reader:
+            self.timer.stop()
+            self.current_algo1 = None
+            self.trace_reader.close()
+            self.trace_reader = None
+            self.scrub_slider.hide()
+    
+    def logout(self):
+        self.close_trace()
+        # Save current settings before logout
+        self.settings.save_settings()
+        self.main_window.show_login()
+        
     def show_feedback(self):
         dialog = FeedbackDialog(self.feedback_system, self.main_window.current_user, self)
         dialog.exec_()
@@ -1382,31 +1936,72 @@ class VisualizationWidget(QWidget):
         self.parent = parent
         self.is_left = is_left
         self.setMinimumHeight(WINDOW_HEIGHT - 150)
+        self._palette_key = None
+        self._palette = None
+    
+    def frame_palette(self):
+        """Pixel values of the bar colors, rebuilt only when the settings change"""
+        settings = self.parent.settings
+        background = self.palette().color(self.backgroundRole())
+        key = (settings.default_color.rgb(), settings.complete_color.rgb(), background.rgb())
+        if key != self._palette_key:
+            self._palette = make_palette(bar=settings.default_color.getRgb()[:3],
+                                         complete=settings.complete_color.getRgb()[:3],
+                                         background=background.getRgb()[:3])
+            self._palette_key = key
+        return self._palette
+    
+    def draw_frame(self, painter, arr, complete, highlights=()):
+        """Rasterize the whole array with NumPy and draw it with a single blit"""
+        if self.width() <= 0 or self.height() <= 0:
+            return
+        # Values are bar heights in pixels, so scale against the widget height
+        frame = rasterize(arr, self.width(), self.height(), self.frame_palette(),
+                          default=COMPLETE if complete else BAR, max_value=self.height(),
+                          highlights=highlights)
+        # The QImage shares frame's memory, which stays alive until this returns
+        painter.drawImage(0, 0, to_qimage(frame))
+    
+    def draw_bars(self, painter, arr, complete):
+        """One fillRect per element, for when NumPy isn't available"""
+        # Calculate spacing to center the visualization; narrow the bars when
+        # a (loaded trace) array doesn't fit at the usual width
+        rect_width = RECT_WIDTH
+        if arr and len(arr) * RECT_WIDTH > self.width():
+            rect_width = max(1, self.width() // len(arr))
+        gap = 1 if rect_width > 2 else 0
+        total_width = len(arr) * rect_width
+        start_x = max(0, (self.width() - total_width) // 2)
+        color = self.parent.settings.complete_color if complete else self.parent.settings.default_color
+        
+        for i, val in enumerate(arr):
+            painter.fillRect(
+                start_x + (i * rect_width),
+                self.height() - val,
+                rect_width - gap,  # Add small gap between bars
+                val,
+                color
+            )
         
     def paintEvent(self, event):
+        metrics = self.parent.metrics
+        paint_started = metrics.paint_started()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
         
-        # Calculate spacing to center the visualization
-        total_width = ARR_SIZE * RECT_WIDTH
-        start_x = (self.width() - total_width) // 2
-        
         # Draw array elements
         arr = self.parent.arr1 if self.is_left else self.parent.arr2
         complete = self.parent.complete1 if self.is_left else self.parent.complete2
         
-        for i, val in enumerate(arr):
-            color = self.parent.settings.default_color
-            if complete:
-                color = self.parent.settings.complete_color
-            
-            painter.fillRect(
-                start_x + (i * RECT_WIDTH),
-                self.height() - val,
-                RECT_WIDTH - 1,  # Add small gap between bars
-                val,
-                color
-            )
+        event = self.parent.event1 if self.is_left else self.parent.event2
+        highlights = ()
+        if self.parent.highlight_check.isChecked() and not complete:
+            highlights = event_highlights(event)
+        
+        if np is not None:
+            self.draw_frame(painter, arr, complete, highlights)
+        else:
+            self.draw_bars(painter, arr, complete)
         
         # Draw completion message if both algorithms are done
         if self.parent.complete1 and self.parent.complete2 and self.parent.completion_message:
@@ -1433,6 +2028,20 @@ class VisualizationWidget(QWidget):
                     line.strip()
                 )
                 y_offset += 25  # Increase spacing between lines
+        
+        panel = 'left' if self.is_left else 'right'
+        metrics.paint_finished(panel, paint_started)
+        if self.parent.hud_check.isChecked():
+            self.draw_hud(painter, metrics.panels[panel].snapshot())
+    
+    def draw_hud(self, painter, stats):
+        """Metrics overlay in the top left corner (not included in the paint time)"""
+        lines = format_metrics(stats).split(', ')
+        painter.fillRect(5, 5, 260, 18 * len(lines) + 10, QColor(255, 255, 255, 200))
+        painter.setPen(Qt.black)
+        painter.setFont(QFont('Courier', 9))
+        for i, line in enumerate(lines):
+            painter.drawText(12, 22 + 18 * i, line)
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -1440,6 +2049,7 @@ class MainWindow(QMainWindow):
         self.setWindowTitle('Sorting Visualizer')
         self.setFixedSize(WINDOW_WIDTH, WINDOW_HEIGHT)
         self.current_user = None
+        self.session = None
         
         # Create stacked widget for switching between login and visualizer
         self.stacked_widget = QStackedWidget()
@@ -1457,6 +2067,7 @@ class MainWindow(QMainWindow):
     def show_login(self):
         # Reset current user and destroy visualizer
         self.current_user = None
+        self.session = None
         if self.sorting_visualizer:
             self.stacked_widget.removeWidget(self.sorting_visualizer)
             self.sorting_visualizer.deleteLater()
@@ -1473,4 +2084,6 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    status = app.exec()
+    close_background_database()
+    sys.exit(status)
\ No newline at end of file